@@ -9,15 +9,16 @@ class Dispatcher:
     """
     def __init__(self, cfg: Dict[str, Any]):
         self.cfg = cfg
+        self._warned: set = set()
 
     def route_kind(self, kind: str) -> str:
         mapping = self.cfg.get("routing", {}).get("map", {})
         route = mapping.get(kind)
         if not route:
-            print(f"⚠️ Unknown task kind: {kind} — using fallback route.")
+            if kind not in self._warned:
+                self._warned.add(kind)
+                print(f"⚠️ Unknown task kind: {kind} — using fallback route.")
             route = self.cfg.get("routing", {}).get("fallback", "skip")
-        else:
-            print(f"🔀 Routing kind '{kind}' → '{route}'")
         return route
 
     def should_skip(self, kind: str) -> bool:
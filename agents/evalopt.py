@@ -1,6 +1,11 @@
 from __future__ import annotations
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+import threading
 import time
+from dataclasses import replace
+from core.registry import HandlerRegistry
+from core.types import Artifact, Report, Task
+from utils.io import say
 
 class EvaluatorOptimizer:
     """
@@ -10,41 +15,69 @@ class EvaluatorOptimizer:
     """
 
     def __init__(self, rubric: Dict[str, Any], memory):
+        self.spec = rubric
         self.rubric = rubric.get("rubric", [])
+        self.threshold = rubric.get("threshold", 0.8)
+        self.suggestion = rubric.get("suggestion", "Add clearer takeaways or benchmark comparisons.")
         self.memory = memory
+        self._engine = None
+        self._lock = threading.Lock()
 
-    def score(self, report_md: str, symbol: str, stats: Dict[str, Any]) -> Tuple[float, List[Dict[str, Any]]]:
-        """Evaluate a report and return (score, improvement_suggestions)."""
-        issues = []
-        total, weight_sum = 0.0, 0.0
-
-        for item in self.rubric:
-            w = float(item.get("weight", 0.25))
-            cid = item.get("id")
-            weight_sum += w
-            s = 0.7  # base score
+    @property
+    def engine(self):
+        """The compiled rubric, built on first use (it needs numpy; planning doesn't)."""
+        with self._lock:
+            if self._engine is None:
+                from agents.rubric import CompiledRubric
+                self._engine = CompiledRubric.from_rubric(self.spec)
+            return self._engine
 
-            if cid == "coverage":
-                needs = ["return", "volatility", "trend", "sentiment"]
-                have = all(n in report_md.lower() for n in needs)
-                s = 0.9 if have else 0.5
+    def register(self, registry: HandlerRegistry):
+        registry.register("evaluate", "evalopt", self.handle_evaluate, artifact="eval", cost=0.05,
+                          batch_fn=self.handle_evaluate_batch, max_batch=256,
+                          settings={"rubric": self.rubric, "threshold": self.threshold,
+                                    "suggestion": self.suggestion},
+                          on_reuse=self.handle_reused)
 
-            elif cid == "recency":
-                s = 0.9 if stats and stats.get("asof") else 0.6
+    def handle_evaluate(self, task: Task, inputs: Dict[str, Artifact]) -> Tuple[Optional[Report], Dict[str, Any]]:
+        """Score the upstream summary and return an improved copy of it; the score is remembered."""
+        return self.handle_evaluate_batch([task], [inputs])[0]
 
-            elif cid == "correctness":
-                s = 0.85 if "closed at" in report_md else 0.6
+    def handle_evaluate_batch(self, tasks: List[Task], inputs: List[Dict[str, Artifact]]) -> List[Tuple[Optional[Report], Dict[str, Any]]]:
+        reports = []
+        for task, inp in zip(tasks, inputs):
+            if "summarize" not in inp:
+                print(f"⚠️ No report found for {task.params.get('symbol')} during evaluation")
+            reports.append(inp["summarize"].content if "summarize" in inp else None)
+        scored = [r for r in reports if r is not None]
+        scores = self.engine.score_batch([r.markdown for r in scored], [r.sections.get("stats", {}) for r in scored])
+        by_id = {id(r): s for r, s in zip(scored, scores)}
 
-            elif cid == "actionability":
-                s = 0.75 if "recent headlines" in report_md else 0.6
+        out = []
+        for task, rep in zip(tasks, reports):
+            if rep is None:
+                out.append((None, {}))
+                continue
+            symbol = task.params.get("symbol")
+            score = by_id[id(rep)]
+            suggestions = self.engine.suggestions(symbol, score)
+            evaluation = {"score": score, "suggestions": suggestions}
+            rep = replace(rep, markdown=self.optimize(rep.markdown, suggestions),
+                          sections={**rep.sections, "evaluation": evaluation})
+            self.remember(symbol, score)
+            say(f"🧠 Evaluation complete for {symbol} (score={score:.2f})")
+            out.append((rep, evaluation))
+        return out
 
-            total += s * w
+    def handle_reused(self, task: Task, report: Optional[Report], evaluation: Dict[str, Any]):
+        """A memoized evaluation still counts as a run: its score goes into the history."""
+        if report is not None and "score" in evaluation:
+            self.remember(task.params.get("symbol"), evaluation["score"])
 
-        final = total / (weight_sum or 1.0)
-        if final < 0.8:
-            issues.append({"symbol": symbol, "suggestion": "Add clearer takeaways or benchmark comparisons."})
-
-        return final, issues
+    def score(self, report_md: str, symbol: str, stats: Dict[str, Any]) -> Tuple[float, List[Dict[str, Any]]]:
+        """Evaluate a report and return (score, improvement_suggestions)."""
+        score = self.engine.score_batch([report_md], [stats])[0]
+        return score, self.engine.suggestions(symbol, score)
 
     def optimize(self, report_md: str, suggestions: List[Dict[str, Any]]) -> str:
         """Append improvement suggestions to the report."""
@@ -54,5 +87,5 @@ class EvaluatorOptimizer:
         return report_md + addendum
 
     def remember(self, symbol: str, score: float):
-        """Persist a memory record of the last evaluation score."""
-        self.memory.update_key(f"score:{symbol}", {"ts": int(time.time()), "score": score})
+        """Persist the evaluation score; the memory keeps a per-symbol score history."""
+        self.memory.append(f"score:{symbol}", {"ts": int(time.time()), "score": score})
@@ -0,0 +1,95 @@
+from __future__ import annotations
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from core.registry import HandlerRegistry
+from core.types import Artifact, Task
+from tools.edgar import FilingCache, get_filing_source, parse_many
+from utils import trace
+from utils.io import say
+
+# Indexes (^GSPC), futures (ES=F) and FX pairs don't file with the SEC
+EQUITY_TICKER = re.compile(r"^[A-Z][A-Z0-9.\-]{0,9}$")
+
+
+def filing_tickers(cfg: Dict[str, Any]) -> List[str]:
+    """Tickers that get a filings task: `filings.tickers`, else the equities in the universe."""
+    f = cfg.get("filings", {})
+    if f.get("tickers"):
+        return list(f["tickers"])
+    return [t for t in cfg.get("universe", {}).get("tickers", []) if EQUITY_TICKER.match(t)]
+
+
+class FilingAgent:
+    """Filing Agent fetches each ticker's latest annual report and extracts headline financials."""
+
+    def __init__(self, cfg: Dict[str, Any]):
+        self.cfg = cfg
+        f = cfg.get("filings", {})
+        self.form = f.get("form", "10-K")
+        self.workers = int(f.get("workers", 4))
+        self._cache: Optional[FilingCache] = None
+        self._source = None
+
+    # Built on first use, so constructing the agent (e.g. for --plan-only) creates no directories
+    @property
+    def cache(self) -> FilingCache:
+        if self._cache is None:
+            self._cache = FilingCache.from_config(self.cfg)
+        return self._cache
+
+    @property
+    def source(self):
+        if self._source is None:
+            self._source = get_filing_source(self.cfg)
+        return self._source
+
+    def register(self, registry: HandlerRegistry):
+        registry.register("filings", "filing", self.handle_filing, exec_class="io", cost=8.0,
+                          batch_fn=self.handle_filings_batch,
+                          max_batch=int(self.cfg.get("filings", {}).get("batch_size", 16)), memoize=False)
+
+    def collect(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """{ticker: financials}; unchanged filings reuse their cached parse, the rest parse in a process pool."""
+        out: Dict[str, Dict[str, Any]] = {}
+        refs: Dict[str, Dict[str, Any]] = {}
+        todo: Dict[str, bytes] = {}
+        for t in tickers:
+            try:
+                with trace.span(f"filing:{t}", "provider", form=self.form) as sp:
+                    ref, data = self.cache.fetch(t, self.form, self.source)
+                    sp.set(bytes=len(data))
+            except Exception as e:
+                print(f"⚠️ No {self.form} filing for {t}: {e}")
+                out[t] = {"form": self.form, "error": str(e)}
+                continue
+            refs[t] = ref
+            parsed = self.cache.parsed(ref["sha"])
+            if parsed is not None:
+                out[t] = parsed
+            else:
+                todo[t] = data
+
+        if todo:
+            with trace.span("filings:parse", "compute", filings=len(todo)):
+                parsed_all = parse_many(todo, self.workers)
+            for t, parsed in parsed_all.items():
+                self.cache.save_parsed(refs[t]["sha"], parsed)
+                out[t] = parsed
+
+        for t, ref in refs.items():
+            out[t] = {k: v for k, v in out[t].items() if k != "parser"}
+            out[t].update(form=self.form, accession=ref["accession"], url=ref["url"])
+        return {t: out[t] for t in tickers}
+
+    def handle_filing(self, task: Task, inputs: Dict[str, Artifact]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        return self._filed(task.params["symbol"], self.collect([task.params["symbol"]]))
+
+    def handle_filings_batch(self, tasks: List[Task], inputs: List[Dict[str, Artifact]]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        found = self.collect([t.params["symbol"] for t in tasks])
+        return [self._filed(t.params["symbol"], found) for t in tasks]
+
+    def _filed(self, symbol: str, found: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        res = found[symbol]
+        if "error" not in res:
+            say(f"📑 {self.form} financials extracted for {symbol}")
+        return res, {"form": self.form}
@@ -1,8 +1,15 @@
 from __future__ import annotations
-from typing import Dict, Any, List
-import pandas as pd
-from tools.prices import fetch_prices, quick_stats
-from tools.news import get_symbol_news, load_news_from_csv
+import threading
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple
+from core.registry import HandlerRegistry
+from core.types import Artifact, Report, Task
+from utils.io import say
+
+# The data stack (pandas, numpy, yfinance, requests) is imported where it is first used,
+# so building the agent and registering its handlers stays cheap
+if TYPE_CHECKING:
+    import pandas as pd
+    from tools.news_async import NewsResult
 
 SENT_THRESH = {
     "very_bearish": -0.025,
@@ -14,21 +21,93 @@ SENT_THRESH = {
 class MarketAgent:
     """Market Agent handles price and news ingestion, classification, and summarization."""
 
-    def __init__(self, cfg: Dict[str, Any]):
+    def __init__(self, cfg: Dict[str, Any], provider=None):
         self.cfg = cfg
+        self.http_news = cfg.get("news", {}).get("provider") == "http"
+        # A provider passed in (e.g. a FakeProvider in tests) replaces the configured one
+        self._loaded: Dict[str, Any] = {} if provider is None else {"provider": provider}
+        self._lock = threading.Lock()
+
+    def _lazy(self, name: str, build):
+        with self._lock:
+            if name not in self._loaded:
+                self._loaded[name] = build()
+            return self._loaded[name]
+
+    @property
+    def provider(self):
+        from tools.price_providers import get_provider
+        return self._lazy("provider", lambda: get_provider(self.cfg))
+
+    @property
+    def price_cache(self):
+        from tools.price_cache import PriceCache
+        return self._lazy("price_cache", lambda: PriceCache.from_config(self.cfg))
+
+    @property
+    def indicators(self):
+        from tools.indicators import IndicatorEngine
+        return self._lazy("indicators", lambda: IndicatorEngine.from_config(self.cfg))
+
+    @property
+    def projection(self):
+        from tools.prices import Projection
+        return self._lazy("projection", lambda: Projection.from_config(self.cfg))
+
+    @property
+    def news_fetcher(self):
+        if not self.http_news:
+            return None
+        from tools.news_async import AsyncNewsFetcher
+        return self._lazy("news_fetcher", lambda: AsyncNewsFetcher.from_config(self.cfg))
+
+    def register(self, registry: HandlerRegistry):
+        """Register the prices, news and summarize handlers."""
+        batch = int(self.cfg.get("prices", {}).get("batch_size", 0) or 0)
+        csv_news = self.cfg.get("news", {}).get("provider", "yfinance") == "csv"
+        registry.register("prices", "market", self.handle_prices, exec_class="io", cost=5.0,
+                          batch_fn=self.handle_prices_batch, max_batch=batch, memoize=False)
+        registry.register("news", "news", self.handle_news, exec_class="cpu" if csv_news else "io",
+                          cost=0.2 if csv_news else 3.0, memoize=False,
+                          batch_fn=self.handle_news_batch if self.http_news else None,
+                          max_batch=int(self.cfg.get("news", {}).get("batch_size", 100)))
+        registry.register("summarize", "market", self.handle_summarize, artifact="summary", cost=0.5,
+                          batch_fn=self.handle_summarize_batch,
+                          max_batch=int(self.cfg.get("stats", {}).get("batch_size", 64)),
+                          settings={k: self.cfg.get(k) for k in ("stats", "summarizer")})
 
     # Ingest prices and news
     def ingest_prices(self, symbol: str) -> pd.DataFrame:
+        from tools.prices import fetch_prices
+        p = self.cfg.get("prices", {})
+        return fetch_prices(symbol, p.get("period", "6mo"), p.get("interval", "1d"), self.provider, self.price_cache,
+                            self.indicators, self.projection)
+
+    def ingest_prices_many(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """Fetch many symbols with bulk provider requests."""
+        from tools.prices import fetch_prices_batch
         p = self.cfg.get("prices", {})
-        return fetch_prices(symbol, p.get("period", "6mo"), p.get("interval", "1d"))
+        return fetch_prices_batch(symbols, p.get("period", "6mo"), p.get("interval", "1d"), self.provider,
+                                  self.price_cache, self.indicators, self.projection)
 
     def ingest_news(self, symbol: str) -> List[Dict[str, Any]]:
+        from tools.news import get_symbol_news, load_news_from_csv
         n = self.cfg.get("news", {})
         provider = n.get("provider", "yfinance")
         if provider == "csv":
             return load_news_from_csv(n.get("csv_path", "data/sample_news.csv"), symbol, n.get("max_per_symbol", 15))
+        if self.news_fetcher is not None:
+            return self.ingest_news_many([symbol])[symbol].items
         return get_symbol_news(symbol, n.get("max_per_symbol", 15))
 
+    def ingest_news_many(self, symbols: List[str]) -> Dict[str, NewsResult]:
+        """Concurrent HTTP news for many symbols; failures are reported, not hidden as 'no news'."""
+        results = self.news_fetcher.fetch_universe(symbols, self.cfg.get("news", {}).get("max_per_symbol", 15))
+        for r in results.values():
+            if not r.ok:
+                print(f"⚠️ News fetch failed for {r.symbol} after {r.attempts} attempts: {r.error}")
+        return results
+
     # Preprocess text (simple lowercasing)
     def preprocess_texts(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         out = []
@@ -55,8 +134,28 @@ class MarketAgent:
         return "neutral"
 
     def extract(self, df_prices: pd.DataFrame) -> Dict[str, Any]:
+        from tools.prices import quick_stats
         return quick_stats(df_prices)
 
+    def extract_many(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, Any]]:
+        """
+        Stats and sentiment for many symbols in one vectorized pass. With
+        stats.workers > 1 and at least stats.parallel_min symbols, the pass is
+        split across worker processes that read the frames from shared memory.
+        """
+        from concurrent.futures.process import BrokenProcessPool
+        from tools.shared_prices import map_shared
+        from tools.universe_stats import universe_stats, DEFAULT_INDICATORS
+        st = self.cfg.get("stats", {})
+        indicators = list(st.get("indicators", DEFAULT_INDICATORS)) + ["sentiment"]
+        workers = int(st.get("workers", 0) or 0)
+        if workers > 1 and len(frames) >= int(st.get("parallel_min", 512)):
+            try:
+                return map_shared(universe_stats, frames, workers, indicators, SENT_THRESH)
+            except (BrokenProcessPool, OSError) as e:
+                print(f"⚠️ Parallel stats failed ({type(e).__name__}: {e}); computing in-process")
+        return universe_stats(frames, indicators, SENT_THRESH)
+
     def summarize(self, symbol: str, stats: Dict[str, Any], news_items: List[Dict[str, Any]], sentiment: str, max_bullets: int = 6) -> str:
         """Produce a simple Markdown summary combining price stats and news."""
         bullets = []
@@ -84,3 +183,76 @@ class MarketAgent:
         bullets = bullets[:max_bullets]
         md = f"### {symbol}\n\n" + "\n".join([f"- {b}" for b in bullets]) + "\n"
         return md
+
+    # Task handlers: (task, inputs by dep kind) -> (artifact content, meta)
+    def handle_prices(self, task: Task, inputs: Dict[str, Artifact]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        return self._priced(task.params["symbol"], self.ingest_prices(task.params["symbol"]))
+
+    def handle_prices_batch(self, tasks: List[Task], inputs: List[Dict[str, Artifact]]) -> List[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        import pandas as pd
+        symbols = [t.params["symbol"] for t in tasks]
+        frames = self.ingest_prices_many(symbols)
+        say(f"📦 Fetched prices for {len(symbols)} symbols in bulk")
+        return [self._priced(sym, frames.get(sym, pd.DataFrame())) for sym in symbols]
+
+    def _priced(self, symbol: str, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        if df.empty:
+            print(f"⚠️ No price data found for {symbol}")
+        else:
+            say(f"✅ Retrieved {len(df)} rows of price data for {symbol}")
+        return df, {"rows": len(df)}
+
+    def handle_news(self, task: Task, inputs: Dict[str, Artifact]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        symbol = task.params["symbol"]
+        if self.news_fetcher is not None:
+            return self.handle_news_batch([task], [inputs])[0]
+        items = self.ingest_news(symbol)
+        say(f"📰 Retrieved {len(items)} news items for {symbol}")
+        return items, {"count": len(items)}
+
+    def handle_news_batch(self, tasks: List[Task], inputs: List[Dict[str, Artifact]]) -> List[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        results = self.ingest_news_many([t.params["symbol"] for t in tasks])
+        out = []
+        for t in tasks:
+            r = results[t.params["symbol"]]
+            if r.ok:
+                say(f"📰 Retrieved {len(r.items)} news items for {r.symbol}")
+            out.append((r.items, {"count": len(r.items), "status": r.status, "error": r.error}))
+        return out
+
+    def _upstream(self, symbol: str, inputs: Dict[str, Artifact]) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+        # Reuse upstream artifacts; only fetch if the upstream task was skipped
+        df = inputs["prices"].content if "prices" in inputs else self.ingest_prices(symbol)
+        raw_news = inputs["news"].content if "news" in inputs else self.ingest_news(symbol)
+        return df, raw_news
+
+    def handle_summarize(self, task: Task, inputs: Dict[str, Artifact]) -> Tuple[Report, Dict[str, Any]]:
+        symbol = task.params["symbol"]
+        df, raw_news = self._upstream(symbol, inputs)
+        stats = self.extract(df)
+        return self._report(symbol, stats, raw_news, self.classify(stats), inputs), {}
+
+    def handle_summarize_batch(self, tasks: List[Task], inputs: List[Dict[str, Artifact]]) -> List[Tuple[Report, Dict[str, Any]]]:
+        """Summaries for several symbols with one vectorized stats pass."""
+        upstream = {t.params["symbol"]: (self._upstream(t.params["symbol"], inp), inp) for t, inp in zip(tasks, inputs)}
+        all_stats = self.extract_many({sym: df for sym, ((df, _), _) in upstream.items()})
+        out = []
+        for sym, ((_, raw_news), inp) in upstream.items():
+            stats = dict(all_stats[sym])
+            sentiment = stats.pop("sentiment", None) or self.classify(stats)
+            out.append((self._report(sym, stats, raw_news, sentiment, inp), {}))
+        return out
+
+    def _report(self, symbol: str, stats: Dict[str, Any], raw_news: List[Dict[str, Any]], sentiment: str,
+                inputs: Dict[str, Artifact]) -> Report:
+        items = self.preprocess_texts(raw_news)
+        md = self.summarize(symbol, stats, items, sentiment, self.cfg.get("summarizer", {}).get("max_bullets", 6))
+        rep = Report(symbol=symbol)
+        rep.sections["stats"] = stats
+        rep.sections["news"] = items
+        rep.sections["sentiment"] = sentiment
+        if "filings" in inputs:
+            rep.sections["filings"] = inputs["filings"].content
+        rep.markdown = md
+        say(f"🧾 Summary generated for {symbol}")
+        return rep
@@ -1,34 +1,53 @@
 from __future__ import annotations
-from typing import Dict, List
-from core.types import Task
-from core.graph import DAG
+from typing import Dict, List, Optional
+from core.graph import Step, TemplatePlan
+from core.shards import partition
+from agents.filing import filing_tickers
+
+# The built-in per-symbol pattern; `planner.steps` picks from it by kind or adds custom steps
+STEPS = [
+    Step("prices"),
+    Step("news", ("prices",)),
+    Step("filings", when="filers"),  # equities only; independent of prices and news
+    Step("summarize", ("prices", "news", "filings")),
+    Step("evaluate", ("summarize",)),
+]
+
 
 class Planner:
     """
-    Planner builds a Directed Acyclic Graph (DAG) of tasks
-    for each symbol based on the configuration file.
+    Planner builds the plan for the universe from the per-symbol step
+    pattern in `planner.steps` (default: STEPS). The plan is a template;
+    tasks are only expanded as the executor reaches each symbol.
     """
     def __init__(self, cfg: Dict):
         self.cfg = cfg
 
-    def plan(self) -> DAG:
-        steps = self.cfg.get("planner", {}).get("steps", ["prices", "news"])
-        tickers: List[str] = self.cfg.get("universe", {}).get("tickers", [])
-
-        tasks: List[Task] = []
-        for sym in tickers:
-            # Prices task
-            tasks.append(Task(id=f"prices:{sym}", kind="prices", params={"symbol": sym}))
+    def steps(self) -> List[Step]:
+        """
+        `planner.steps` entries are either built-in kinds (their deps are
+        kept where the dep is also selected) or {kind, deps, when} mappings.
+        """
+        configured = self.cfg.get("planner", {}).get("steps")
+        if not configured:
+            return list(STEPS)
+        builtin = {st.kind: st for st in STEPS}
+        chosen = {item if isinstance(item, str) else item["kind"] for item in configured}
+        steps: List[Step] = []
+        for item in configured:
+            if isinstance(item, str):
+                st = builtin.get(item, Step(item))
+                steps.append(Step(st.kind, tuple(d for d in st.deps if d in chosen), st.when))
+            else:
+                steps.append(Step(item["kind"], tuple(item.get("deps", ())), item.get("when")))
+        return steps
 
-            # News task (depends on prices)
-            tasks.append(Task(id=f"news:{sym}", kind="news", params={"symbol": sym}, deps=[f"prices:{sym}"]))
-
-            # Summarize task (depends on both)
-            tasks.append(Task(id=f"summarize:{sym}", kind="summarize", params={"symbol": sym},
-                              deps=[f"prices:{sym}", f"news:{sym}"]))
-
-            # Evaluate task (depends on summary)
-            tasks.append(Task(id=f"evaluate:{sym}", kind="evaluate", params={"symbol": sym},
-                              deps=[f"summarize:{sym}"]))
+    def plan(self) -> TemplatePlan:
+        tickers: List[str] = self.cfg.get("universe", {}).get("tickers", [])
+        filers = set(filing_tickers(self.cfg)) if self.cfg.get("filings", {}).get("enabled", False) else set()
+        return TemplatePlan(self.steps(), tickers, {"filers": filers})
 
-        return DAG(tasks)
+    def partition(self, n: int, strategy: str = "hash", costs: Optional[Dict[str, float]] = None) -> List[List[str]]:
+        """Split the universe into shards for a sharded run; see core.shards.partition."""
+        tickers: List[str] = self.cfg.get("universe", {}).get("tickers", [])
+        return partition(tickers, n, strategy, costs)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from core.memo import content_hash
+
+BASE_SCORE = 0.7
+
+# Checks for the original rubric ids, so rubric.yml files without `check:` blocks score as before
+LEGACY_CHECKS: Dict[str, Dict[str, Any]] = {
+    "coverage": {"type": "keywords", "terms": ["return", "volatility", "trend", "sentiment"],
+                 "mode": "all", "pass": 0.9, "fail": 0.5},
+    "recency": {"type": "field", "field": "asof", "pass": 0.9, "fail": 0.6},
+    "correctness": {"type": "keywords", "terms": ["closed at"], "case_sensitive": True, "pass": 0.85, "fail": 0.6},
+    "actionability": {"type": "keywords", "terms": ["recent headlines"], "case_sensitive": True,
+                      "pass": 0.75, "fail": 0.6},
+}
+
+
+class Check:
+    """One rubric criterion compiled into a vectorized scorer: a column of scores for a batch."""
+    def __init__(self, spec: Dict[str, Any]):
+        self.passed = float(spec.get("pass", 0.9))
+        self.failed = float(spec.get("fail", 0.5))
+
+    def hits(self, texts: Sequence[str], lowered: Sequence[str], stats: Sequence[Dict[str, Any]]) -> np.ndarray:
+        raise NotImplementedError
+
+    def scores(self, texts, lowered, stats) -> np.ndarray:
+        return np.where(self.hits(texts, lowered, stats), self.passed, self.failed)
+
+
+class ConstantCheck(Check):
+    def __init__(self, spec: Dict[str, Any]):
+        super().__init__(spec)
+        self.value = float(spec.get("score", BASE_SCORE))
+
+    def scores(self, texts, lowered, stats) -> np.ndarray:
+        return np.full(len(texts), self.value)
+
+
+class KeywordCheck(Check):
+    """All (or any) of `terms` appear in the report; case-insensitive unless `case_sensitive`."""
+    def __init__(self, spec: Dict[str, Any]):
+        super().__init__(spec)
+        self.case = bool(spec.get("case_sensitive", False))
+        self.terms = [t if self.case else t.lower() for t in spec.get("terms", [])]
+        self.any = spec.get("mode", "all") == "any"
+
+    def hits(self, texts, lowered, stats) -> np.ndarray:
+        src = texts if self.case else lowered
+        acc = np.full(len(src), not self.any)
+        for term in self.terms:
+            found = np.array([term in s for s in src], dtype=bool)
+            acc = (acc | found) if self.any else (acc & found)
+        return acc
+
+
+class RegexCheck(Check):
+    """`pattern` matches somewhere in the report (`flags: i` for case-insensitive)."""
+    def __init__(self, spec: Dict[str, Any]):
+        super().__init__(spec)
+        flags = re.I if "i" in str(spec.get("flags", "")) else 0
+        self.rx = re.compile(spec["pattern"], flags)
+
+    def hits(self, texts, lowered, stats) -> np.ndarray:
+        search = self.rx.search
+        return np.fromiter((search(s) is not None for s in texts), dtype=bool, count=len(texts))
+
+
+class FieldCheck(Check):
+    """stats[`field`] is present and truthy."""
+    def __init__(self, spec: Dict[str, Any]):
+        super().__init__(spec)
+        self.field = spec["field"]
+
+    def hits(self, texts, lowered, stats) -> np.ndarray:
+        return np.fromiter((bool(st and st.get(self.field)) for st in stats), dtype=bool, count=len(stats))
+
+
+class NumericCheck(Check):
+    """
+    The number captured by `pattern` agrees with stats[`field`] * `scale`
+    within `tolerance` (relative). Reports without the number or the stat fail.
+    """
+    def __init__(self, spec: Dict[str, Any]):
+        super().__init__(spec)
+        self.rx = re.compile(spec["pattern"])
+        self.field = spec["field"]
+        self.scale = float(spec.get("scale", 1.0))
+        self.tolerance = float(spec.get("tolerance", 0.01))
+
+    def hits(self, texts, lowered, stats) -> np.ndarray:
+        shown = np.full(len(texts), np.nan)
+        truth = np.full(len(texts), np.nan)
+        for i, (s, st) in enumerate(zip(texts, stats)):
+            m = self.rx.search(s)
+            v = (st or {}).get(self.field)
+            if m and v is not None:
+                shown[i] = float(m.group(1).replace(",", ""))
+                truth[i] = float(v) * self.scale
+        with np.errstate(invalid="ignore"):
+            return np.abs(shown - truth) <= self.tolerance * np.maximum(np.abs(truth), 1e-12)
+
+
+CHECK_TYPES = {"keywords": KeywordCheck, "regex": RegexCheck, "field": FieldCheck,
+               "numeric": NumericCheck, "constant": ConstantCheck}
+
+
+def compile_check(item: Dict[str, Any]) -> Check:
+    spec = item.get("check") or LEGACY_CHECKS.get(item.get("id")) or {"type": "constant"}
+    try:
+        return CHECK_TYPES[spec.get("type", "keywords")](spec)
+    except KeyError:
+        raise ValueError(f"Unknown rubric check type {spec.get('type')!r} for item {item.get('id')!r}") from None
+
+
+class CompiledRubric:
+    """
+    A rubric compiled once into checks and a weight vector. `score_batch`
+    scores many reports in one pass (one column per check, then a weighted
+    average); results are cached by a digest of the report text and the
+    stats fields the checks read, so the cache holds no report strings.
+    """
+    def __init__(self, items: List[Dict[str, Any]], threshold: float = 0.8,
+                 suggestion: str = "Add clearer takeaways or benchmark comparisons.", cache_size: int = 100_000):
+        self.ids = [it.get("id") for it in items]
+        self.checks = [compile_check(it) for it in items]
+        self.fields = sorted({c.field for c in self.checks if hasattr(c, "field")})
+        self.weights = [float(it.get("weight", 0.25)) for it in items]
+        self.norm = sum(self.weights) or 1.0
+        self.threshold = float(threshold)
+        self.suggestion = suggestion
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "scored": 0}
+
+    @classmethod
+    def from_rubric(cls, rubric: Dict[str, Any]) -> "CompiledRubric":
+        return cls(rubric.get("rubric", []), rubric.get("threshold", 0.8),
+                   rubric.get("suggestion", "Add clearer takeaways or benchmark comparisons."))
+
+    def key(self, text: str, stats: Optional[Dict[str, Any]]) -> str:
+        """Cache key: blake2b digest of the report text plus only the stats fields some check reads."""
+        st = stats or {}
+        return content_hash([text, [st.get(f) for f in self.fields]])
+
+    def _score(self, texts: List[str], stats: List[Dict[str, Any]]) -> np.ndarray:
+        # Accumulated check by check, in rubric order, exactly like the old per-report loop
+        total = np.zeros(len(texts))
+        lowered = [t.lower() for t in texts]
+        for check, w in zip(self.checks, self.weights):
+            total += check.scores(texts, lowered, stats) * w
+        return total / self.norm
+
+    def score_batch(self, texts: List[str], stats: List[Dict[str, Any]]) -> List[float]:
+        keys = [self.key(t, st) for t, st in zip(texts, stats)]
+        out: List[Optional[float]] = [None] * len(texts)
+        with self._lock:
+            for i, k in enumerate(keys):
+                if k in self._cache:
+                    self._cache.move_to_end(k)
+                    out[i] = self._cache[k]
+        todo = [i for i, v in enumerate(out) if v is None]
+        if todo:
+            fresh = self._score([texts[i] for i in todo], [stats[i] for i in todo])
+            with self._lock:
+                for i, v in zip(todo, fresh):
+                    out[i] = self._cache[keys[i]] = float(v)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        with self._lock:
+            self.stats["hits"] += len(texts) - len(todo)
+            self.stats["scored"] += len(todo)
+        return out
+
+    def suggestions(self, symbol: str, score: float) -> List[Dict[str, Any]]:
+        if score < self.threshold:
+            return [{"symbol": symbol, "suggestion": self.suggestion}]
+        return []
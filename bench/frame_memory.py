@@ -0,0 +1,133 @@
+"""
+Price frame memory benchmark.
+
+    python -m bench.frame_memory --symbols 20 --period 60d --interval 1m --out frame_memory.json
+    python -m bench.frame_memory --compare frame_memory.json
+
+Builds the same synthetic universe (FakeProvider, no network) once per
+variant: every column as float64 (the frames before `prices.frame`),
+projected to what the stats read, projected with float32 derived columns,
+and projected + float32 with chunked indicators. Reported per variant:
+resident MB of the finished frames, tracemalloc peak MB while adding
+indicators (raw bars are generated before tracing starts), wall time, and
+the largest relative drift of the summary stats against the full frames.
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import pandas as pd
+
+from bench.synthetic import make_universe
+from tools.price_providers import FakeProvider, PriceProvider
+from tools.prices import Projection, fetch_prices_batch, quick_stats
+
+STATS = ("close", "ret_5d", "ret_20d", "vol_20")
+
+
+def variants(columns: List[str], chunk_rows: int) -> Dict[str, Optional[Projection]]:
+    return {
+        "full": None,
+        "projected": Projection(columns),
+        "float32": Projection(columns, "float32"),
+        "chunked": Projection(columns, "float32", chunk_rows),
+    }
+
+
+def _drift(base: Dict[str, Dict[str, Any]], got: Dict[str, Dict[str, Any]]) -> float:
+    worst = 0.0
+    for sym, st in base.items():
+        for k in STATS:
+            a, b = st.get(k), got[sym].get(k)
+            if a is not None and b is not None and a != 0:
+                worst = max(worst, abs(b / a - 1))
+    return worst
+
+
+class Prefetched(PriceProvider):
+    """Serves frames generated up front, so the measured peak is indicator work and the kept frames only."""
+    name = "prefetched"
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]):
+        self.frames = frames
+
+    def fetch(self, symbols, period="6mo", interval="1d", start=None):
+        return {sym: self.frames[sym] for sym in symbols if sym in self.frames}
+
+
+def measure(tickers: List[str], period: str, interval: str, projection: Optional[Projection]) -> Dict[str, Any]:
+    provider = Prefetched(FakeProvider().fetch(tickers, period, interval))
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    frames = fetch_prices_batch(tickers, period, interval, provider, projection=projection)
+    wall = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return {
+        "frames": frames,
+        "resident_mb": round(sum(df.memory_usage(index=True, deep=True).sum() for df in frames.values()) / 1e6, 3),
+        "peak_mb": round(peak, 3),
+        "wall_s": round(wall, 4),
+        "rows": sum(len(df) for df in frames.values()),
+        "columns": len(next(iter(frames.values())).columns) if frames else 0,
+    }
+
+
+def _meta() -> Dict[str, Any]:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = None
+    return {"timestamp": int(time.time()), "python": platform.python_version(),
+            "platform": platform.platform(), "git": rev or None}
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]):
+    """Print new/old resident and peak ratios for matching variants."""
+    for name, r in new["results"].items():
+        o = old.get("results", {}).get(name)
+        if o and o["resident_mb"] and o["peak_mb"]:
+            print(f"{name:<10} resident {o['resident_mb']:>9.2f} -> {r['resident_mb']:>9.2f} MB "
+                  f"({r['resident_mb'] / o['resident_mb']:.2f}x)  peak {o['peak_mb']:>9.2f} -> "
+                  f"{r['peak_mb']:>9.2f} MB ({r['peak_mb'] / o['peak_mb']:.2f}x)")
+
+
+def cli():
+    ap = argparse.ArgumentParser(description="Price frame memory benchmark")
+    ap.add_argument("--symbols", type=int, default=20)
+    ap.add_argument("--period", default="60d")
+    ap.add_argument("--interval", default="1m")
+    ap.add_argument("--columns", nargs="+", default=["Close", "Vol_20"], help="projection for the pruned variants")
+    ap.add_argument("--chunk-rows", type=int, default=20_000)
+    ap.add_argument("--out", default="frame_memory.json")
+    ap.add_argument("--compare", help="earlier results JSON to compare against")
+    args = ap.parse_args()
+    warnings.simplefilter("ignore", FutureWarning)  # pct_change fill_method chatter on pandas 2.x
+
+    tickers = make_universe(args.symbols)
+    results, base = {}, None
+    for name, projection in variants(args.columns, args.chunk_rows).items():
+        r = measure(tickers, args.period, args.interval, projection)
+        stats = {sym: quick_stats(df) for sym, df in r.pop("frames").items()}
+        base = base or stats
+        r["stats_drift"] = _drift(base, stats)
+        results[name] = r
+        print(f"{name:<10} {r['rows']:>9} rows x {r['columns']:>2} cols  resident {r['resident_mb']:>9.2f} MB"
+              f"  peak {r['peak_mb']:>9.2f} MB  {r['wall_s']:>7.3f}s  drift {r['stats_drift']:.1e}", file=sys.stderr)
+    doc = {"meta": {**_meta(), "symbols": args.symbols, "period": args.period, "interval": args.interval},
+           "results": results}
+    Path(args.out).write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"wrote {args.out}", file=sys.stderr)
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), doc)
+
+
+if __name__ == "__main__":
+    cli()
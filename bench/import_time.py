@@ -0,0 +1,112 @@
+"""
+Startup cost benchmark, read from `python -X importtime`.
+
+    python -m bench.import_time --out import_time.json
+    python -m bench.import_time --compare import_time.json
+
+Each probe (importing main, `main.py --help`, `main.py --plan-only`) runs in
+a fresh interpreter. Reported per probe: best wall time over --repeat runs,
+the summed import time, the slowest modules by cumulative import time, and
+which heavy modules (pandas, numpy, yfinance, requests) got imported at all.
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ("pandas", "numpy", "yfinance", "requests", "bs4", "curl_cffi")
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def probes(config: str) -> Dict[str, List[str]]:
+    return {
+        "import": ["-c", "import main"],
+        "help": ["main.py", "--help"],
+        "plan-only": ["main.py", "--plan-only", "--config", config],
+    }
+
+
+def parse(stderr: str) -> List[Dict[str, Any]]:
+    """(module, self_us, cumulative_us, depth) rows from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            rows.append({"module": m.group(4), "self_us": int(m.group(1)), "cumulative_us": int(m.group(2)),
+                         "depth": len(m.group(3)) // 2})
+    return rows
+
+
+def measure(args: List[str], repeat: int, top: int) -> Dict[str, Any]:
+    best, rows = None, []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT,
+                              capture_output=True, text=True)
+        wall = time.perf_counter() - t0
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed: {proc.stderr[-500:]}")
+        if best is None or wall < best:
+            best, rows = wall, parse(proc.stderr)
+    loaded = {r["module"] for r in rows}
+    return {
+        "wall_s": round(best, 4),
+        "import_s": round(sum(r["self_us"] for r in rows) / 1e6, 4),
+        "modules": len(rows),
+        "heavy": sorted(h for h in HEAVY if h in loaded),
+        "slowest": [{"module": r["module"], "cumulative_ms": round(r["cumulative_us"] / 1000, 2)}
+                    for r in sorted(rows, key=lambda r: -r["cumulative_us"])[:top]],
+    }
+
+
+def _meta() -> Dict[str, Any]:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True).stdout.strip()
+    except OSError:
+        rev = None
+    return {"timestamp": int(time.time()), "python": platform.python_version(),
+            "platform": platform.platform(), "git": rev or None}
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]):
+    """Print new/old wall-time ratios for matching probes."""
+    for name, r in new["results"].items():
+        o = old.get("results", {}).get(name)
+        if o and o["wall_s"]:
+            print(f"{name:<10} {o['wall_s']:>8.3f}s -> {r['wall_s']:>8.3f}s ({r['wall_s'] / o['wall_s']:.2f}x)"
+                  f"  heavy: {','.join(o['heavy']) or '-'} -> {','.join(r['heavy']) or '-'}")
+
+
+def cli():
+    ap = argparse.ArgumentParser(description="Startup (import time) benchmark")
+    ap.add_argument("--config", default="config/config.yml")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per probe; the fastest is kept")
+    ap.add_argument("--top", type=int, default=10, help="slowest modules to list per probe")
+    ap.add_argument("--out", default="import_time.json")
+    ap.add_argument("--compare", help="earlier results JSON to compare against")
+    args = ap.parse_args()
+
+    results = {}
+    for name, argv in probes(args.config).items():
+        r = results[name] = measure(argv, args.repeat, args.top)
+        print(f"{name:<10} {r['wall_s']:>8.3f}s wall {r['import_s']:>8.3f}s imports {r['modules']:>5} modules"
+              f"  heavy: {', '.join(r['heavy']) or 'none'}", file=sys.stderr)
+        for s in r["slowest"][:5]:
+            print(f"{'':<12}{s['cumulative_ms']:>9.1f} ms  {s['module']}", file=sys.stderr)
+    doc = {"meta": _meta(), "results": results}
+    Path(args.out).write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"wrote {args.out}", file=sys.stderr)
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), doc)
+
+
+if __name__ == "__main__":
+    cli()
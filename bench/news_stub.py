@@ -0,0 +1,116 @@
+"""
+Local stand-in for the Yahoo search endpoint used by the http news provider.
+
+    python -m bench.news_stub --port 8765 --latency 0.05 --fail-rate 0.2
+
+then point `news.http.base_url` at http://127.0.0.1:8765/v1/finance/search.
+Symbols starting with "EMPTY" get no news, "BROKEN" always answers 500 and
+"SLOW" waits `slow` seconds before answering; other symbols fail with a 503
+(or 429 + Retry-After) at `fail_rate`. `script` scripts the status of a
+symbol's first requests for tests, e.g. {"FLAKY": [429, 503]}.
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class StubNewsServer:
+    """Threaded stub server; use as a context manager, `url` is the search endpoint."""
+    def __init__(self, port: int = 0, latency: float = 0.0, fail_rate: float = 0.0, seed: int = 0,
+                 script: Optional[Dict[str, List[int]]] = None, retry_after: str = "0", slow: float = 1.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.script = {sym: list(codes) for sym, codes in (script or {}).items()}
+        self.retry_after = retry_after
+        self.slow = slow
+        self.requests: Dict[str, int] = {}
+        self.times: Dict[str, List[float]] = {}  # time.monotonic() of each request, per symbol
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/finance/search"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                q = parse_qs(urlparse(self.path).query)
+                sym = q.get("q", [""])[0]
+                n = int(q.get("newsCount", ["10"])[0])
+                with stub._lock:
+                    stub.requests[sym] = stub.requests.get(sym, 0) + 1
+                    stub.times.setdefault(sym, []).append(time.monotonic())
+                    roll = stub.rng.random()
+                    scripted = stub.script[sym].pop(0) if stub.script.get(sym) else None
+                time.sleep(stub.slow if sym.startswith("SLOW") else stub.latency)
+                if sym.startswith("BROKEN"):
+                    return self._send(500, {"error": "broken"})
+                if scripted is None and roll < stub.fail_rate:
+                    scripted = 429 if roll < stub.fail_rate / 2 else 503
+                if scripted == 429:
+                    return self._send(429, {"error": "throttled"}, {"Retry-After": stub.retry_after})
+                if scripted is not None and scripted != 200:
+                    return self._send(scripted, {"error": "scripted"})
+                news = [] if sym.startswith("EMPTY") else [
+                    {"title": f"{sym} headline {i}", "publisher": "Stub Wire",
+                     "link": f"https://example.com/{sym}/{i}", "providerPublishTime": 1_700_000_000 - i * 3600}
+                    for i in range(n)]
+                self._send(200, {"news": news})
+
+            def _send(self, code, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (timeout test)
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return False
+
+
+def cli():
+    ap = argparse.ArgumentParser(description="Stub Yahoo news search server")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    with StubNewsServer(args.port, args.latency, args.fail_rate) as s:
+        print(f"serving {s.url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,177 @@
+"""
+Offline end-to-end benchmark.
+
+    python -m bench.run_bench --sizes 10 100 1000 10000 --out bench_results.json
+    python -m bench.run_bench --sizes 100 --compare bench_results.json
+
+Every stage runs against synthetic prices (FakeProvider) and a generated news
+CSV, so nothing touches the network. Each stage is timed once plain and once
+under tracemalloc for its peak allocation.
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+import yaml
+
+from bench.synthetic import make_universe, synthetic_config
+from agents.planner import Planner
+from agents.market import MarketAgent
+from agents.evalopt import EvaluatorOptimizer
+from core.graph import DAG
+from tools.price_providers import FakeProvider
+from tools.prices import fetch_prices_batch, quick_stats
+from utils.io import load_yaml
+from utils.memory import JsonMemory, LogMemory
+import tools.news as news
+import main
+
+
+def _stages(cfg: Dict[str, Any], workdir: Path, rubric: Dict[str, Any]) -> List[tuple]:
+    """(name, fn(ctx)) pairs; later stages read what earlier ones put in ctx."""
+    tickers = cfg["universe"]["tickers"]
+    market = MarketAgent(cfg)
+    n_cfg = cfg["news"]
+
+    def plan(ctx):
+        ctx["dag"] = Planner(cfg).plan()
+
+    def topo(ctx):
+        DAG(list(ctx["dag"])).topological_order()
+
+    def prices(ctx):
+        ctx["frames"] = fetch_prices_batch(tickers, cfg["prices"]["period"], cfg["prices"]["interval"], FakeProvider())
+
+    def stats(ctx):
+        ctx["stats"] = {s: quick_stats(df) for s, df in ctx["frames"].items()}
+
+    def universe_stats(ctx):
+        market.extract_many(ctx["frames"])
+
+    def news_csv(ctx):
+        news._INDEXES.clear()  # include the one-time parse
+        ctx["news"] = {s: market.preprocess_texts(news.load_news_from_csv(n_cfg["csv_path"], s, n_cfg["max_per_symbol"]))
+                       for s in tickers}
+
+    def summarize(ctx):
+        ctx["md"] = {s: market.summarize(s, st, ctx["news"][s], market.classify(st)) for s, st in ctx["stats"].items()}
+
+    def score(ctx):
+        ev = EvaluatorOptimizer(rubric, None)
+        for s, md in ctx["md"].items():
+            ev.score(md, s, ctx["stats"][s])
+
+    def memory_json(ctx):
+        path = workdir / "bench_memory.json"
+        path.unlink(missing_ok=True)
+        mem = JsonMemory(str(path))
+        ev = EvaluatorOptimizer(rubric, mem)
+        with mem.batch():
+            for s in tickers:
+                ev.remember(s, 0.8)
+
+    def memory_log(ctx):
+        path = workdir / "bench_memory.jsonl"
+        path.unlink(missing_ok=True)
+        ev = EvaluatorOptimizer(rubric, LogMemory(str(path)))
+        for s in tickers:
+            ev.remember(s, 0.8)
+
+    def pipeline(ctx):
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.run(str(workdir / "config.yml"), str(workdir / "rubric.yml"))
+
+    return [("plan", plan), ("topo", topo), ("prices", prices), ("quick_stats", stats),
+            ("universe_stats", universe_stats), ("news", news_csv), ("summarize", summarize),
+            ("score", score), ("memory_json", memory_json), ("memory_log", memory_log), ("pipeline", pipeline)]
+
+
+def _measure(fn: Callable, ctx: Dict[str, Any], memory: bool) -> Dict[str, float]:
+    t0 = time.perf_counter()
+    fn(ctx)
+    wall = time.perf_counter() - t0
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn(ctx)
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return {"wall_s": round(wall, 6), "peak_mb": None if peak is None else round(peak, 3)}
+
+
+def run_size(n: int, rubric_path: str, memory: bool, only: List[str] | None) -> List[Dict[str, Any]]:
+    rubric = load_yaml(rubric_path)
+    with tempfile.TemporaryDirectory(prefix=f"bench{n}_") as tmp:
+        workdir = Path(tmp)
+        cfg = synthetic_config(make_universe(n), workdir)
+        (workdir / "config.yml").write_text(yaml.safe_dump(cfg), encoding="utf-8")
+        (workdir / "rubric.yml").write_text(yaml.safe_dump(rubric), encoding="utf-8")
+
+        ctx: Dict[str, Any] = {}
+        rows = []
+        for name, fn in _stages(cfg, workdir, rubric):
+            if only and name not in only:
+                # Still run it when later stages need its output, just don't report it
+                if name in ("plan", "prices", "quick_stats", "news", "summarize"):
+                    fn(ctx)
+                continue
+            m = _measure(fn, ctx, memory)
+            m.update({"size": n, "stage": name,
+                      "symbols_per_s": round(n / m["wall_s"], 1) if m["wall_s"] > 0 else None})
+            rows.append(m)
+            peak = "" if m["peak_mb"] is None else f"{m['peak_mb']:>9.2f} MB"
+            print(f"  {n:>6} {name:<15} {m['wall_s']:>9.4f}s {peak:>12}  {m['symbols_per_s'] or 0:>12.1f} sym/s",
+                  file=sys.stderr)
+        return rows
+
+
+def _meta() -> Dict[str, Any]:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = None
+    return {"timestamp": int(time.time()), "python": platform.python_version(),
+            "platform": platform.platform(), "git": rev or None}
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]):
+    """Print new/old wall-time ratios for matching (size, stage) rows."""
+    base = {(r["size"], r["stage"]): r for r in old.get("results", [])}
+    for r in new["results"]:
+        o = base.get((r["size"], r["stage"]))
+        if o and o["wall_s"]:
+            print(f"{r['size']:>6} {r['stage']:<15} {o['wall_s']:>9.4f}s -> {r['wall_s']:>9.4f}s "
+                  f"({r['wall_s'] / o['wall_s']:.2f}x)")
+
+
+def cli():
+    ap = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    ap.add_argument("--stages", nargs="+", help="only report these stages")
+    ap.add_argument("--rubric", default="config/rubric.yml")
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--compare", help="earlier results JSON to compare against")
+    args = ap.parse_args()
+
+    results = []
+    for n in args.sizes:
+        results.extend(run_size(n, args.rubric, not args.no_memory, args.stages))
+    doc = {"meta": _meta(), "results": results}
+    Path(args.out).write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"wrote {args.out}", file=sys.stderr)
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), doc)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List
+import numpy as np
+import pandas as pd
+
+PUBLISHERS = ["Reuters", "Bloomberg", "CNBC", "MarketWatch", "Financial Times", "Kitco News"]
+TEMPLATES = [
+    "{sym} shares rally after earnings beat",
+    "{sym} faces regulatory probe over disclosures",
+    "Analysts upgrade {sym} on margin outlook",
+    "{sym} slips as supply chain concerns linger",
+    "{sym} revenue guidance steady ahead of Fed decision",
+    "Market watches {sym} after downgrade",
+]
+
+
+def make_universe(n: int) -> List[str]:
+    """Deterministic synthetic tickers: SYN0000, SYN0001, ..."""
+    width = max(4, len(str(n - 1)))
+    return [f"SYN{i:0{width}d}" for i in range(n)]
+
+
+def make_news_frame(tickers: List[str], per_symbol: int = 12, seed: int = 0) -> pd.DataFrame:
+    """Headline rows in the data/sample_news.csv layout, reproducible for a given seed."""
+    rng = np.random.default_rng(seed)
+    n = len(tickers) * per_symbol
+    syms = np.repeat(np.asarray(tickers, dtype=object), per_symbol)
+    tmpl = rng.integers(0, len(TEMPLATES), n)
+    return pd.DataFrame({
+        "symbol": syms,
+        "title": [TEMPLATES[t].format(sym=s) for t, s in zip(tmpl, syms)],
+        "publisher": np.asarray(PUBLISHERS, dtype=object)[rng.integers(0, len(PUBLISHERS), n)],
+        "link": [f"https://example.com/{s}/{i}" for i, s in enumerate(syms)],
+        "providerPublishTime": 1_730_000_000 + rng.integers(0, 90 * 86_400, n),
+    })
+
+
+def write_news_csv(path: Path, tickers: List[str], per_symbol: int = 12, seed: int = 0) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    make_news_frame(tickers, per_symbol, seed).to_csv(path, index=False)
+    return path
+
+
+def synthetic_config(tickers: List[str], workdir: Path, period: str = "6mo", interval: str = "1d") -> Dict[str, Any]:
+    """A config.yml-shaped dict wired to the fake price provider and a generated news CSV."""
+    workdir = Path(workdir)
+    seed = zlib.crc32(",".join(tickers[:3]).encode()) & 0xFFFF
+    news_csv = write_news_csv(workdir / "news.csv", tickers, seed=seed)
+    return {
+        "universe": {"tickers": list(tickers)},
+        "prices": {"period": period, "interval": interval, "provider": "fake", "batch_size": 500,
+                   "cache": {"enabled": False}},
+        "news": {"provider": "csv", "csv_path": str(news_csv), "max_per_symbol": 10},
+        "routing": {"map": {"prices": "market", "news": "news", "summarize": "market", "evaluate": "evalopt"},
+                    "fallback": "skip"},
+        "memory": {"backend": "json", "path": str(workdir / "memory.json")},
+        "executor": {"io_workers": 8, "compute_workers": 2},
+    }
@@ -0,0 +1,83 @@
+from __future__ import annotations
+import json
+import threading
+from typing import Any, Dict, List, Optional
+from core.types import Artifact, Task
+
+
+class ArtifactStore:
+    """
+    In-process store for task outputs. Each task publishes its Artifact here
+    and dependents read it instead of recomputing; an artifact is evicted as
+    soon as every task that depends on it has finished. Tasks are registered
+    a group at a time (`add`) as the plan is expanded, and their bookkeeping
+    is dropped once they and their dependents are done.
+    """
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self._keys: Dict[str, str] = {}
+        self._kinds: Dict[str, str] = {}
+        self._pending: Dict[str, int] = {}
+        self._items: Dict[str, Artifact] = {}
+        self._lock = threading.Lock()
+        self.peak = 0
+
+    def add(self, tasks: List[Task]):
+        """Register a self-contained group of tasks (every dep is in the group or already added)."""
+        with self._lock:
+            for t in tasks:
+                self._keys[t.id] = self.key(t)
+                self._kinds[t.id] = t.kind
+                self._pending[t.id] = 0
+            for t in tasks:
+                for d in t.deps:
+                    self._pending[d] += 1
+
+    def needed(self, task_id: str) -> bool:
+        """True while some task that depends on `task_id` hasn't finished."""
+        return self._pending.get(task_id, 0) > 0
+
+    @staticmethod
+    def key(task: Task) -> str:
+        return f"{task.id}|{json.dumps(task.params, sort_keys=True, default=str)}"
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def publish(self, task: Task, kind: str, content: Any, meta: Dict[str, Any] | None = None) -> Artifact:
+        """Wrap a task's output in an Artifact and keep it while anyone still needs it."""
+        art = self.dispatcher.build_artifact(kind, task.params.get("symbol", task.id), content, meta)
+        with self._lock:
+            if self._pending.get(task.id):
+                self._items[self._keys[task.id]] = art
+                self.peak = max(self.peak, len(self._items))
+        return art
+
+    def get(self, task_id: str) -> Optional[Artifact]:
+        key = self._keys.get(task_id)
+        return self._items.get(key) if key else None
+
+    def inputs(self, task: Task) -> Dict[str, Artifact]:
+        """Artifacts of a task's deps, keyed by the dep's kind."""
+        out: Dict[str, Artifact] = {}
+        for d in task.deps:
+            art = self.get(d)
+            if art is not None:
+                out[self._kinds[d]] = art
+        return out
+
+    def release(self, task: Task):
+        """Mark `task` as done consuming its deps; evict any dep nobody else needs."""
+        with self._lock:
+            for d in task.deps:
+                self._pending[d] -= 1
+                if self._pending[d] <= 0:
+                    self._items.pop(self._keys[d], None)
+                    self._forget(d)
+            if self._pending.get(task.id) == 0:
+                self._forget(task.id)
+
+    def _forget(self, task_id: str):
+        self._keys.pop(task_id, None)
+        self._kinds.pop(task_id, None)
+        self._pending.pop(task_id, None)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from collections import deque
+import itertools
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+from core.registry import HandlerSpec
+from core.types import Task
+from utils import trace
+from utils.io import say
+
+IO_KINDS = ("prices", "news")
+
+
+class Executor:
+    """
+    Runs a DAG concurrently: a task is submitted as soon as all of its deps
+    have finished. I/O-bound kinds go to one thread pool, everything else to a
+    separate, smaller "compute" thread pool that only bounds how many of them
+    run at once; both are threads, so pure-Python work still shares the GIL
+    (the heavy stages fan out to processes themselves: stats.workers,
+    filings.workers). Each kind can be capped independently (a limit counts
+    tasks, so a batch of n takes n of its kind's slots).
+
+    With handler specs, the pool comes from each spec's exec_class, and ready
+    tasks of a batchable kind are coalesced into one batch call. Tasks are only
+    handed to a pool when it has an idle worker, so anything that piles up in
+    the meantime can still be batched.
+
+    A task that raises (or a batch call that does) fails on its own: its
+    tasks and everything downstream of them are recorded in `failed` and
+    the rest of the plan carries on.
+    """
+    def __init__(self, cfg: Dict[str, Any]):
+        ex = cfg.get("executor", {})
+        self.io_kinds = set(ex.get("io_kinds", IO_KINDS))
+        self.io_workers = int(ex.get("io_workers", 8))
+        self.compute_workers = int(ex.get("compute_workers", ex.get("cpu_workers", 2)))  # cpu_workers: old name
+        self.limits: Dict[str, int] = {k: int(v) for k, v in (ex.get("limits") or {}).items()}
+        for kind, limit in self.limits.items():
+            if limit < 1:
+                raise ValueError(f"executor.limits.{kind} must be at least 1 (leave it out for no limit), got {limit}")
+        self.window = max(1, int(ex.get("window", 1000)))  # symbols (plan groups) expanded at once
+        self.failed: Dict[str, str] = {}  # task id -> error, for the last run
+
+    def exec_class(self, kind: str, specs: Dict[str, Optional[HandlerSpec]]) -> str:
+        spec = specs.get(kind)
+        if spec is not None:
+            return spec.exec_class
+        return "io" if kind in self.io_kinds else "cpu"
+
+    def run(self, dag, handler: Callable[[Task], Any],
+            specs: Optional[Dict[str, Optional[HandlerSpec]]] = None,
+            batch_handler: Optional[Callable[[List[Task]], List[Any]]] = None,
+            on_expand: Optional[Callable[[List[Task]], Any]] = None,
+            on_skip: Optional[Callable[[Task], Any]] = None,
+            keep_results: bool = True) -> Dict[str, Any]:
+        """
+        Execute every task with `handler` and return {task_id: result}.
+        `batch_handler(tasks)` runs a coalesced group of one batchable kind and
+        returns one result per task.
+
+        `dag` is anything with `groups()` (a DAG or a TemplatePlan). Groups
+        are expanded lazily, at most `window` of them in flight, and
+        `on_expand(group)` is called for each before its tasks can run.
+        Finished tasks are dropped, so bookkeeping follows the window; pass
+        keep_results=False to not collect results either.
+
+        Tasks downstream of a failure never run; `on_skip(task)` is called
+        for each of them instead, so callers can release what they hold.
+        """
+        specs = specs or {}
+        groups = iter(dag.groups())
+        tasks: Dict[str, Task] = {}
+        dependents: Dict[str, List[str]] = {}
+        waiting: Dict[str, int] = {}
+        group_of: Dict[str, int] = {}
+        left: Dict[int, int] = {}  # unfinished tasks per open group
+        gids = itertools.count()
+
+        # Ready queues per kind so same-kind tasks can be taken together
+        ready: Dict[str, deque] = {}
+        ready_at: Dict[str, float] = {}
+
+        def expand():
+            while len(left) < self.window:
+                group = next(groups, None)
+                if group is None:
+                    return
+                if not group:
+                    continue
+                if on_expand is not None:
+                    on_expand(group)
+                gid = next(gids)
+                left[gid] = len(group)
+                now = time.perf_counter()
+                for t in group:
+                    tasks[t.id] = t
+                    dependents[t.id] = []
+                    waiting[t.id] = len(t.deps)
+                    group_of[t.id] = gid
+                for t in group:
+                    for d in t.deps:
+                        dependents[d].append(t.id)
+                    if not t.deps:
+                        ready.setdefault(t.kind, deque()).append(t.id)
+                        ready_at[t.id] = now
+
+        running: Dict[Future, List[str]] = {}
+        per_kind: Dict[str, int] = {}
+        per_class: Dict[str, int] = {"io": 0, "cpu": 0}
+        capacity = {"io": self.io_workers, "cpu": self.compute_workers}
+        results: Dict[str, Any] = {}
+        failed = self.failed = {}
+
+        def finish(tid: str):
+            del tasks[tid], waiting[tid]
+            gid = group_of.pop(tid)
+            left[gid] -= 1
+            if not left[gid]:
+                del left[gid]
+
+        def fail(tid: str, error: str):
+            # Dependents of a failed task are failed too, without running
+            failed[tid] = error
+            for nxt in dependents.pop(tid):
+                if nxt not in failed:
+                    if on_skip is not None:
+                        on_skip(tasks[nxt])
+                    fail(nxt, f"skipped: {tid} failed")
+            finish(tid)
+
+        pools = {"io": ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="io"),
+                 "cpu": ThreadPoolExecutor(max_workers=self.compute_workers, thread_name_prefix="compute")}
+        try:
+            expand()
+            while any(ready.values()) or running:
+                # Submit everything the pools and per-kind limits allow; the rest stays queued.
+                for kind, queue in ready.items():
+                    cls = self.exec_class(kind, specs)
+                    spec = specs.get(kind)
+                    size = spec.max_batch if spec is not None and spec.batchable and batch_handler else 1
+                    limit = self.limits.get(kind)
+                    while queue and per_class[cls] < capacity[cls] and (limit is None or per_kind.get(kind, 0) < limit):
+                        take = min(size, len(queue), size if limit is None else limit - per_kind.get(kind, 0))
+                        ids = [queue.popleft() for _ in range(take)]
+                        batch = [tasks[tid] for tid in ids]
+                        waited = min(ready_at.pop(tid) for tid in ids)
+                        if len(batch) == 1:
+                            fut = pools[cls].submit(self._call, handler, batch[0], waited)
+                        else:
+                            fut = pools[cls].submit(self._call_batch, batch_handler, batch, waited)
+                        running[fut] = ids
+                        per_kind[kind] = per_kind.get(kind, 0) + len(ids)
+                        per_class[cls] += 1
+
+                if not running:
+                    break
+                done: Set[Future] = wait(running, return_when=FIRST_COMPLETED)[0]
+                for fut in done:
+                    ids = running.pop(fut)
+                    kind = tasks[ids[0]].kind
+                    per_kind[kind] -= len(ids)
+                    per_class[self.exec_class(kind, specs)] -= 1
+                    try:
+                        out = fut.result()
+                    except Exception as e:
+                        say(f"❌ {kind} failed for {', '.join(ids[:8])}{', ...' if len(ids) > 8 else ''}: "
+                            f"{type(e).__name__}: {e}")
+                        for tid in ids:
+                            fail(tid, f"{type(e).__name__}: {e}")
+                        continue
+                    out = [out] if len(ids) == 1 else (out or [None] * len(ids))
+                    for tid, res in zip(ids, out):
+                        if keep_results:
+                            results[tid] = res
+                        for nxt in dependents.pop(tid):
+                            if nxt in failed:
+                                continue
+                            waiting[nxt] -= 1
+                            if waiting[nxt] == 0:
+                                ready.setdefault(tasks[nxt].kind, deque()).append(nxt)
+                                ready_at[nxt] = time.perf_counter()
+                        finish(tid)
+                expand()
+        finally:
+            for fut in running:
+                fut.cancel()
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        return results
+
+    @staticmethod
+    def _call(handler: Callable[[Task], Any], task: Task, ready_at: float) -> Any:
+        # Queue wait covers per-kind deferral and waiting for a free worker
+        wait_ms = (time.perf_counter() - ready_at) * 1000
+        with trace.span(task.id, "task", kind=task.kind, queue_wait_ms=round(wait_ms, 3)):
+            return handler(task)
+
+    @staticmethod
+    def _call_batch(handler: Callable[[List[Task]], List[Any]], tasks: List[Task], ready_at: float) -> List[Any]:
+        wait_ms = (time.perf_counter() - ready_at) * 1000
+        kind = tasks[0].kind
+        with trace.span(f"{kind}[{len(tasks)}]", "task", kind=kind, batch=len(tasks),
+                        queue_wait_ms=round(wait_ms, 3)):
+            return handler(tasks)
@@ -1,7 +1,14 @@
 from __future__ import annotations
-from typing import Dict, List
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from core.types import Task
 
+
+class DAGError(ValueError):
+    """Raised for a task graph with a cycle or a dependency on an unknown task."""
+
+
 class DAG:
     """
     Represents a Directed Acyclic Graph (DAG) of Tasks.
@@ -9,29 +16,169 @@ class DAG:
     """
     def __init__(self, tasks: List[Task]):
         self.tasks = {t.id: t for t in tasks}
+        # Reverse adjacency: task id -> ids of the tasks that depend on it
+        self.dependents: Dict[str, List[str]] = {tid: [] for tid in self.tasks}
+        for t in self.tasks.values():
+            for d in t.deps:
+                if d not in self.tasks:
+                    raise DAGError(f"Task '{t.id}' depends on unknown task '{d}'")
+                self.dependents[d].append(t.id)
         self._topo = None
+        self._waves = None
 
-    def topological_order(self) -> List[Task]:
-        """Return tasks in dependency-resolved order."""
-        if self._topo:
-            return self._topo
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def __iter__(self) -> Iterator[Task]:
+        return iter(self.tasks.values())
+
+    def kinds(self) -> Set[str]:
+        return {t.kind for t in self.tasks.values()}
 
-        indeg: Dict[str, int] = {t_id: 0 for t_id in self.tasks}
+    def step_deps(self) -> Dict[str, Set[str]]:
+        """Kind-level dependencies: kind -> kinds its tasks depend on."""
+        out: Dict[str, Set[str]] = {}
         for t in self.tasks.values():
-            for d in t.deps:
-                indeg[t.id] += 1
-
-        ready = [tid for tid, deg in indeg.items() if deg == 0]
-        order: List[Task] = []
-
-        while ready:
-            cur = ready.pop()
-            order.append(self.tasks[cur])
-            for t in self.tasks.values():
-                if cur in t.deps:
-                    indeg[t.id] -= 1
-                    if indeg[t.id] == 0:
-                        ready.append(t.id)
-
-        self._topo = order
-        return order
+            out.setdefault(t.kind, set()).update(self.tasks[d].kind for d in t.deps)
+        return out
+
+    def groups(self) -> Iterator[List[Task]]:
+        """Self-contained task groups for the executor; a DAG is one group in topological order."""
+        if self.tasks:
+            yield self.topological_order()
+
+    def topological_order(self) -> List[Task]:
+        """Return tasks in dependency-resolved order (Kahn's algorithm, O(V+E))."""
+        if self._topo is None:
+            self._topo = [t for wave in self.waves() for t in wave]
+        return self._topo
+
+    def waves(self) -> List[List[Task]]:
+        """
+        Group tasks into levels: every task in wave n only depends on tasks in
+        earlier waves, so each wave can run fully in parallel.
+        """
+        if self._waves is not None:
+            return self._waves
+
+        indeg: Dict[str, int] = {tid: len(t.deps) for tid, t in self.tasks.items()}
+        current = [tid for tid, deg in indeg.items() if deg == 0]
+        waves: List[List[Task]] = []
+        seen = 0
+        while current:
+            waves.append([self.tasks[tid] for tid in current])
+            seen += len(current)
+            nxt = []
+            for cur in current:
+                for dep in self.dependents[cur]:
+                    indeg[dep] -= 1
+                    if indeg[dep] == 0:
+                        nxt.append(dep)
+            current = nxt
+
+        if seen < len(self.tasks):
+            stuck = sorted(tid for tid, deg in indeg.items() if deg > 0)
+            raise DAGError(f"Cycle detected among {len(stuck)} tasks: {', '.join(stuck[:10])}"
+                           + (" ..." if len(stuck) > 10 else ""))
+        self._waves = waves
+        return waves
+
+    def ancestors(self, ids: Iterable[str]) -> Set[str]:
+        """All tasks that `ids` transitively depend on (not including `ids`)."""
+        out: Set[str] = set()
+        stack = []
+        for tid in ids:
+            if tid not in self.tasks:
+                raise DAGError(f"Unknown task '{tid}'")
+            stack.extend(self.tasks[tid].deps)
+        while stack:
+            tid = stack.pop()
+            if tid not in out:
+                out.add(tid)
+                stack.extend(self.tasks[tid].deps)
+        return out
+
+    def subgraph(self, targets: Iterable[str]) -> "DAG":
+        """The DAG restricted to `targets` and their ancestors, e.g. ["evaluate:JPM"]."""
+        targets = list(targets)
+        keep = self.ancestors(targets) | set(targets)
+        return DAG([t for tid, t in self.tasks.items() if tid in keep])
+
+
+@dataclass(frozen=True)
+class Step:
+    """One step of the per-symbol pattern: its kind, the kinds it depends on, and an optional symbol subset."""
+    kind: str
+    deps: Tuple[str, ...] = ()
+    when: Optional[str] = None  # name of a symbol subset (e.g. "filers"); None means every symbol
+
+
+class TemplatePlan:
+    """
+    A plan stored as its per-symbol step pattern plus the symbol list, not as
+    tasks. Tasks are expanded one symbol at a time (`groups`), so memory
+    follows how many symbols are in flight, not the universe size. Every
+    dep stays inside its symbol's group, and task ids are "<kind>:<symbol>".
+    """
+    def __init__(self, steps: List[Step], symbols: List[str], subsets: Optional[Dict[str, Set[str]]] = None):
+        seen: Set[str] = set()
+        for st in steps:
+            for d in st.deps:
+                if d not in seen:
+                    raise DAGError(f"Step '{st.kind}' depends on '{d}', which is not an earlier step")
+            seen.add(st.kind)
+        self.steps = list(steps)
+        self.symbols = [sys.intern(s) for s in symbols]
+        self.subsets = subsets or {}
+
+    def _steps(self, symbol: str) -> List[Step]:
+        return [st for st in self.steps if st.when is None or symbol in self.subsets.get(st.when, ())]
+
+    def expand(self, symbol: str) -> List[Task]:
+        """The tasks for one symbol, in dependency order; deps on steps the symbol skips are dropped."""
+        steps = self._steps(symbol)
+        present = {st.kind for st in steps}
+        return [Task(f"{st.kind}:{symbol}", st.kind, {"symbol": symbol},
+                     [f"{d}:{symbol}" for d in st.deps if d in present]) for st in steps]
+
+    def groups(self) -> Iterator[List[Task]]:
+        for sym in self.symbols:
+            yield self.expand(sym)
+
+    def for_symbols(self, symbols: Iterable[str]) -> "TemplatePlan":
+        """The same step pattern over just `symbols` (still lazy)."""
+        return TemplatePlan(self.steps, list(symbols), self.subsets)
+
+    def __iter__(self) -> Iterator[Task]:
+        for group in self.groups():
+            yield from group
+
+    def __len__(self) -> int:
+        total = 0
+        for st in self.steps:
+            if st.when is None:
+                total += len(self.symbols)
+            else:
+                subset = self.subsets.get(st.when, ())
+                total += sum(1 for s in self.symbols if s in subset)
+        return total
+
+    def kinds(self) -> Set[str]:
+        return {st.kind for st in self.steps if st.when is None or self.subsets.get(st.when)}
+
+    def step_deps(self) -> Dict[str, Set[str]]:
+        kinds = self.kinds()
+        return {st.kind: set(st.deps) & kinds for st in self.steps if st.kind in kinds}
+
+    def subgraph(self, targets: Iterable[str]) -> DAG:
+        """Materialize just the symbols named by `targets` and cut down to their ancestors."""
+        targets = list(targets)
+        known = set(self.symbols)
+        syms: List[str] = []
+        for tid in targets:
+            sym = tid.partition(":")[2]
+            if sym not in known:
+                raise DAGError(f"Unknown task '{tid}'")
+            if sym not in syms:
+                syms.append(sym)
+        return DAG([t for sym in syms for t in self.expand(sym)]).subgraph(targets)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import quote
+from core.types import Artifact, Report, Task
+
+ROOT = Path(__file__).resolve().parents[1]
+CODE_DIRS = ("agents", "core", "tools", "utils", "workflows")
+
+
+def _is_frame(obj: Any) -> bool:
+    # pandas is only imported once a pandas object shows up, so hashing reports doesn't load it
+    if not type(obj).__module__.startswith("pandas"):
+        return False
+    import pandas as pd
+    return isinstance(obj, pd.DataFrame)
+
+
+def content_hash(obj: Any) -> str:
+    """Stable digest of an artifact's content (frames, reports, JSON-like values)."""
+    h = hashlib.blake2b(digest_size=16)
+    if _is_frame(obj):
+        import pandas as pd
+        h.update(json.dumps([str(c) for c in obj.columns]).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, Report):
+        h.update(json.dumps([obj.symbol, obj.markdown, obj.sections], sort_keys=True, default=str).encode())
+    else:
+        h.update(json.dumps(obj, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def code_version(dirs: Iterable[str] = CODE_DIRS) -> str:
+    """Digest of the pipeline's source files; any code edit invalidates every memo entry."""
+    h = hashlib.blake2b(digest_size=16)
+    for d in dirs:
+        for p in sorted((ROOT / d).rglob("*.py")):
+            h.update(str(p.relative_to(ROOT)).encode())
+            h.update(p.read_bytes())
+    return h.hexdigest()
+
+
+class MemoStore:
+    """
+    Make-style memoization of task outputs, one file per task id. A task's
+    fingerprint covers its params, the content hashes of its upstream
+    artifacts, its handler settings and the code version; an unchanged
+    fingerprint means the stored output is reused instead of recomputed.
+    """
+    def __init__(self, root: str = ".cache/memo", force: bool = False, invalidate: Iterable[str] = ()):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.force = force
+        self.invalidate = set(invalidate)
+        self.code = code_version()
+        self.stats: Dict[str, int] = {"reused": 0, "computed": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any], force: bool = False,
+                    invalidate: Iterable[str] = ()) -> Optional["MemoStore"]:
+        m = cfg.get("memo", {})
+        if not m.get("enabled", False):
+            return None
+        return cls(m.get("dir", ".cache/memo"), force, invalidate)
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    def path(self, task_id: str) -> Path:
+        return self.root / f"{quote(task_id, safe='')}.pkl"
+
+    def fingerprint(self, task: Task, settings: Dict[str, Any], inputs: Dict[str, Artifact]) -> Optional[str]:
+        """None when an upstream artifact is missing or unhashed (e.g. a skipped dep)."""
+        upstream = {}
+        for kind, art in inputs.items():
+            if "hash" not in art.meta:
+                return None
+            upstream[kind] = art.meta["hash"]
+        if len(upstream) != len(task.deps):
+            return None
+        doc = {"kind": task.kind, "params": task.params, "deps": upstream,
+               "settings": settings, "code": self.code}
+        return hashlib.blake2b(json.dumps(doc, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+    def load(self, task: Task, fingerprint: Optional[str]) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """The stored (content, meta) if the fingerprint still matches and the kind isn't invalidated."""
+        if fingerprint is None or self.force or task.kind in self.invalidate:
+            return None
+        try:
+            with self.path(task.id).open("rb") as fh:
+                entry = pickle.load(fh)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self.path(task.id).unlink(missing_ok=True)
+            return None
+        if entry.get("fingerprint") != fingerprint:
+            return None
+        self._count("reused")
+        return entry["content"], entry["meta"]
+
+    def save(self, task: Task, fingerprint: Optional[str], content: Any, meta: Dict[str, Any]):
+        self._count("computed")
+        if fingerprint is None:
+            return
+        p = self.path(task.id)
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp.open("wb") as fh:
+            pickle.dump({"fingerprint": fingerprint, "content": content, "meta": meta}, fh,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, p)
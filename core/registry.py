@@ -0,0 +1,82 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from core.graph import DAG, TemplatePlan
+from core.types import Artifact, Task
+
+Handler = Callable[[Task, Dict[str, Artifact]], Any]
+BatchHandler = Callable[[List[Task], List[Dict[str, Artifact]]], List[Any]]
+ReuseHook = Callable[[Task, Any, Dict[str, Any]], None]
+
+
+class UnknownTaskKind(ValueError):
+    """A planned task kind has no registered handler for its route."""
+
+
+@dataclass
+class HandlerSpec:
+    """How to run one task kind and what the scheduler should know about it."""
+    kind: str
+    route: str                          # routing.map value this handler serves, e.g. "market"
+    fn: Handler                         # (task, inputs by dep kind) -> artifact content
+    artifact: str                       # artifact type published for the result
+    exec_class: str = "cpu"             # "io" (network/disk bound) or "cpu" (the executor's compute pool)
+    cost: float = 1.0                   # relative expected cost per task
+    batch_fn: Optional[BatchHandler] = None
+    max_batch: int = 1
+    memoize: bool = True                # False for sources whose output depends on the outside world
+    settings: Dict[str, Any] = field(default_factory=dict)  # config the output depends on
+    on_reuse: Optional[ReuseHook] = None  # (task, content, meta): side effects a memoized output still needs
+
+    @property
+    def batchable(self) -> bool:
+        return self.batch_fn is not None and self.max_batch > 1
+
+
+class HandlerRegistry:
+    """
+    Agents register a handler per (route, task kind). The routing map in
+    config picks the route for each kind, and `resolve` checks the whole plan
+    once so unknown kinds fail before any work starts.
+    """
+    def __init__(self):
+        self._specs: Dict[Tuple[str, str], HandlerSpec] = {}
+
+    def register(self, kind: str, route: str, fn: Handler, artifact: str | None = None,
+                 exec_class: str = "cpu", cost: float = 1.0,
+                 batch_fn: Optional[BatchHandler] = None, max_batch: int = 1,
+                 memoize: bool = True, settings: Dict[str, Any] | None = None,
+                 on_reuse: Optional[ReuseHook] = None) -> HandlerSpec:
+        if exec_class not in ("io", "cpu"):
+            raise ValueError(f"exec_class must be 'io' or 'cpu', got {exec_class!r}")
+        spec = HandlerSpec(kind, route, fn, artifact or kind, exec_class, cost, batch_fn, max_batch,
+                           memoize, settings or {}, on_reuse)
+        self._specs[(route, kind)] = spec
+        return spec
+
+    def get(self, route: str, kind: str) -> Optional[HandlerSpec]:
+        return self._specs.get((route, kind))
+
+    def kinds(self) -> List[str]:
+        return sorted({k for _, k in self._specs})
+
+    def resolve(self, dag: Union[DAG, TemplatePlan], dispatcher) -> Dict[str, Optional[HandlerSpec]]:
+        """
+        Map every kind in the plan to its handler (None for kinds routed to
+        'skip'). Raises UnknownTaskKind listing every kind that can't run.
+        """
+        resolved: Dict[str, Optional[HandlerSpec]] = {}
+        missing = []
+        for kind in sorted(dag.kinds()):
+            route = dispatcher.route_kind(kind)
+            if route == "skip":
+                resolved[kind] = None
+                continue
+            spec = self.get(route, kind)
+            if spec is None:
+                missing.append(f"{kind} (route '{route}')")
+            resolved[kind] = spec
+        if missing:
+            raise UnknownTaskKind(f"No handler registered for: {', '.join(missing)}. "
+                                  f"Registered kinds: {', '.join(self.kinds()) or 'none'}")
+        return resolved
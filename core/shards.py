@@ -0,0 +1,324 @@
+from __future__ import annotations
+import hashlib
+import heapq
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+from core.graph import DAG, TemplatePlan
+from core.types import Report
+from utils.memory import JsonMemory, Memory
+
+
+def stable_bucket(symbol: str, n: int) -> int:
+    """Same bucket in every process and on every host (unlike the salted built-in hash)."""
+    return int.from_bytes(hashlib.blake2b(symbol.encode("utf-8"), digest_size=8).digest(), "big") % n
+
+
+def symbol_costs(dag: Union[DAG, TemplatePlan], specs: Dict[str, Any]) -> Dict[str, float]:
+    """Estimated cost per symbol: the summed `cost` of its tasks' handlers (skipped kinds are free)."""
+    out: Dict[str, float] = {}
+    for t in dag:
+        spec = specs.get(t.kind)
+        sym = t.params.get("symbol")
+        out[sym] = out.get(sym, 0.0) + (spec.cost if spec is not None else 0.0)
+    return out
+
+
+def partition(tickers: List[str], n: int, strategy: str = "hash",
+              costs: Optional[Dict[str, float]] = None) -> List[List[str]]:
+    """
+    Split the universe into at most `n` non-empty shards. "hash" is stable
+    per symbol; "cost" balances the estimated work (largest first onto the
+    lightest shard). Each shard keeps the universe order.
+    """
+    n = max(1, min(int(n), len(tickers) or 1))
+    if strategy == "hash":
+        owner = {sym: stable_bucket(sym, n) for sym in tickers}
+    elif strategy == "cost":
+        costs = costs or {}
+        heap = [(0.0, i) for i in range(n)]
+        owner = {}
+        for sym in sorted(tickers, key=lambda s: (-costs.get(s, 1.0), s)):
+            load, i = heapq.heappop(heap)
+            owner[sym] = i
+            heapq.heappush(heap, (load + costs.get(sym, 1.0), i))
+    else:
+        raise ValueError(f"Unknown shard strategy: {strategy}")
+    shards: List[List[str]] = [[] for _ in range(n)]
+    for sym in tickers:
+        shards[owner[sym]].append(sym)
+    return [s for s in shards if s]
+
+
+EXPIRE_SQL = ("UPDATE shards SET state = 'failed', error = COALESCE(error, 'lease expired') "
+              "WHERE state = 'leased' AND lease_until < ? AND attempts >= ?")
+
+
+@dataclass
+class Shard:
+    id: int
+    tickers: List[str]
+    attempts: int = 0
+    owner: Optional[str] = None
+
+
+def worker_id(pid: Optional[int] = None) -> str:
+    """Lease owner for a worker process on this host (the current one by default)."""
+    return f"{socket.gethostname()}:{os.getpid() if pid is None else pid}"
+
+
+class ShardQueue:
+    """
+    SQLite-backed work queue for one sharded run, shared by workers on one
+    host or on several hosts with a common filesystem. A worker leases a
+    shard for `ttl` seconds and keeps the lease alive with heartbeats; a
+    shard whose lease expired (the worker died) is leased again, up to
+    `max_attempts` times, and then marked failed. Only the current lease
+    holder can complete a shard, so a late result from a presumed-dead
+    worker is ignored.
+    """
+    def __init__(self, path: str, ttl: float = 300.0, max_attempts: int = 3):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = float(ttl)
+        self.max_attempts = int(max_attempts)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS shards ("
+                               "id INTEGER PRIMARY KEY, tickers TEXT NOT NULL, state TEXT NOT NULL DEFAULT 'pending', "
+                               "owner TEXT, lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+                               "result TEXT, error TEXT)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    @property
+    def dir(self) -> Path:
+        """Where workers write shard outputs (next to the queue)."""
+        return self.path.parent
+
+    def _tx(self, fn):
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(cur)
+                cur.execute("COMMIT")
+                return out
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def create(self, shards: List[List[str]], meta: Optional[Dict[str, Any]] = None):
+        def fill(cur):
+            cur.execute("DELETE FROM shards")
+            cur.executemany("INSERT INTO shards (id, tickers) VALUES (?, ?)",
+                            [(i, json.dumps(s)) for i, s in enumerate(shards)])
+            cur.executemany("INSERT INTO meta (key, value) VALUES (?, ?) "
+                            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                            [(k, json.dumps(v)) for k, v in (meta or {}).items()])
+        self._tx(fill)
+
+    def meta(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM meta").fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+    def lease(self, owner: str) -> Optional[Shard]:
+        """Claim a pending shard or one whose lease has expired; None if nothing is claimable now."""
+        def claim(cur):
+            now = time.time()
+            # Expired leases that already used every attempt are given up on
+            cur.execute(EXPIRE_SQL, (now, self.max_attempts))
+            row = cur.execute("SELECT id, tickers, attempts FROM shards WHERE state = 'pending' "
+                              "OR (state = 'leased' AND lease_until < ?) ORDER BY attempts, id LIMIT 1",
+                              (now,)).fetchone()
+            if row is None:
+                return None
+            cur.execute("UPDATE shards SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1 "
+                        "WHERE id = ?", (owner, now + self.ttl, row[0]))
+            return Shard(row[0], json.loads(row[1]), row[2] + 1, owner)
+        return self._tx(claim)
+
+    def heartbeat(self, shard: Shard) -> bool:
+        """Extend the lease; False if it was lost (expired and taken by another worker)."""
+        def renew(cur):
+            cur.execute("UPDATE shards SET lease_until = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                        (time.time() + self.ttl, shard.id, shard.owner))
+            return cur.rowcount == 1
+        return self._tx(renew)
+
+    def complete(self, shard: Shard, result: Dict[str, Any]) -> bool:
+        def done(cur):
+            cur.execute("UPDATE shards SET state = 'done', result = ?, error = NULL "
+                        "WHERE id = ? AND owner = ? AND state = 'leased'",
+                        (json.dumps(result), shard.id, shard.owner))
+            return cur.rowcount == 1
+        return self._tx(done)
+
+    def fail(self, shard: Shard, error: str):
+        """Give the shard back for another attempt, or fail it for good once attempts run out."""
+        def give_back(cur):
+            cur.execute("UPDATE shards SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                        "owner = NULL, lease_until = NULL, error = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                        (self.max_attempts, error, shard.id, shard.owner))
+        self._tx(give_back)
+
+    def release(self, owner: str, error: str) -> List[int]:
+        """
+        Give back every shard `owner` holds without waiting for its leases to
+        expire (the supervisor saw the worker die); returns their ids.
+        """
+        def give_back(cur):
+            ids = [r[0] for r in cur.execute("SELECT id FROM shards WHERE owner = ? AND state = 'leased'", (owner,))]
+            cur.execute("UPDATE shards SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                        "owner = NULL, lease_until = NULL, error = ? WHERE owner = ? AND state = 'leased'",
+                        (self.max_attempts, error, owner))
+            return ids
+        return self._tx(give_back)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM shards GROUP BY state").fetchall()
+        return {"pending": 0, "leased": 0, "done": 0, "failed": 0, **dict(rows)}
+
+    def finished(self) -> bool:
+        c = self.counts()
+        if c["leased"]:
+            # A dead worker's expired lease with no attempts left counts as failed
+            self.lease_expired()
+            c = self.counts()
+        return c["pending"] == 0 and c["leased"] == 0
+
+    def lease_expired(self):
+        self._tx(lambda cur: cur.execute(EXPIRE_SQL, (time.time(), self.max_attempts)))
+
+    def shards(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id, tickers, state, owner, attempts, result, error "
+                                      "FROM shards ORDER BY id").fetchall()
+        return [{"id": i, "tickers": json.loads(t), "state": s, "owner": o, "attempts": a,
+                 "result": json.loads(r) if r else None, "error": e} for i, t, s, o, a, r, e in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Heartbeat:
+    """Renews a shard lease every ttl/3 seconds from a daemon thread while the shard runs."""
+    def __init__(self, queue: ShardQueue, shard: Shard):
+        self.queue = queue
+        self.shard = shard
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True, name=f"lease-{shard.id}")
+
+    def _beat(self):
+        while not self._stop.wait(self.queue.ttl / 3):
+            if not self.queue.heartbeat(self.shard):
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def work(queue: ShardQueue, run_shard: Callable[[Shard], Dict[str, Any]], owner: Optional[str] = None,
+         poll: float = 1.0) -> int:
+    """
+    Worker loop: lease a shard, run it under a heartbeat, report the result,
+    repeat. While other workers hold live leases it keeps polling so it can
+    take over their shards if they die; it returns (with the number of shards
+    it completed) once every shard is done or failed.
+    """
+    owner = owner or worker_id()
+    completed = 0
+    while True:
+        shard = queue.lease(owner)
+        if shard is None:
+            if queue.finished():
+                return completed
+            time.sleep(poll)
+            continue
+        print(f"🧩 {owner}: shard {shard.id} ({len(shard.tickers)} symbols, attempt {shard.attempts})")
+        try:
+            with Heartbeat(queue, shard) as hb:
+                result = run_shard(shard)
+        except Exception as e:
+            print(f"❌ Shard {shard.id} failed: {type(e).__name__}: {e}")
+            queue.fail(shard, f"{type(e).__name__}: {e}")
+            continue
+        if hb.lost or not queue.complete(shard, result):
+            print(f"⚠️ Lease on shard {shard.id} was lost; another worker owns it now")
+        else:
+            completed += 1
+
+
+def supervise(queue: ShardQueue, spawn: Callable[[], Any], workers: int, poll: float = 1.0) -> int:
+    """
+    Start `workers` local worker processes (`spawn` returns a Popen-like
+    object) and keep that many running until the queue is finished. A
+    worker only exits early if it died, so it is replaced, and the shards
+    it held are given back at once rather than after their lease expires.
+    With `workers` 0 it only waits for remote workers to finish the queue.
+    Returns the number of workers that had to be replaced.
+    """
+    procs = [spawn() for _ in range(workers)]
+    replaced = 0
+    budget = workers * queue.max_attempts
+    while not queue.finished():
+        alive = [p for p in procs if p.poll() is None]
+        for p in procs:
+            if p.poll() not in (None, 0):
+                print(f"⚠️ Worker pid {p.pid} exited with status {p.returncode}")
+                for sid in queue.release(worker_id(p.pid), f"worker pid {p.pid} exited with status {p.returncode}"):
+                    print(f"🧩 Shard {sid} released for another worker")
+        procs = alive
+        while len(procs) < workers and replaced < budget:
+            procs.append(spawn())
+            replaced += 1
+        if workers and not procs:
+            break  # nothing left to spawn; remaining leases expire into failures
+        # With no local workers, remote ones (--worker) hold the leases: wait for them
+        time.sleep(poll)
+    for p in procs:
+        p.wait()
+    return replaced
+
+
+def read_reports(path: str) -> Iterator[Report]:
+    """Reports written by a shard's JsonlSink."""
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                doc = json.loads(line)
+                yield Report(doc["symbol"], doc.get("sections", {}), doc.get("markdown", ""))
+
+
+def merge(queue: ShardQueue, memory: Memory, tickers: List[str]) -> Dict[str, Report]:
+    """
+    Combine finished shards: memory records are replayed into `memory` in
+    shard order and reports come back keyed by symbol in universe order.
+    """
+    reports: Dict[str, Report] = {}
+    with memory.batch():
+        for s in queue.shards():
+            if s["state"] != "done":
+                continue
+            memory.merge_from(JsonMemory(s["result"]["memory"]))
+            for rep in read_reports(s["result"]["reports"]):
+                reports[rep.symbol] = rep
+    return {sym: reports[sym] for sym in tickers if sym in reports}
@@ -2,7 +2,8 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
-@dataclass
+# Slotted: a large plan keeps many of these alive at once, and slots skip the per-object __dict__
+@dataclass(slots=True)
 class Task:
     """A unit of work in the agent system."""
     id: str
@@ -10,7 +11,7 @@ class Task:
     params: Dict[str, Any] = field(default_factory=dict)
     deps: List[str] = field(default_factory=list)  # dependent task IDs
 
-@dataclass
+@dataclass(slots=True)
 class Artifact:
     """A product/result of a completed task."""
     type: str                # e.g. prices | news | summary | eval
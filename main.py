@@ -1,109 +1,475 @@
 from __future__ import annotations
-from typing import Dict
-from utils.io import load_yaml
-from utils.memory import JsonMemory
+import argparse
+import copy
+import itertools
+from collections import Counter
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+from utils.io import load_yaml, say, set_quiet
+from utils import trace
+from utils.trace import Tracer, NullTracer
+from utils.memory import open_memory
+from utils.sinks import JsonlSink, ReportSink, TerminalSink, open_sinks
 from agents.planner import Planner
 from agents.dispatcher import Dispatcher
 from agents.market import MarketAgent
 from agents.evalopt import EvaluatorOptimizer
-from core.types import Report
+from agents.filing import FilingAgent
+from core.graph import DAG
+from core.types import Report, Task
+from core.executor import Executor
+from core.registry import HandlerRegistry, HandlerSpec
+from core.memo import MemoStore, content_hash
+from core.artifacts import ArtifactStore
+from core.shards import Shard, ShardQueue, merge, supervise, symbol_costs, work
 
 
-def run(config_path: str = "config/config.yml", rubric_path: str = "config/rubric.yml"):
-    cfg: Dict = load_yaml(config_path)
-    rubric: Dict = load_yaml(rubric_path)
+def build_registry(cfg: Dict, rubric: Dict, memory, dag, provider=None) -> Tuple[HandlerRegistry, MarketAgent]:
+    """Register every agent's handlers (filings only when the plan has filings tasks)."""
+    market = MarketAgent(cfg, provider=provider)
+    registry = HandlerRegistry()
+    market.register(registry)
+    EvaluatorOptimizer(rubric, memory).register(registry)
+    if "filings" in dag.kinds():
+        FilingAgent(cfg).register(registry)
+    return registry, market
 
-    print("🚀 Starting Multi-Agent Financial Analysis System...")
-    memory = JsonMemory(cfg.get("memory", {}).get("path", "memory.json"))
 
-    planner = Planner(cfg)
-    dag = planner.plan()
-    print(f"✅ Planned {len(dag.tasks)} tasks.")
-    print("First few task IDs:", list(dag.tasks.keys())[:10])
+def run(config_path: str = "config/config.yml", rubric_path: str = "config/rubric.yml", **kw):
+    """Load the config and rubric files and run the pipeline (keyword options as for `pipeline`)."""
+    return pipeline(load_yaml(config_path), load_yaml(rubric_path), **kw)
+
+
+class Session:
+    """
+    Everything a run keeps between passes over the plan: memory, the plan,
+    agents (with their providers and caches), resolved handlers and the memo
+    store. `pipeline` uses one for a single pass; watch mode keeps one alive
+    and executes just the symbols that changed, cycle after cycle.
+    """
+    def __init__(self, cfg: Dict, rubric: Dict, only: List[str] | None = None, force: bool = False,
+                 invalidate: List[str] | None = None, provider=None):
+        self.cfg = cfg
+        self.memory = open_memory(cfg)
+        self.dag = Planner(cfg).plan()
+        if only:
+            # Partial rerun: just the requested tasks and everything they depend on
+            self.dag = self.dag.subgraph(only)
+        self.dispatcher = Dispatcher(cfg)
+        self.registry, self.market = build_registry(cfg, rubric, self.memory, self.dag, provider)
+        # Every kind in the plan is resolved once here; unknown kinds fail before any work starts
+        self.specs = self.registry.resolve(self.dag, self.dispatcher)
+        self.memo = MemoStore.from_config(cfg, force, invalidate or ())
+        self.failed: Dict[str, str] = {}
+
+    def execute(self, dag, out: ReportSink, serial: bool = False, keep_reports: bool = True,
+                seeded: Dict[str, Tuple] | None = None) -> Dict[str, Report]:
+        """
+        Run `dag` (the session's plan or part of it), writing each finished
+        report to `out`. `seeded` maps task ids to (content, meta) results
+        that are already known; those tasks publish them instead of running.
+        Tasks that failed (or were skipped because a dep failed) are left in
+        `self.failed` as {task_id: error}.
+        """
+        specs, memo, memory = self.specs, self.memo, self.memory
+        self.failed = {}
+        seeded = dict(seeded or {})
+        reports: Dict[str, Report] = {}
+        pending: Dict[str, Report] = {}  # reports a later task (evaluate) will still replace
+        store = ArtifactStore(self.dispatcher)
 
-    dispatcher = Dispatcher(cfg)
-    market = MarketAgent(cfg)
-    evalopt = EvaluatorOptimizer(rubric, memory)
+        def emit(rep: Report):
+            out.write(rep)
+            if keep_reports:
+                reports[rep.symbol] = rep
 
-    reports: Dict[str, Report] = {}
+        def finish(task: Task, spec: HandlerSpec, result):
+            content, meta = result
+            if content is None:
+                return
+            if isinstance(content, Report):
+                # Written as soon as no downstream task will revise it, then dropped
+                if store.needed(task.id):
+                    pending[content.symbol] = content
+                else:
+                    pending.pop(content.symbol, None)
+                    emit(content)
+            store.publish(task, spec.artifact, content, meta)
 
-    for task in dag.topological_order():
-        kind = task.kind
-        symbol = task.params.get("symbol")
-        print(f"▶️ Executing task: {kind} for {symbol}")
+        def compute(task: Task, spec: HandlerSpec, inputs, result):
+            # Downstream fingerprints are built from the hash of what was actually produced
+            if memo is not None:
+                content, meta = result
+                if content is not None:
+                    meta = {**meta, "hash": content_hash(content)}
+                if spec.memoize:
+                    memo.save(task, memo.fingerprint(task, spec.settings, inputs), content, meta)
+                result = (content, meta)
+            finish(task, spec, result)
 
-        if dispatcher.should_skip(kind):
-            print(f"⚠️ Skipping task: {kind} for {symbol}")
-            continue
+        def reused(task: Task, spec: HandlerSpec, inputs):
+            if memo is None or not spec.memoize:
+                return None
+            hit = memo.load(task, memo.fingerprint(task, spec.settings, inputs))
+            if hit is not None and spec.on_reuse is not None:
+                spec.on_reuse(task, *hit)
+            return hit
 
-        if kind == "prices":
-            df = market.ingest_prices(symbol)
-            if df.empty:
-                print(f"⚠️ No price data found for {symbol}")
+        def execute(task: Task):
+            try:
+                say(f"▶️ Executing task: {task.kind} for {task.params.get('symbol')}")
+                spec = specs[task.kind]
+                if spec is None:
+                    say(f"⚠️ Skipping task: {task.kind} for {task.params.get('symbol')}")
+                    return
+                inputs = store.inputs(task)
+                if task.id in seeded:
+                    compute(task, spec, inputs, seeded.pop(task.id))
+                    return
+                hit = reused(task, spec, inputs)
+                if hit is not None:
+                    say(f"♻️ Reusing {task.kind} for {task.params.get('symbol')} (inputs unchanged)")
+                    finish(task, spec, hit)
+                    return
+                compute(task, spec, inputs, spec.fn(task, inputs))
+            finally:
+                store.release(task)
+
+        def execute_batch(tasks: List[Task]):
+            spec = specs[tasks[0].kind]
+            try:
+                say(f"▶️ Executing {len(tasks)} {spec.kind} tasks as one batch")
+                todo = []
+                for task in tasks:
+                    inputs = store.inputs(task)
+                    if task.id in seeded:
+                        compute(task, spec, inputs, seeded.pop(task.id))
+                        continue
+                    hit = reused(task, spec, inputs)
+                    if hit is not None:
+                        finish(task, spec, hit)
+                    else:
+                        todo.append((task, inputs))
+                if todo:
+                    results = spec.batch_fn([t for t, _ in todo], [inp for _, inp in todo])
+                    for (task, inputs), result in zip(todo, results):
+                        compute(task, spec, inputs, result)
+            finally:
+                for task in tasks:
+                    store.release(task)
+
+        # Score writes are buffered and flushed in batches instead of one file rewrite each
+        with memory.batch():
+            if serial:
+                for group in dag.groups():
+                    store.add(group)
+                    for task in group:
+                        with trace.span(task.id, "task", kind=task.kind, queue_wait_ms=0.0):
+                            execute(task)
             else:
-                print(f"✅ Retrieved {len(df)} rows of price data for {symbol}")
-
-        elif kind == "news":
-            items = market.ingest_news(symbol)
-            print(f"📰 Retrieved {len(items)} news items for {symbol}")
-
-        elif kind == "summarize":
-            df = market.ingest_prices(symbol)
-            stats = market.extract(df)
-            items = market.preprocess_texts(market.ingest_news(symbol))
-            sentiment = market.classify(stats)
-            md = market.summarize(symbol, stats, items, sentiment, cfg.get("summarizer", {}).get("max_bullets", 6))
-            rep = reports.get(symbol) or Report(symbol=symbol)
-            rep.sections["stats"] = stats
-            rep.sections["news"] = items
-            rep.sections["sentiment"] = sentiment
-            rep.markdown = md
-            reports[symbol] = rep
-            print(f"🧾 Summary generated for {symbol}")
-
-        elif kind == "evaluate":
-            rep = reports.get(symbol)
-            if not rep:
-                print(f"⚠️ No report found for {symbol} during evaluation")
-                continue
-            score, suggestions = evalopt.score(rep.markdown, symbol, rep.sections.get("stats", {}))
-            improved = evalopt.optimize(rep.markdown, suggestions)
-            rep.markdown = improved
-            evalopt.remember(symbol, score)
-            print(f"🧠 Evaluation complete for {symbol} (score={score:.2f})")
+                # The plan is expanded a window of symbols at a time as tasks finish
+                executor = Executor(self.cfg)
+                executor.run(dag, execute, specs, execute_batch, on_expand=store.add, on_skip=store.release,
+                             keep_results=False)
+                self.failed = executor.failed
+        # Summaries whose evaluation produced nothing still get written
+        for rep in list(pending.values()):
+            emit(rep)
+        return reports
+
+    def close(self):
+        self.memory.close()
+
+
+def pipeline(cfg: Dict, rubric: Dict, serial: bool = False,
+             only: List[str] | None = None, quiet: bool = False, trace_prefix: str | None = None,
+             force: bool = False, invalidate: List[str] | None = None,
+             sinks: List[ReportSink] | None = None, keep_reports: bool = True):
+    set_quiet(quiet)
+    tracer = Tracer.from_config(cfg, trace_prefix)
+    trace.set_tracer(tracer)
+
+    print("🚀 Starting Multi-Agent Financial Analysis System...")
+    session = Session(cfg, rubric, only, force, invalidate)
+    dag, market, memo = session.dag, session.market, session.memo
+    print(f"✅ Planned {len(dag)} tasks.")
+    print("First few task IDs:", [t.id for t in itertools.islice(dag, 10)])
+
+    out = open_sinks(cfg, sinks)
+    reports = session.execute(dag, out, serial=serial, keep_reports=keep_reports)
+    session.close()
+    out.close()
+
+    # Same ordering regardless of completion order
+    tickers = cfg.get("universe", {}).get("tickers", [])
+    reports = {sym: reports[sym] for sym in tickers if sym in reports}
+
+    if market.price_cache is not None:
+        c = market.price_cache.stats
+        print(f"💾 Price cache: {c['hits']} hits, {c['refreshes']} tail refreshes, "
+              f"{c['misses']} misses, {c['corrupt']} corrupt ({market.price_cache.hit_rate():.0%} hit rate)")
+
+    if session.failed:
+        print(f"❌ {len(session.failed)} tasks failed or were skipped after a failure")
+
+    if memo is not None:
+        m = memo.stats
+        print(f"♻️ Memo: reused {m['reused']} of {m['reused'] + m['computed']} memoizable tasks")
+
+    if tracer.enabled:
+        for cat, agg in sorted(tracer.summary().items()):
+            print(f"⏱️ {cat}: {agg['count']} spans, {agg['total_ms'] / 1000:.2f}s total")
+        tracer.close()
+        trace.set_tracer(NullTracer())
 
                # === Final reporting ===
-    if not reports:
+    if not out.written:
         print("⚠️ No reports generated — check data availability or ticker symbols.")
     else:
-        print("\n✅ Generated", len(reports), "reports.")
+        print("\n✅ Generated", out.written, "reports.")
         print("\n✅ All tasks completed successfully.")
         return reports
 
 
-if __name__ == "__main__":
-    # Run the main workflow
-    reports = run()
+def plan_only(config_path: str = "config/config.yml", rubric_path: str = "config/rubric.yml",
+              only: List[str] | None = None) -> float:
+    """
+    Print the plan as waves of task kinds with their estimated cost (handler
+    `cost` x task count) and run nothing. Handlers are registered but no
+    provider is built, so the data stack is never imported.
+    """
+    cfg: Dict = load_yaml(config_path)
+    dag = Planner(cfg).plan()
+    if only:
+        dag = dag.subgraph(only)
+    registry, _ = build_registry(cfg, load_yaml(rubric_path), None, dag)
+    specs = registry.resolve(dag, Dispatcher(cfg))
+
+    counts: Counter = Counter()
+    symbols = set()
+    for t in dag:
+        counts[t.kind] += 1
+        symbols.add(t.params.get("symbol"))
+    deps = dag.step_deps()
+    wave: Dict[str, int] = {}
+    chain: Dict[str, float] = {}  # costliest dependency chain ending at each kind
+    kind_graph = DAG([Task(k, k, deps=sorted(ds)) for k, ds in deps.items()])
+    for n, level in enumerate(kind_graph.waves(), 1):
+        for node in level:
+            spec = specs.get(node.kind)
+            wave[node.kind] = n
+            chain[node.kind] = (spec.cost if spec else 0.0) + max((chain[d] for d in node.deps), default=0.0)
+
+    print(f"🗺️ Plan: {len(dag)} tasks over {len(symbols)} symbols")
+    by_class: Dict[str, float] = {}
+    for kind in sorted(counts, key=lambda k: wave[k]):
+        spec = specs.get(kind)
+        cls = spec.exec_class if spec else "skip"
+        cost = spec.cost if spec else 0.0
+        by_class[cls] = by_class.get(cls, 0.0) + cost * counts[kind]
+        after = f"  <- {', '.join(sorted(deps[kind]))}" if deps[kind] else ""
+        print(f"  wave {wave[kind]}  {kind:<10} x{counts[kind]:<7} {cls:<4} "
+              f"cost {cost:>5.2f} each  {cost * counts[kind]:>10.2f}{after}")
+    total = sum(by_class.values())
+    split = ", ".join(f"{c} {v:.2f}" for c, v in sorted(by_class.items()))
+    print(f"📐 Estimated work: {total:.2f} cost units ({split}); "
+          f"longest chain per symbol {max(chain.values(), default=0.0):.2f}")
+    return total
 
-    # ======= Colored Output =======
-    from utils.io import colorize_sentiment, colorize_trend
 
-    for sym, rep in reports.items():
-        print("#" * 40)
-        print(f"📊 Report for {sym}")
-        print("#" * 40)
+def replay_history(config_path: str = "config/config.yml", out: str | None = None) -> Dict:
+    """
+    Replay the sentiment/trend labels over the `replay` period of every
+    universe symbol (served from the price cache when it is enabled) and
+    print their forward-return hit rates, plus the best threshold sets from
+    the configured grid.
+    """
+    import json
+    from agents.market import SENT_THRESH
+    from tools.price_cache import PriceCache
+    from tools.price_providers import get_provider, traced_fetch
+    from workflows.replay import replay, threshold_grid
 
-        lines = rep.markdown.splitlines()
-        for line in lines:
-            # Color sentiment
-            if "Sentiment:" in line:
-                sentiment = line.split("Sentiment:")[-1].strip().strip(".")
-                line = line.replace(sentiment, colorize_sentiment(sentiment))
-            # Add colored trend arrow
-            if "Trend:" in line:
-                trend = line.split("Trend:")[-1].split("|")[0].strip()
-                line = line.replace(trend, colorize_trend(trend))
-            print(line)
+    cfg: Dict = load_yaml(config_path)
+    r = cfg.get("replay", {})
+    tickers = cfg.get("universe", {}).get("tickers", [])
+    period, interval = r.get("period", "5y"), r.get("interval", "1d")
+    provider, cache = get_provider(cfg), PriceCache.from_config(cfg)
+    t0 = time.perf_counter()
+    frames = cache.get(provider, tickers, period, interval) if cache is not None else \
+        traced_fetch(provider, tickers, period, interval)
+    t1 = time.perf_counter()
+    grid = threshold_grid(r["grid"]) if r.get("grid") else None
+    result = replay(frames, SENT_THRESH, grid, r.get("horizons", [5, 20]), int(r.get("lookback", 20)),
+                    float(r.get("min_coverage", 0.0)), int(r.get("top", 5)))
+    t2 = time.perf_counter()
+
+    def pct(v) -> str:
+        return "     -" if v is None else f"{v * 100:5.1f}%"
 
+    print(f"⏪ Replay: {result['bars']} bars over {result['symbols']} symbols ({period} {interval}); "
+          f"load {t1 - t0:.2f}s, replay {t2 - t1:.2f}s")
+    for h, res in result["horizons"].items():
+        print(f"  +{h} bars: SENT_THRESH hit rate {pct(res['hit_rate'])} at {pct(res['coverage'])} coverage")
+        for row in res["sentiment"] + res["trend"]:
+            print(f"    {row['label']:<13} {row['bars']:>9} bars  hit {pct(row['hit_rate'])}  "
+                  f"up {pct(row['up_rate'])}  mean fwd {pct(row['mean_fwd'])}")
+        for b in res.get("best", []):
+            cuts = " ".join(f"{b[k]:+.4f}" for k in ("very_bearish", "bearish", "bullish", "very_bullish"))
+            print(f"    grid [{cuts}]  hit {pct(b['hit_rate'])}  coverage {pct(b['coverage'])}")
+    out = out or r.get("out")
+    if out:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        Path(out).write_text(json.dumps(result, indent=2, default=str), encoding="utf-8")
+        print(f"💾 Replay results written to {out}")
+    return result
 
 
+def watch(config_path: str = "config/config.yml", rubric_path: str = "config/rubric.yml", quiet: bool = False,
+          cycles: int = 0, sinks: List[ReportSink] | None = None, clock=None, provider=None):
+    """
+    Keep one session warm and refresh symbols on their asset-class schedule,
+    re-running only the ones whose prices or news changed. Runs until
+    interrupted, or for `cycles` polling cycles; returns the Watcher, whose
+    `snapshot()` holds the latest reports.
+    """
+    from workflows.watch import Watcher
+    set_quiet(quiet)
+    cfg: Dict = load_yaml(config_path)
+    print("🚀 Starting Multi-Agent Financial Analysis System (watch mode)...")
+    session = Session(cfg, load_yaml(rubric_path), provider=provider)
+    watcher = Watcher(session, cfg, clock=clock, sinks=sinks)
+    counts = Counter(watcher.schedule.asset_class(sym) for sym in session.dag.symbols)
+    classes = sorted(counts.items(), key=lambda kv: kv[0][1])
+    print(f"👀 Watching {len(session.dag.symbols)} symbols: "
+          + ", ".join(f"{n} {name} every {every:g}s" for (name, every), n in classes))
+    try:
+        watcher.run(cycles)
+    except KeyboardInterrupt:
+        print("🛑 Watch stopped")
+    s = watcher.stats
+    print(f"✅ {watcher.cycles} cycles: {s['polled']} polls, {s['changed']} re-runs, {s['unchanged']} unchanged, "
+          f"{s['failed']} failed, {s['errors']} cycle errors")
+    return watcher
+
+
+def run_sharded(config_path: str = "config/config.yml", rubric_path: str = "config/rubric.yml", shards: int = 2,
+                workers: int | None = None, quiet: bool = False, force: bool = False,
+                sinks: List[ReportSink] | None = None, keep_reports: bool = True):
+    """
+    Split the universe into shards, run them in worker processes that pull
+    from a SQLite queue, then merge their reports and memory records.
+    Workers on other hosts can join with `python main.py --worker <queue>`
+    as long as they see the same filesystem.
+    """
+    cfg: Dict = load_yaml(config_path)
+    sh = cfg.get("sharding", {})
+    planner = Planner(cfg)
+    costs = None
+    if sh.get("strategy", "cost") == "cost":
+        dag = planner.plan()
+        registry, _ = build_registry(cfg, load_yaml(rubric_path), None, dag)
+        costs = symbol_costs(dag, registry.resolve(dag, Dispatcher(cfg)))
+    parts = planner.partition(shards, sh.get("strategy", "cost"), costs)
+
+    run_dir = Path(sh.get("dir", ".cache/shards")) / time.strftime(f"%Y%m%d-%H%M%S-{os.getpid()}")
+    queue = ShardQueue(str(run_dir / "queue.db"), sh.get("lease_ttl", 300), sh.get("max_attempts", 3))
+    queue.create(parts, {"ttl": queue.ttl, "max_attempts": queue.max_attempts})
+    workers = min(len(parts), os.cpu_count() or 1) if workers is None else workers
+    print(f"🧩 {len(parts)} shards ({', '.join(str(len(p)) for p in parts)} symbols) in {queue.path}; "
+          f"{workers} local workers")
+
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", str(queue.path),
+           "--config", config_path, "--rubric", rubric_path] + ["--quiet"] * quiet + ["--force"] * force
+    replaced = supervise(queue, lambda: subprocess.Popen(cmd), workers, sh.get("poll", 1.0))
+
+    c = queue.counts()
+    print(f"🧩 Shards: {c['done']} done, {c['failed']} failed, {replaced} workers replaced")
+    for s in queue.shards():
+        if s["state"] != "done":
+            print(f"❌ Shard {s['id']} ({', '.join(s['tickers'])}) {s['state']}: {s['error']}")
+
+    memory = open_memory(cfg)
+    reports = merge(queue, memory, cfg.get("universe", {}).get("tickers", []))
+    memory.close()
+    queue.close()
+    out = open_sinks(cfg, sinks)
+    for rep in reports.values():
+        out.write(rep)
+    out.close()
+
+    if not out.written:
+        print("⚠️ No reports generated — check data availability or ticker symbols.")
+    else:
+        print("\n✅ Generated", out.written, "reports.")
+        return reports if keep_reports else None
+
+
+def work_shards(queue_path: str, config_path: str = "config/config.yml", rubric_path: str = "config/rubric.yml",
+                quiet: bool = False, force: bool = False) -> int:
+    """Worker process: run leased shards until the queue is finished."""
+    cfg: Dict = load_yaml(config_path)
+    rubric: Dict = load_yaml(rubric_path)
+    meta = ShardQueue(queue_path).meta()
+    queue = ShardQueue(queue_path, meta.get("ttl", 300), meta.get("max_attempts", 3))
+
+    def run_shard(shard: Shard) -> Dict[str, str]:
+        # Outputs are per attempt, so a worker presumed dead can't clobber its successor's files
+        base = queue.dir / f"shard-{shard.id}.{shard.attempts}"
+        scfg = copy.deepcopy(cfg)
+        scfg.setdefault("universe", {})["tickers"] = shard.tickers
+        scfg["memory"] = {**cfg.get("memory", {}), "backend": "json", "path": f"{base}.memory.json"}
+        scfg["reports"] = {"sinks": []}  # configured sinks are written once, after the merge
+        pipeline(scfg, rubric, quiet=quiet, force=force, sinks=[JsonlSink(f"{base}.jsonl")], keep_reports=False)
+        return {"reports": f"{base}.jsonl", "memory": f"{base}.memory.json"}
+
+    done = work(queue, run_shard, poll=cfg.get("sharding", {}).get("poll", 1.0))
+    queue.close()
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-Agent Financial Analysis System")
+    parser.add_argument("--config", default="config/config.yml")
+    parser.add_argument("--rubric", default="config/rubric.yml")
+    parser.add_argument("--serial", action="store_true", help="run tasks one at a time in topological order (debug)")
+    parser.add_argument("--only", action="append", metavar="TASK_ID",
+                        help="run only this task and its ancestors, e.g. evaluate:JPM (repeatable)")
+    parser.add_argument("--quiet", action="store_true", help="no per-task progress lines")
+    parser.add_argument("--trace", metavar="PREFIX",
+                        help="write PREFIX.jsonl spans and a PREFIX.chrome.json Chrome/Perfetto trace")
+    parser.add_argument("--force", action="store_true", help="recompute every task, ignoring memoized outputs")
+    parser.add_argument("--invalidate", action="append", metavar="KIND",
+                        help="recompute tasks of this kind, e.g. evaluate (repeatable)")
+    parser.add_argument("--shards", type=int, metavar="N",
+                        help="split the universe into N shards run by worker processes, then merge")
+    parser.add_argument("--workers", type=int, metavar="N", help="local worker processes for --shards (0: none)")
+    parser.add_argument("--worker", metavar="QUEUE", help="join a sharded run as a worker (path to its queue.db)")
+    parser.add_argument("--plan-only", action="store_true",
+                        help="print the planned waves and estimated work, then exit without running anything")
+    parser.add_argument("--replay", nargs="?", const="", metavar="OUT",
+                        help="replay sentiment/trend labels over cached history and report hit rates (optional JSON out)")
+    parser.add_argument("--watch", nargs="?", type=int, const=0, metavar="CYCLES",
+                        help="keep running and refresh changed symbols on the watch schedule (optionally for N cycles)")
+    args = parser.parse_args()
+
+    if args.plan_only:
+        plan_only(args.config, args.rubric, only=args.only)
+    elif args.replay is not None:
+        replay_history(args.config, out=args.replay or None)
+    elif args.watch is not None:
+        watch(args.config, args.rubric, quiet=args.quiet, cycles=args.watch, sinks=[TerminalSink()])
+    elif args.worker:
+        work_shards(args.worker, args.config, args.rubric, quiet=args.quiet, force=args.force)
+    elif args.shards:
+        run_sharded(args.config, args.rubric, args.shards, args.workers, quiet=args.quiet, force=args.force,
+                    sinks=[TerminalSink()], keep_reports=False)
+    else:
+        # Reports print as each one finishes; nothing is held until the end
+        run(args.config, args.rubric, serial=args.serial, only=args.only, quiet=args.quiet,
+            trace_prefix=args.trace, force=args.force, invalidate=args.invalidate,
+            sinks=[TerminalSink()], keep_reports=False)
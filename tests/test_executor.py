@@ -0,0 +1,86 @@
+from __future__ import annotations
+import threading
+import time
+import pytest
+from core.executor import Executor
+from core.graph import DAG
+from core.registry import HandlerSpec
+from core.types import Task
+from utils.io import set_quiet
+
+SYMBOLS = [f"S{i}" for i in range(12)]
+
+
+def plan() -> DAG:
+    return DAG([t for s in SYMBOLS for t in (Task(f"fetch:{s}", "fetch", {"symbol": s}),
+                                             Task(f"score:{s}", "score", {"symbol": s}, [f"fetch:{s}"]))])
+
+
+class Recorder:
+    """Handlers that record how many tasks of each kind are in flight, and can fail one batch."""
+    def __init__(self, fail_on: str = ""):
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+        self.inflight = {"fetch": 0, "score": 0}
+        self.peak = {"fetch": 0, "score": 0}
+        self.batches = []
+
+    def batch(self, tasks):
+        kind = tasks[0].kind
+        with self.lock:
+            self.batches.append([t.id for t in tasks])
+            self.inflight[kind] += len(tasks)
+            self.peak[kind] = max(self.peak[kind], self.inflight[kind])
+        time.sleep(0.01)
+        with self.lock:
+            self.inflight[kind] -= len(tasks)
+        if any(t.id == self.fail_on for t in tasks):
+            raise RuntimeError("upstream down")
+        return [t.id for t in tasks]
+
+    def single(self, task):
+        return self.batch([task])[0]
+
+    def specs(self, size=4):
+        return {kind: HandlerSpec(kind, kind, None, kind, "cpu", batch_fn=lambda *a: None, max_batch=size)
+                for kind in ("fetch", "score")}
+
+
+def executor(**ex) -> Executor:
+    return Executor({"executor": {"io_workers": 4, "compute_workers": 4, **ex}})
+
+
+def test_limits_count_every_task_in_a_batch():
+    rec = Recorder()
+    out = executor(limits={"fetch": 6, "score": 3}).run(plan(), rec.single, rec.specs(), rec.batch)
+    assert sorted(out) == sorted(f"{k}:{s}" for s in SYMBOLS for k in ("fetch", "score"))
+    assert rec.peak["fetch"] <= 6 and rec.peak["score"] <= 3
+    assert max(len(b) for b in rec.batches) == 4  # batches still fill up to max_batch where the limit allows
+
+
+def test_zero_limit_is_rejected():
+    with pytest.raises(ValueError, match="executor.limits.fetch"):
+        executor(limits={"fetch": 0})
+
+
+def test_failing_batch_only_fails_its_own_tasks(capsys):
+    rec = Recorder(fail_on="fetch:S0")
+    ex = executor()
+    out = ex.run(plan(), rec.single, rec.specs(), rec.batch)
+    bad = next(b for b in rec.batches if "fetch:S0" in b)
+    bad_syms = [tid.partition(":")[2] for tid in bad]
+    assert sorted(ex.failed) == sorted(bad + [f"score:{s}" for s in bad_syms])
+    assert all(ex.failed[f"score:{s}"] == f"skipped: fetch:{s} failed" for s in bad_syms)
+    assert sorted(out) == sorted(f"{k}:{s}" for s in SYMBOLS if s not in bad_syms for k in ("fetch", "score"))
+    assert "❌ fetch failed" in capsys.readouterr().out
+
+
+def test_failure_lines_follow_quiet(capsys):
+    set_quiet(True)
+    try:
+        ex = executor()
+        rec = Recorder(fail_on="fetch:S0")
+        ex.run(plan(), rec.single, rec.specs(), rec.batch)
+    finally:
+        set_quiet(False)
+    assert ex.failed and capsys.readouterr().out == ""
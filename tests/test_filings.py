@@ -0,0 +1,123 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import agents.filing
+import tools.edgar
+from agents.filing import FilingAgent
+from tools.edgar import FilingCache, FixtureSource, parse_filing, parse_many
+from conftest import ROOT
+
+FIXTURES = ROOT / "data" / "filings"
+EXPECTED = {
+    "AAPL": {"revenue": 383.285e9, "eps_basic": 6.16, "eps_diluted": 6.13},
+    "JPM": {"revenue": 158.104e9, "eps_basic": 16.25, "eps_diluted": 16.23},
+}
+
+
+class CountingSource(FixtureSource):
+    """FixtureSource that counts lookups and downloads."""
+    def __init__(self, root=FIXTURES):
+        super().__init__(str(root))
+        self.located = self.downloaded = 0
+
+    def locate(self, ticker, form):
+        self.located += 1
+        return super().locate(ticker, form)
+
+    def download(self, url):
+        self.downloaded += 1
+        return super().download(url)
+
+
+def agent(tmp_path, ttl=3600) -> FilingAgent:
+    return FilingAgent({"filings": {"source": "fixture", "fixture_dir": str(FIXTURES),
+                                    "cache_dir": str(tmp_path / "filings"), "ttl": ttl, "workers": 1}})
+
+
+def assert_financials(got, ticker):
+    for key, want in EXPECTED[ticker].items():
+        assert got[key] == pytest.approx(want), key
+
+
+@pytest.mark.parametrize("ticker", sorted(EXPECTED))
+def test_parse_filing(ticker):
+    result = parse_filing((FIXTURES / f"{ticker}.html").read_bytes())
+    assert_financials(result, ticker)
+    assert set(result["sources"].values()) == {"income_statement"}
+
+
+def test_parse_many_in_processes_from_a_worker_thread():
+    docs = {t: (FIXTURES / f"{t}.html").read_bytes() for t in sorted(EXPECTED)}
+    # As in a run: called from an executor thread while other threads are alive
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        parsed = pool.submit(parse_many, docs, 2).result()
+    assert parsed == {t: parse_filing(d) for t, d in docs.items()}
+    for ticker in EXPECTED:
+        assert_financials(parsed[ticker], ticker)
+
+
+def test_collect_through_fixture_source(tmp_path):
+    fa = agent(tmp_path)
+    found = fa.collect(["AAPL", "JPM"])
+    assert list(found) == ["AAPL", "JPM"]
+    for ticker, res in found.items():
+        assert_financials(res, ticker)
+        assert res["form"] == "10-K"
+        assert res["url"].endswith(f"{ticker}.html")
+        assert "parser" not in res
+
+
+def test_collect_reports_missing_fixture(tmp_path):
+    found = agent(tmp_path).collect(["MSFT"])
+    assert "error" in found["MSFT"]
+
+
+def test_cache_reuses_download_and_parse(tmp_path, monkeypatch):
+    fa = agent(tmp_path)
+    fa._source = src = CountingSource()
+    first = fa.collect(["AAPL", "JPM"])
+    assert (src.located, src.downloaded) == (2, 2)
+
+    parses = []
+    monkeypatch.setattr(agents.filing, "parse_many", lambda docs, workers: parses.append(docs) or {})
+    again = agent(tmp_path)  # a new run over the same cache directory
+    again._source = src
+    assert again.collect(["AAPL", "JPM"]) == first
+    assert (src.located, src.downloaded) == (2, 2)  # refs are fresh: the source isn't asked at all
+    assert parses == []
+
+
+def test_cache_ttl_expiry(tmp_path, monkeypatch):
+    cache = FilingCache(str(tmp_path / "filings"), ttl=60)
+    src = CountingSource()
+    now = [1_000_000.0]
+    monkeypatch.setattr(tools.edgar.time, "time", lambda: now[0])
+
+    ref, data = cache.fetch("AAPL", "10-K", src)
+    assert (src.located, src.downloaded) == (1, 1)
+    now[0] += 59
+    assert cache.fetch("AAPL", "10-K", src)[0]["sha"] == ref["sha"]
+    assert (src.located, src.downloaded) == (1, 1)
+
+    # Expired: the source is asked again, but an unchanged accession isn't downloaded
+    now[0] += 2
+    ref2, data2 = cache.fetch("AAPL", "10-K", src)
+    assert (src.located, src.downloaded) == (2, 1)
+    assert (ref2["sha"], data2) == (ref["sha"], data)
+    assert ref2["checked"] == now[0]
+
+
+def test_cache_downloads_new_accession(tmp_path, monkeypatch):
+    root = tmp_path / "fixtures"
+    root.mkdir()
+    doc = root / "AAPL.html"
+    doc.write_bytes((FIXTURES / "AAPL.html").read_bytes())
+    cache = FilingCache(str(tmp_path / "filings"), ttl=0)
+    src = CountingSource(root)
+    first, _ = cache.fetch("AAPL", "10-K", src)
+
+    doc.write_bytes(doc.read_bytes() + b"<p>amended</p>")
+    second, data = cache.fetch("AAPL", "10-K", src)
+    assert src.downloaded == 2
+    assert second["sha"] != first["sha"] and data.endswith(b"<p>amended</p>")
+    assert cache.parsed(second["sha"]) is None
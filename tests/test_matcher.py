@@ -0,0 +1,59 @@
+from __future__ import annotations
+import pandas as pd
+import pytest
+from tools.matcher import DEFAULT_LEXICONS, KeywordMatcher, default_matcher
+from utils.io import load_yaml
+from workflows.prompt_chain import classify, extract, label_all
+from workflows.router import route_frame, route_item
+from conftest import ROOT
+
+# Headlines where keywords overlap, nest or share prefixes
+TRICKY = [
+    "Fed rally stalls after downgrade", "Revenue miss: shares plunge", "Stocks rallying on EPS beat",
+    "Company files 10-K, raises guidance", "Regulators widen probe; lawsuit concerns", "Market record highs",
+    "Supply delay drags on upgrade hopes", "Earnings recall", "", "Nothing to see here", "FALLS DROPS TUMBLES",
+]
+
+
+def loop_labels(text: str, lexicons) -> dict:
+    """The per-keyword loop the matcher replaces: labels in priority order, substring tests."""
+    txt = (text or "").lower()
+    out = {}
+    for lex, labels in lexicons.items():
+        hit = next((label for label, kws in labels.items() if any(k.lower() in txt for k in kws)), None)
+        out[lex] = hit
+    return out
+
+
+@pytest.fixture(scope="module")
+def headlines() -> pd.Series:
+    news = pd.read_csv(ROOT / "data" / "sample_news.csv")
+    return pd.concat([news["title"], pd.Series(TRICKY)], ignore_index=True)
+
+
+@pytest.mark.parametrize("source", ["defaults", "config"])
+def test_trie_regex_matches_the_keyword_loop(headlines, source):
+    cfg = {} if source == "defaults" else load_yaml(str(ROOT / "config" / "config.yml"))
+    matcher = KeywordMatcher.from_config(cfg)
+    frame = matcher.label_frame(headlines)
+    for i, text in headlines.items():
+        want = {lex: label or matcher.defaults[lex] for lex, label in loop_labels(text, matcher.lexicons).items()}
+        assert matcher.label(text) == want, text
+        assert frame.loc[i].to_dict() == want, text
+
+
+def test_labelling_functions_default_to_the_builtin_lexicons(headlines):
+    df = pd.DataFrame({"title": headlines})
+    want = [loop_labels(t, DEFAULT_LEXICONS) for t in headlines]
+    assert list(classify(df)["label"]) == [w["sentiment"] or "neutral" for w in want]
+    assert list(extract(df)["event"]) == [w["event"] or "other" for w in want]
+    assert [route_item({"title": t}) for t in headlines] == [w["route"] or "news_analyzer" for w in want]
+    assert route_frame(df).tolist() == [w["route"] or "news_analyzer" for w in want]
+    assert label_all(df, default_matcher()).equals(label_all(df))
+
+
+def test_a_configured_matcher_is_used_when_passed():
+    matcher = KeywordMatcher.from_config({"lexicons": {"sentiment": {"negative": ["nothing"]}}})
+    df = pd.DataFrame({"title": ["Nothing to see here", "Shares plunge"]})
+    assert list(classify(df, matcher)["label"]) == ["negative", "neutral"]
+    assert route_item({"text": "Fed minutes"}, matcher) == "market_analyzer"
@@ -0,0 +1,44 @@
+from __future__ import annotations
+import pytest
+import main
+from tools.price_providers import FakeProvider
+from utils.io import load_yaml, set_quiet
+from utils.memory import JsonMemory
+from utils.sinks import SnapshotSink
+from conftest import ROOT
+
+TICKERS = ["JPM", "^GSPC", "ES=F"]
+
+
+def run_once(tmp_path, serial):
+    cfg = {
+        "universe": {"tickers": TICKERS},
+        "prices": {"period": "6mo", "interval": "1d", "batch_size": 50, "cache": {"enabled": False}},
+        "news": {"provider": "csv", "csv_path": str(ROOT / "data" / "sample_news.csv")},
+        "filings": {"enabled": False},
+        "memory": {"backend": "json", "path": str(tmp_path / "memory.json")},
+        "memo": {"enabled": True, "dir": str(tmp_path / "memo")},
+        "routing": load_yaml(str(ROOT / "config" / "config.yml"))["routing"],
+    }
+    session = main.Session(cfg, load_yaml(str(ROOT / "config" / "rubric.yml")), provider=FakeProvider())
+    sink = SnapshotSink()
+    session.execute(session.dag, sink, serial=serial)
+    session.close()
+    return session.memo.stats, sink.snapshot()
+
+
+@pytest.mark.parametrize("serial", [True, False], ids=["serial", "executor"])
+def test_reused_evaluations_still_record_scores(tmp_path, serial):
+    set_quiet(True)
+    try:
+        first, cold = run_once(tmp_path, serial)
+        second, warm = run_once(tmp_path, serial)
+    finally:
+        set_quiet(False)
+    assert first["reused"] == 0
+    assert second == {"reused": 2 * len(TICKERS), "computed": 0}  # summarize and evaluate, every symbol
+    memory = JsonMemory(str(tmp_path / "memory.json"))
+    for sym in TICKERS:
+        score = cold[sym].sections["evaluation"]["score"]
+        assert warm[sym].sections["evaluation"]["score"] == score
+        assert [r["score"] for r in memory.history(f"score:{sym}")] == [score, score]
@@ -0,0 +1,102 @@
+from __future__ import annotations
+import time
+import pytest
+from bench.news_stub import StubNewsServer
+from tools.news_async import AsyncNewsFetcher, TokenBucket, FIELDS
+
+
+def fetcher(server: StubNewsServer, **kw) -> AsyncNewsFetcher:
+    opts = {"rate": 0, "retries": 2, "backoff": 0.0, "timeout": 2.0, **kw}
+    return AsyncNewsFetcher(server.url, **opts)
+
+
+@pytest.fixture
+def fetch():
+    """fetch(server, symbols, **fetcher options) -> {symbol: NewsResult}; fetchers are closed afterwards."""
+    opened = []
+
+    def run(server, symbols, max_items=3, **kw):
+        f = fetcher(server, **kw)
+        opened.append(f)
+        return f.fetch_universe(symbols, max_items)
+
+    yield run
+    for f in opened:
+        f.close()
+
+
+def test_ok_empty_and_error(fetch):
+    with StubNewsServer() as server:
+        res = fetch(server, ["AAPL", "EMPTY1", "BROKEN1"], retries=1)
+    ok, empty, broken = res["AAPL"], res["EMPTY1"], res["BROKEN1"]
+    assert (ok.status, ok.attempts, len(ok.items)) == ("ok", 1, 3)
+    assert set(ok.items[0]) == set(FIELDS) and ok.items[0]["title"] == "AAPL headline 0"
+    assert (empty.status, empty.items, empty.ok) == ("empty", [], True)
+    assert (broken.status, broken.error, broken.attempts, broken.ok) == ("error", "HTTP 500", 2, False)
+    assert server.requests["BROKEN1"] == 2
+
+
+def test_client_errors_are_not_retried(fetch):
+    with StubNewsServer(script={"GONE": [404]}) as server:
+        res = fetch(server, ["GONE"])["GONE"]
+    assert res.status == "error" and "404" in res.error
+    assert res.attempts == 1 and server.requests["GONE"] == 1
+
+
+def test_retries_429_and_503_then_succeeds(fetch):
+    with StubNewsServer(script={"FLAKY": [429, 503]}, retry_after="1") as server:
+        res = fetch(server, ["FLAKY", "AAPL"])
+    assert (res["FLAKY"].status, res["FLAKY"].attempts) == ("ok", 3)
+    assert server.requests == {"FLAKY": 3, "AAPL": 1}
+    first, second, third = server.times["FLAKY"]
+    assert second - first >= 0.95  # Retry-After: 1 on the 429
+    assert third - second < 0.5    # the 503 had none; backoff is 0
+
+
+def test_retry_after_is_capped_by_max_backoff(fetch):
+    with StubNewsServer(script={"FLAKY": [429]}, retry_after="30") as server:
+        t0 = time.monotonic()
+        res = fetch(server, ["FLAKY"], max_backoff=0.2)["FLAKY"]
+    assert (res.status, res.attempts) == ("ok", 2)
+    assert time.monotonic() - t0 < 5
+
+
+def test_retries_give_up_after_the_last_attempt(fetch):
+    with StubNewsServer(script={"DOWN": [503] * 5}) as server:
+        res = fetch(server, ["DOWN"], retries=2)["DOWN"]
+    assert (res.status, res.error, res.attempts) == ("error", "HTTP 503", 3)
+    assert server.requests["DOWN"] == 3
+
+
+def test_per_request_timeout(fetch):
+    with StubNewsServer(slow=1.0) as server:
+        t0 = time.monotonic()
+        res = fetch(server, ["SLOW1", "AAPL"], timeout=0.2, retries=1)
+        took = time.monotonic() - t0
+    slow = res["SLOW1"]
+    assert (slow.status, slow.attempts) == ("error", 2)
+    assert "Timeout" in slow.error
+    assert res["AAPL"].status == "ok"
+    assert took < 1.0  # two 0.2s attempts, not the server's 1s answer
+
+
+def test_token_bucket_reserve():
+    bucket = TokenBucket(rate=10, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.02)
+    assert waits[3] == pytest.approx(0.2, abs=0.02)
+    assert TokenBucket(rate=0).reserve() == 0.0
+
+
+def test_rate_limit_spaces_requests(fetch):
+    symbols = [f"S{i}" for i in range(10)]
+    with StubNewsServer() as server:
+        start = time.monotonic()
+        res = fetch(server, symbols, rate=20, burst=2)
+    assert all(r.status == "ok" for r in res.values())
+    # 2 requests go at once, the other 8 wait for tokens at 20/s. Scheduling can only
+    # delay a request, so count against the start rather than between arrivals.
+    since = sorted(t - start for sym in symbols for t in server.times[sym])
+    assert since[-1] >= 8 / 20 * 0.9
+    assert sum(t < 1 / 20 * 0.9 for t in since) <= 2
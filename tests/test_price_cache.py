@@ -0,0 +1,54 @@
+from __future__ import annotations
+import os
+import pandas as pd
+from tools.price_cache import PriceCache
+from tools.price_providers import FakeProvider
+
+
+class CountingProvider(FakeProvider):
+    """FakeProvider recording (period, start) of every fetch."""
+    def __init__(self, end):
+        super().__init__(end)
+        self.calls = []
+
+    def fetch(self, symbols, period="6mo", interval="1d", start=None):
+        self.calls.append((period, start))
+        return super().fetch(symbols, period, interval, start)
+
+
+def expire(cache: PriceCache, symbol: str, interval: str = "1d"):
+    p = cache.path(symbol, interval)
+    old = p.stat().st_mtime - 10 * cache.default_ttl
+    os.utime(p, (old, old))
+
+
+def span_days(df: pd.DataFrame) -> int:
+    return (df.index[-1] - df.index[0]).days
+
+
+def test_long_and_short_periods_share_one_file(tmp_path):
+    provider = CountingProvider(pd.Timestamp.now().normalize())
+    cache = PriceCache(str(tmp_path), default_ttl=3600, fmt="pickle")
+
+    long = cache.get(provider, ["JPM"], "5y")["JPM"]
+    assert provider.calls == [("5y", None)]
+    assert span_days(long) > 5 * 360
+
+    # A hit for a shorter period returns that period only
+    short = cache.get(provider, ["JPM"], "6mo")["JPM"]
+    assert len(provider.calls) == 1
+    assert span_days(short) <= 180 and short.index[-1] == long.index[-1]
+
+    # A tail refresh for the short period leaves the long history on disk
+    provider.end += pd.Timedelta(days=3)
+    expire(cache, "JPM")
+    refreshed = cache.get(provider, ["JPM"], "6mo")["JPM"]
+    assert provider.calls[-1][1] == long.index[-1]
+    assert refreshed.index[-1] > long.index[-1] and span_days(refreshed) <= 180
+    assert span_days(cache.load("JPM", "1d")) > 5 * 360
+
+    # ...so the next long run is served from the cache, not refetched
+    again = cache.get(provider, ["JPM"], "5y")["JPM"]
+    assert len(provider.calls) == 2
+    assert again.index[-1] == refreshed.index[-1] and span_days(again) > 5 * 360
+    assert cache.stats == {"hits": 2, "misses": 1, "refreshes": 1, "corrupt": 0}
@@ -0,0 +1,82 @@
+from __future__ import annotations
+from dataclasses import replace
+import pytest
+from agents.evalopt import EvaluatorOptimizer
+from agents.market import MarketAgent
+from agents.rubric import LEGACY_CHECKS, CompiledRubric
+from core.types import Task
+from tools.price_providers import FakeProvider
+from utils.io import load_yaml, set_quiet
+from conftest import ROOT
+
+RUBRIC = load_yaml(str(ROOT / "config" / "rubric.yml"))
+
+
+def legacy_score(items, report_md, stats):
+    """The per-report if/elif scorer the compiled rubric replaced."""
+    total, weight_sum = 0.0, 0.0
+    for item in items:
+        w = float(item.get("weight", 0.25))
+        cid = item.get("id")
+        weight_sum += w
+        s = 0.7
+        if cid == "coverage":
+            s = 0.9 if all(n in report_md.lower() for n in ["return", "volatility", "trend", "sentiment"]) else 0.5
+        elif cid == "recency":
+            s = 0.9 if stats and stats.get("asof") else 0.6
+        elif cid == "correctness":
+            s = 0.85 if "closed at" in report_md else 0.6
+        elif cid == "actionability":
+            s = 0.75 if "recent headlines" in report_md else 0.6
+        total += s * w
+    return total / (weight_sum or 1.0)
+
+
+@pytest.fixture(scope="module")
+def reports():
+    """Summaries as the market agent writes them, plus variants that miss each check."""
+    set_quiet(True)
+    cfg = {"prices": {"period": "6mo", "interval": "1d", "cache": {"enabled": False}},
+           "news": {"provider": "csv", "csv_path": str(ROOT / "data" / "sample_news.csv")}}
+    agent = MarketAgent(cfg, provider=FakeProvider())
+    out = [agent.handle_summarize(Task(f"summarize:{sym}", "summarize", {"symbol": sym}), {})[0]
+           for sym in ["JPM", "^GSPC", "^IXIC", "ES=F", "NQ=F", "GC=F"]]
+    set_quiet(False)
+    base = out[0]
+    no_asof = {k: v for k, v in base.sections["stats"].items() if k != "asof"}
+    out += [
+        replace(base, sections={**base.sections, "stats": no_asof}),
+        replace(base, markdown=base.markdown.replace("Recent headlines", "Headlines")),
+        replace(base, markdown=base.markdown.replace("closed at", "Closed At").replace("Volatility", "Risk")),
+        replace(base, markdown="### JPM\n\n- No recent price data available.\n", sections={"stats": {"empty": True}}),
+    ]
+    return out
+
+
+def stripped(rubric):
+    """The rubric with its `check:` blocks removed, so every item falls back to LEGACY_CHECKS."""
+    return {**rubric, "rubric": [{k: v for k, v in it.items() if k != "check"} for it in rubric["rubric"]]}
+
+
+@pytest.mark.parametrize("rubric", [RUBRIC, stripped(RUBRIC)], ids=["declared", "legacy"])
+def test_compiled_rubric_matches_the_legacy_scorer(reports, rubric):
+    engine = CompiledRubric.from_rubric(rubric)
+    texts, stats = [r.markdown for r in reports], [r.sections.get("stats", {}) for r in reports]
+    want = [legacy_score(rubric["rubric"], t, st) for t, st in zip(texts, stats)]
+    assert engine.score_batch(texts, stats) == pytest.approx(want, abs=1e-12)
+    assert len(set(want)) > 2  # the variants exercise different checks
+    # A second pass is served from the cache with the same values
+    assert engine.score_batch(texts, stats) == pytest.approx(want, abs=1e-12)
+    assert engine.stats == {"hits": len(texts), "scored": len(texts)}
+
+
+def test_shipped_checks_spell_out_the_legacy_ones():
+    for item in RUBRIC["rubric"]:
+        assert {"type": "keywords", **LEGACY_CHECKS[item["id"]]} == {"type": "keywords", **item["check"]}
+
+
+def test_evaluator_uses_the_rubric_file_settings():
+    evalopt = EvaluatorOptimizer({**RUBRIC, "threshold": 0.95, "suggestion": "More detail."}, memory=None)
+    score, suggestions = evalopt.score("closed at 1.00", "JPM", {"asof": "2025-01-31"})
+    assert score == pytest.approx(legacy_score(RUBRIC["rubric"], "closed at 1.00", {"asof": "2025-01-31"}))
+    assert suggestions == [{"symbol": "JPM", "suggestion": "More detail."}]
@@ -0,0 +1,110 @@
+from __future__ import annotations
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from core.shards import ShardQueue, merge, supervise, worker_id
+from utils.memory import JsonMemory
+from conftest import ROOT
+
+# A worker process: each shard appends one score per symbol to its memory file
+# and writes one report per symbol. The first worker to lease the shard with
+# CRASH in it dies mid-shard (SIGKILL-style, no cleanup) after writing part
+# of its output.
+WORKER = textwrap.dedent("""
+    import json, os, sys
+    from pathlib import Path
+    from core.shards import ShardQueue, work
+    from utils.memory import JsonMemory
+
+    queue = ShardQueue(sys.argv[1], ttl=120)
+    crashed = Path(sys.argv[2])
+
+    def run_shard(shard):
+        base = queue.dir / f"shard-{shard.id}.{shard.attempts}"
+        memory = JsonMemory(f"{base}.memory.json")
+        with open(f"{base}.jsonl", "w", encoding="utf-8") as fh:
+            for sym in shard.tickers:
+                memory.append(f"scores:{sym}", shard.attempts)
+                fh.write(json.dumps({"symbol": sym, "markdown": f"{sym} by {os.getpid()}"}) + "\\n")
+                fh.flush()
+                if sym == "CRASH" and not crashed.exists():
+                    crashed.write_text(str(os.getpid()))
+                    os._exit(9)
+        return {"reports": f"{base}.jsonl", "memory": f"{base}.memory.json"}
+
+    work(queue, run_shard, poll=0.05)
+""")
+
+
+def test_dead_worker_shard_is_released_and_merged_once(tmp_path):
+    shards = [["AAA", "BBB"], ["CRASH", "CCC"], ["DDD"]]
+    queue = ShardQueue(str(tmp_path / "queue.db"), ttl=120, max_attempts=3)
+    queue.create(shards)
+    crashed = tmp_path / "crashed"
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+
+    def spawn():
+        return subprocess.Popen([sys.executable, "-c", WORKER, str(queue.path), str(crashed)],
+                                cwd=str(ROOT), env=env, stdout=subprocess.DEVNULL)
+
+    t0 = time.monotonic()
+    replaced = supervise(queue, spawn, workers=2, poll=0.05)
+    took = time.monotonic() - t0
+
+    assert crashed.exists()
+    assert replaced == 1
+    assert took < 60  # the lease is 120s: the shard was released, not left to expire
+    by_id = {s["id"]: s for s in queue.shards()}
+    assert all(s["state"] == "done" for s in by_id.values())
+    crash = by_id[1]
+    assert crash["attempts"] == 2
+    assert crash["owner"] != worker_id(int(crashed.read_text()))
+    assert crash["result"]["reports"].endswith("shard-1.2.jsonl")
+
+    memory = JsonMemory(str(tmp_path / "merged.json"))
+    reports = merge(queue, memory, [s for shard in shards for s in shard])
+    assert list(reports) == ["AAA", "BBB", "CRASH", "CCC", "DDD"]
+    # Only the second attempt's output is merged: one score per symbol
+    assert memory.history("scores:CRASH") == [2]
+    assert memory.history("scores:CCC") == [2]
+    assert memory.history("scores:AAA") == [1]
+    queue.close()
+
+
+def test_release_only_touches_the_dead_owner(tmp_path):
+    queue = ShardQueue(str(tmp_path / "queue.db"), ttl=120, max_attempts=1)
+    queue.create([["A"], ["B"]])
+    dead, alive = queue.lease("host:1"), queue.lease("host:2")
+    assert queue.release("host:1", "worker died") == [dead.id]
+    states = {s["id"]: (s["state"], s["owner"], s["error"]) for s in queue.shards()}
+    # No attempts left, so the dead worker's shard fails for good; the other lease is untouched
+    assert states[dead.id] == ("failed", None, "worker died")
+    assert states[alive.id] == ("leased", "host:2", None)
+    assert queue.release("host:1", "again") == []
+    queue.close()
+
+
+def test_without_local_workers_waits_for_remote_leases(tmp_path):
+    queue = ShardQueue(str(tmp_path / "queue.db"), ttl=120)
+    queue.create([["A"], ["B"]])
+    remote = ShardQueue(str(queue.path), ttl=120)  # a --worker on another host
+    held = [remote.lease("otherhost:1"), remote.lease("otherhost:1")]
+
+    def spawn():
+        raise AssertionError("--workers 0 must not start local workers")
+
+    out = []
+    supervisor = threading.Thread(target=lambda: out.append(supervise(queue, spawn, 0, poll=0.05)), daemon=True)
+    supervisor.start()
+    remote.complete(held[0], {"reports": "", "memory": ""})
+    supervisor.join(0.5)
+    assert supervisor.is_alive()  # one lease is still open
+    remote.complete(held[1], {"reports": "", "memory": ""})
+    supervisor.join(5)
+    assert not supervisor.is_alive() and out == [0]
+    assert queue.counts()["done"] == 2
+    remote.close()
+    queue.close()
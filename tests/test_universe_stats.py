@@ -0,0 +1,36 @@
+from __future__ import annotations
+import numpy as np
+import pytest
+import tools.universe_stats
+from core.memo import content_hash
+from tools.price_providers import FakeProvider
+from tools.prices import Projection, add_indicators, quick_stats
+from tools.universe_stats import universe_stats
+
+
+@pytest.fixture(scope="module")
+def raw():
+    syms = [f"S{i}" for i in range(40)] + ["ES=F"]
+    frames = FakeProvider().fetch(syms, "1y", "1d")
+    rng = np.random.default_rng(1)
+    # Every other symbol misses a few bars, so the aligned matrix has gaps
+    frames = {s: df.drop(df.index[rng.choice(len(df), 10, replace=False)]) if i % 2 else df
+              for i, (s, df) in enumerate(frames.items())}
+    frames["SHORT"] = frames["S0"].tail(8)
+    return frames
+
+
+@pytest.mark.parametrize("projection", [None, Projection(["Close", "Vol_20"]),
+                                        Projection(["Close", "Vol_20"], "float32"), Projection(["Close"])],
+                         ids=["all", "vol", "float32", "close-only"])
+def test_batch_stats_hash_like_quick_stats(raw, projection, monkeypatch):
+    frames = {s: add_indicators(df, projection) for s, df in raw.items()}
+    panel_indicators = []
+    compute_panel = tools.universe_stats.compute_panel
+    monkeypatch.setattr(tools.universe_stats, "compute_panel",
+                        lambda closes, ind, th=None: panel_indicators.append(list(ind)) or compute_panel(closes, ind, th))
+    batch = universe_stats(frames)
+    # vol_20 comes from the frames' Vol_20 column and is never computed in the panel
+    assert panel_indicators == [["ret_5d", "ret_20d", "trend"]]
+    for sym, df in frames.items():
+        assert content_hash(batch[sym]) == content_hash(quick_stats(df)), sym
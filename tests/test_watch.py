@@ -0,0 +1,163 @@
+from __future__ import annotations
+import pandas as pd
+import pytest
+import main
+from core.types import Report
+from tools.price_providers import FakeProvider
+from utils.io import load_yaml, set_quiet
+from utils.sinks import ReportSink
+from workflows.watch import FakeClock, Schedule, Watcher
+from conftest import ROOT
+
+FUTURES, INDEX, EQUITY = ["ES=F", "NQ=F"], ["^GSPC"], ["JPM", "AAPL"]
+UNIVERSE = EQUITY + INDEX + FUTURES
+
+
+class RecordingProvider(FakeProvider):
+    """FakeProvider that records the symbols of every fetch and can be told to fail."""
+    def __init__(self):
+        super().__init__(end="2025-01-31")  # a Friday: +3 days brings a new bar
+        self.fetched = []
+        self.fail = False
+
+    def fetch(self, symbols, period="6mo", interval="1d", start=None):
+        self.fetched.extend(symbols)
+        if self.fail:
+            raise ConnectionError("provider down")
+        return super().fetch(symbols, period, interval, start)
+
+    def take(self):
+        got, self.fetched = sorted(self.fetched), []
+        return got
+
+
+class ListSink(ReportSink):
+    def __init__(self):
+        self.written = []
+
+    def write(self, rep: Report):
+        self.written.append(rep.symbol)
+
+    def take(self):
+        got, self.written = sorted(self.written), []
+        return got
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    set_quiet(True)
+    cfg = {
+        "universe": {"tickers": UNIVERSE},
+        "prices": {"period": "6mo", "interval": "1d", "provider": "fake", "batch_size": 50,
+                   "cache": {"enabled": True, "dir": str(tmp_path / "prices"), "format": "pickle"}},
+        "news": {"provider": "csv", "csv_path": str(ROOT / "data" / "sample_news.csv")},
+        "filings": {"enabled": False},
+        "memory": {"backend": "json", "path": str(tmp_path / "memory.json")},
+        "memo": {"enabled": False},
+        "routing": load_yaml(str(ROOT / "config" / "config.yml"))["routing"],
+        "watch": {"poll": ["prices", "news"],
+                  "classes": {"futures": {"match": "=F$", "every": 300}, "index": {"match": r"^\^", "every": 900},
+                              "equity": {"every": 3600}}},
+    }
+    provider, sink = RecordingProvider(), ListSink()
+    session = main.Session(cfg, load_yaml(str(ROOT / "config" / "rubric.yml")), provider=provider)
+    w = Watcher(session, cfg, clock=FakeClock(), sinks=[sink])
+    w.provider, w.sink = provider, sink
+    yield w
+    w.close()
+    set_quiet(False)
+
+
+def test_schedule_assigns_asset_classes():
+    s = Schedule()
+    assert [s.asset_class(sym) for sym in ("ES=F", "^GSPC", "JPM")] == [("futures", 300.0), ("index", 900.0),
+                                                                        ("equity", 3600.0)]
+    s.mark(["ES=F", "^GSPC", "JPM"], 0)
+    assert s.due(["ES=F", "^GSPC", "JPM"], 299) == []
+    assert s.due(["ES=F", "^GSPC", "JPM"], 900) == ["ES=F", "^GSPC"]
+    assert s.next_due(["ES=F", "JPM"], 100) == 200
+
+
+def test_polls_per_asset_class_and_reruns_only_changed(watcher):
+    clock, provider, sink = watcher.clock, watcher.provider, watcher.sink
+    assert sorted(watcher.cycle()) == sorted(UNIVERSE)
+    assert provider.take() == sorted(UNIVERSE)
+    assert sink.take() == sorted(UNIVERSE)
+
+    clock.advance(300)  # futures due, no new bars
+    assert watcher.cycle() == []
+    assert provider.take() == sorted(FUTURES)
+    assert sink.take() == []
+
+    provider.end += pd.Timedelta(days=3)
+    clock.advance(600)  # futures and the index due; both have a new bar
+    assert sorted(watcher.cycle()) == sorted(FUTURES + INDEX)
+    assert provider.take() == sorted(FUTURES + INDEX)
+    assert sink.take() == sorted(FUTURES + INDEX)
+
+    clock.advance(2700)  # everything due; only the equities have not seen the new bar yet
+    assert sorted(watcher.cycle()) == sorted(EQUITY)
+    assert provider.take() == sorted(UNIVERSE)
+    assert sink.take() == sorted(EQUITY)
+
+    clock.advance(3600)  # everything due, nothing new
+    assert watcher.cycle() == []
+    assert provider.take() == sorted(UNIVERSE)
+    assert sorted(watcher.snapshot()) == sorted(UNIVERSE)
+    assert watcher.stats == {"polled": 20, "changed": 10, "unchanged": 10, "failed": 0, "errors": 0}
+
+
+def test_failed_poll_keeps_fingerprints_and_retries(watcher):
+    clock, provider, sink = watcher.clock, watcher.provider, watcher.sink
+    watcher.cycle()
+    sink.take()
+    before = dict(watcher.fingerprints)
+
+    provider.fail = True
+    clock.advance(300)
+    assert watcher.cycle() == []  # no exception escapes the cycle
+    assert watcher.fingerprints == before
+    assert watcher.stats["failed"] == len(FUTURES)
+
+    provider.fail = False
+    provider.end += pd.Timedelta(days=3)
+    clock.advance(300)
+    assert sorted(watcher.cycle()) == sorted(FUTURES)
+    assert sink.take() == sorted(FUTURES)
+
+
+def test_failed_rerun_is_retried_next_time_due(watcher, monkeypatch):
+    clock, sink = watcher.clock, watcher.sink
+    spec = watcher.session.specs["summarize"]
+
+    def broken(*args):
+        raise RuntimeError("summarizer down")
+
+    monkeypatch.setattr(spec, "fn", broken)
+    monkeypatch.setattr(spec, "batch_fn", broken)
+    assert sorted(watcher.cycle()) == sorted(UNIVERSE)
+    assert sink.take() == []
+    assert watcher.fingerprints == {}
+    assert watcher.stats["failed"] == len(UNIVERSE)
+
+    monkeypatch.undo()
+    clock.advance(300)  # nothing changed upstream, but the futures never got a report
+    assert sorted(watcher.cycle()) == sorted(FUTURES)
+    assert sink.take() == sorted(FUTURES)
+
+
+def test_run_survives_a_failing_cycle(watcher, monkeypatch):
+    calls = []
+    poll = watcher.poll
+
+    def flaky(symbols):
+        calls.append(len(symbols))
+        if len(calls) == 2:
+            raise RuntimeError("boom")
+        return poll(symbols)
+
+    monkeypatch.setattr(watcher, "poll", flaky)
+    watcher.run(cycles=3)
+    assert calls == [len(UNIVERSE), len(FUTURES), len(FUTURES)]
+    assert watcher.cycles == 3 and watcher.stats["errors"] == 1
+    assert watcher.clock.now() == 600  # slept to each next due time
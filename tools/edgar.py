@@ -1,42 +1,378 @@
 # tools/edgar.py
 from __future__ import annotations
-import re, requests
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
 
-FALLBACK = Path(__file__).resolve().parents[1] / "data" / "aapl_10k_sample.html"
-FALLBACK.parent.mkdir(parents=True, exist_ok=True)
-if not FALLBACK.exists():
-    FALLBACK.write_text(
-        "<html><body>"
-        "<p>Net sales (revenue): $383,285 million</p>"
-        "<p>Basic earnings per share (EPS): $6.13</p>"
-        "<p>Diluted earnings per share (EPS): $6.05</p>"
-        "</body></html>"
-    )
-
-def fetch_10k_html(ticker: str) -> str:
+PARSER_VERSION = 1
+CHUNK = 1 << 20  # characters fed to the HTML parser at a time
+
+SEC_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+SEC_SUBMISSIONS_URL = "https://data.sec.gov/submissions/CIK{cik:010d}.json"
+SEC_ARCHIVE_URL = "https://www.sec.gov/Archives/edgar/data/{cik}/{accession}/{document}"
+
+
+# ---------------------------------------------------------------- sources
+
+class SecSource:
+    """Latest filing of a form for a ticker, via the SEC submissions API."""
+    def __init__(self, user_agent: str = "edu project (email@example.com)", timeout: float = 10.0,
+                 min_interval: float = 0.11):
+        self.headers = {"User-Agent": user_agent}
+        self.timeout = timeout
+        self.min_interval = min_interval  # SEC asks for at most 10 requests per second
+        self._ciks: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+        self._last = 0.0
+
+    def _get(self, url: str):
+        import requests
+        with self._lock:
+            pause = self._last + self.min_interval - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            self._last = time.monotonic()
+        r = requests.get(url, headers=self.headers, timeout=self.timeout)
+        r.raise_for_status()
+        return r
+
+    def cik(self, ticker: str) -> int:
+        if self._ciks is None:
+            rows = self._get(SEC_TICKERS_URL).json().values()
+            self._ciks = {row["ticker"].upper(): int(row["cik_str"]) for row in rows}
+        try:
+            return self._ciks[ticker.upper()]
+        except KeyError:
+            raise LookupError(f"no CIK for {ticker}") from None
+
+    def locate(self, ticker: str, form: str) -> Tuple[str, str]:
+        """(document URL, accession number) of the most recent `form` filing."""
+        cik = self.cik(ticker)
+        recent = self._get(SEC_SUBMISSIONS_URL.format(cik=cik)).json()["filings"]["recent"]
+        for f, acc, doc in zip(recent["form"], recent["accessionNumber"], recent["primaryDocument"]):
+            if f == form:
+                return SEC_ARCHIVE_URL.format(cik=cik, accession=acc.replace("-", ""), document=doc), acc
+        raise LookupError(f"no {form} filing for {ticker}")
+
+    def download(self, url: str) -> bytes:
+        return self._get(url).content
+
+
+class FixtureSource:
+    """Local filings: <root>/<TICKER>.html (or .htm). Used offline and in tests."""
+    def __init__(self, root: str = "data/filings"):
+        self.root = Path(root)
+
+    def locate(self, ticker: str, form: str) -> Tuple[str, str]:
+        for ext in ("html", "htm"):
+            p = self.root / f"{ticker.upper()}.{ext}"
+            if p.exists():
+                st = p.stat()
+                return str(p), f"{st.st_mtime_ns}-{st.st_size}"
+        raise LookupError(f"no {form} fixture for {ticker} in {self.root}")
+
+    def download(self, url: str) -> bytes:
+        return Path(url).read_bytes()
+
+
+def get_filing_source(cfg: Dict[str, Any]):
+    f = cfg.get("filings", {})
+    if f.get("source", "sec") == "fixture":
+        return FixtureSource(f.get("fixture_dir", "data/filings"))
+    return SecSource(f.get("user_agent", "edu project (email@example.com)"), f.get("timeout", 10))
+
+
+# ---------------------------------------------------------------- cache
+
+class FilingCache:
+    """
+    Content-addressed filing store. Documents live under objects/<sha256>.html;
+    refs/<ticker>__<form>.json points a ticker at its latest document, and
+    parsed/<sha256>.json keeps extraction results so an unchanged filing is
+    neither downloaded nor parsed twice.
+    """
+    def __init__(self, root: str = ".cache/filings", ttl: int = 7 * 86400):
+        self.root = Path(root)
+        for d in ("objects", "refs", "parsed"):
+            (self.root / d).mkdir(parents=True, exist_ok=True)
+        self.ttl = int(ttl)
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "FilingCache":
+        f = cfg.get("filings", {})
+        return cls(f.get("cache_dir", ".cache/filings"), f.get("ttl", 7 * 86400))
+
+    @staticmethod
+    def _write(p: Path, data: bytes):
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, p)
+
+    def _ref_path(self, ticker: str, form: str) -> Path:
+        return self.root / "refs" / f"{quote(ticker.upper(), safe='')}__{quote(form, safe='')}.json"
+
+    def object_path(self, sha: str) -> Path:
+        return self.root / "objects" / f"{sha}.html"
+
+    def put(self, data: bytes) -> str:
+        sha = hashlib.sha256(data).hexdigest()
+        p = self.object_path(sha)
+        if not p.exists():
+            self._write(p, data)
+        return sha
+
+    def fetch(self, ticker: str, form: str, source) -> Tuple[Dict[str, Any], bytes]:
+        """(ref, document bytes) for a ticker's latest filing, downloading only when it changed."""
+        rp = self._ref_path(ticker, form)
+        ref = json.loads(rp.read_text(encoding="utf-8")) if rp.exists() else None
+        if ref and time.time() - ref["checked"] < self.ttl and self.object_path(ref["sha"]).exists():
+            return ref, self.object_path(ref["sha"]).read_bytes()
+
+        url, accession = source.locate(ticker, form)
+        if not (ref and ref["accession"] == accession and self.object_path(ref["sha"]).exists()):
+            ref = {"ticker": ticker, "form": form, "url": url, "accession": accession,
+                   "sha": self.put(source.download(url))}
+        ref["checked"] = time.time()
+        self._write(rp, json.dumps(ref).encode())
+        return ref, self.object_path(ref["sha"]).read_bytes()
+
+    def parsed(self, sha: str) -> Optional[Dict[str, Any]]:
+        p = self.root / "parsed" / f"{sha}.json"
+        try:
+            doc = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return doc if doc.get("parser") == PARSER_VERSION else None
+
+    def save_parsed(self, sha: str, result: Dict[str, Any]):
+        self._write(self.root / "parsed" / f"{sha}.json",
+                    json.dumps({**result, "parser": PARSER_VERSION}).encode())
+
+
+# ---------------------------------------------------------------- HTML -> text
+
+BLOCK_TAGS = {"p", "div", "br", "tr", "li", "table", "h1", "h2", "h3", "h4", "h5", "h6", "section", "title"}
+CELL_TAGS = {"td", "th"}
+SKIP_TAGS = {"script", "style", "head", "ix:header"}
+_WS = re.compile(r"\s+")
+
+
+class FilingText(HTMLParser):
+    """
+    Streaming HTML-to-lines pass: one line per block element, table cells
+    joined with ' | ', hidden/script content dropped. Feed it in chunks.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines: List[str] = []
+        self._buf: List[str] = []
+        self._skip = 0
+
+    def _flush(self):
+        if self._buf:
+            line = _WS.sub(" ", "".join(self._buf)).strip(" |")
+            if line:
+                self.lines.append(line)
+            self._buf = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag in BLOCK_TAGS:
+            self._flush()
+        elif tag in CELL_TAGS and self._buf:
+            self._buf.append(" | ")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._buf.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def html_lines(html: str | bytes) -> List[str]:
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    p = FilingText()
+    for i in range(0, len(html), CHUNK):
+        p.feed(html[i:i + CHUNK])
+    p.close()
+    return p.lines
+
+
+# ---------------------------------------------------------------- sections
+
+# Searched in this order; a table-of-contents hit has no numbers and is skipped.
+SECTIONS = [
+    ("income_statement", re.compile(r"^consolidated statements? of (?:operations|income|earnings)\b", re.I)),
+    ("financial_statements", re.compile(r"^item\s*8\.?\s*[-–—:]?\s*financial statements", re.I)),
+    ("mdna", re.compile(r"^item\s*7\.?\s*[-–—:]?\s*management", re.I)),
+]
+SECTION_END = re.compile(r"^(?:item\s*\d+[a-c]?\b|consolidated (?:balance sheets?|statements? of))", re.I)
+MAX_HEADING = 160
+
+
+def locate_sections(lines: List[str]) -> List[Tuple[str, List[str]]]:
+    """[(section name, lines)] in priority order, each running to the next heading."""
+    found: Dict[str, List[List[str]]] = {name: [] for name, _ in SECTIONS}
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        name = None
+        if len(line) <= MAX_HEADING:
+            name = next((n for n, rx in SECTIONS if rx.match(line)), None)
+        if name is None:
+            i += 1
+            continue
+        j = i + 1
+        while j < len(lines) and not (len(lines[j]) <= MAX_HEADING and SECTION_END.match(lines[j])):
+            j += 1
+        found[name].append(lines[i:j])
+        i = j
+    return [(name, body) for name, _ in SECTIONS for body in found[name]]
+
+
+# ---------------------------------------------------------------- extractors
+
+REVENUE_LABEL = re.compile(r"^(?:total\s+)?(?:net\s+sales|net\s+revenues?|revenues?,?\s+net|revenues?)\b", re.I)
+EPS_BASIC = re.compile(r"\bbasic\b", re.I)
+EPS_DILUTED = re.compile(r"\bdiluted\b", re.I)
+PER_SHARE = re.compile(r"per (?:common )?share", re.I)
+NUMBER = re.compile(r"(\()?\$?\s*(\d[\d,]*(?:\.\d+)?)\s*(\))?\s*(thousand|million|billion)?", re.I)
+SCALE = re.compile(r"in (thousands|millions|billions)", re.I)
+UNITS = {"thousand": 1e3, "million": 1e6, "billion": 1e9}
+
+
+def _number(line: str, start: int = 0) -> Optional[Tuple[float, str]]:
+    m = NUMBER.search(line, start)
+    if not m:
+        return None
+    val = float(m.group(2).replace(",", ""))
+    if m.group(1) and m.group(3):
+        val = -val
+    return val, (m.group(4) or "").lower()
+
+
+def extract_financials(lines: List[str]) -> Dict[str, Optional[float]]:
+    """Revenue (in dollars) and basic/diluted EPS from a block of lines."""
+    out: Dict[str, Optional[float]] = {"revenue": None, "eps_basic": None, "eps_diluted": None}
+    scale = 1.0
+    per_share_ctx = 0
+    for line in lines:
+        m = SCALE.search(line)
+        if m:
+            scale = UNITS[m.group(1).lower().rstrip("s")]
+        if PER_SHARE.search(line):
+            per_share_ctx = 3  # "Earnings per share:" headers label the next few rows
+        elif per_share_ctx:
+            per_share_ctx -= 1
+
+        if out["revenue"] is None:
+            m = REVENUE_LABEL.match(line)
+            num = _number(line, m.end()) if m else None
+            if num:
+                val, unit = num
+                out["revenue"] = val * (UNITS[unit] if unit else scale)
+
+        for key, rx in (("eps_basic", EPS_BASIC), ("eps_diluted", EPS_DILUTED)):
+            if out[key] is None and rx.search(line) and (per_share_ctx or PER_SHARE.search(line)):
+                m = rx.search(line)
+                tail = PER_SHARE.search(line, m.end())
+                num = _number(line, tail.end() if tail else m.end())
+                if num:
+                    out[key] = num[0]
+    return out
+
+
+# Raw-HTML hint for the income statement heading; only the text after it is
+# parsed first, and the whole document only when that doesn't find everything.
+STATEMENT_HINT = re.compile(r"consolidated\s+statements?\s+of\s+(?:operations|income|earnings)", re.I)
+WINDOW = 256 * 1024
+MAX_WINDOWS = 8
+
+
+def _windows(html: str) -> List[str]:
+    spans: List[List[int]] = []
+    for m in STATEMENT_HINT.finditer(html):
+        start = html.rfind("<", 0, m.start())
+        start, end = max(start, 0), m.start() + WINDOW
+        if spans and start <= spans[-1][1]:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+        if len(spans) >= MAX_WINDOWS:
+            break
+    return [html[a:b] for a, b in spans]
+
+
+def _extract(lines: List[str], result: Dict[str, Any]) -> bool:
+    for name, body in locate_sections(lines) + [("full_text", lines)]:
+        for key, val in extract_financials(body).items():
+            if result[key] is None and val is not None:
+                result[key] = val
+                result["sources"][key] = name
+        if all(result[k] is not None for k in ("revenue", "eps_basic", "eps_diluted")):
+            return True
+    return False
+
+
+def parse_filing(html: str | bytes) -> Dict[str, Any]:
+    """Extract financials, looking in the financial-statement sections before the full text."""
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    result: Dict[str, Any] = {"revenue": None, "eps_basic": None, "eps_diluted": None, "sources": {}}
+    windows = _windows(html)
+    if windows:
+        found = {"revenue": None, "eps_basic": None, "eps_diluted": None, "sources": {}}
+        lines = [line for w in windows for line in html_lines(w)]
+        # Only trust the fast path when it came from an actual statement section
+        if _extract(lines, found) and set(found["sources"].values()) <= {"income_statement", "financial_statements"}:
+            return found
+    _extract(html_lines(html), result)
+    return result
+
+
+def parse_many(docs: Dict[str, bytes], workers: int = 4) -> Dict[str, Dict[str, Any]]:
+    """
+    parse_filing for many tickers; uses a process pool when there's more than
+    one document. Callers run on executor threads, so the pool spawns fresh
+    interpreters rather than forking a process that has other threads running.
+    """
+    if workers <= 1 or len(docs) <= 1:
+        return {t: parse_filing(d) for t, d in docs.items()}
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(docs)), mp_context=ctx) as pool:
+        return dict(zip(docs, pool.map(parse_filing, docs.values())))
+
+
+# ---------------------------------------------------------------- legacy helpers
+
+def fetch_10k_html(ticker: str, cache: Optional[FilingCache] = None, source=None) -> str:
+    """Latest 10-K document for a ticker (empty string if it can't be fetched)."""
     try:
-        # demo: hardcode AAPL 10-K html; replace with SEC APIs later
-        url = "https://www.sec.gov/Archives/edgar/data/0000320193/000032019323000106/aapl-20230930.htm" if ticker=="AAPL" else None
-        if not url: raise RuntimeError("no demo url")
-        headers = {"User-Agent": "edu project (email@example.com)"}
-        return requests.get(url, headers=headers, timeout=10).text
+        _, data = (cache or FilingCache()).fetch(ticker, "10-K", source or SecSource())
     except Exception:
-        return FALLBACK.read_text()
+        return ""
+    return data.decode("utf-8", errors="replace")
+
 
 def extract_eps_revenue(html: str) -> dict:
-    # simple demo regex, OK for grading
-    rev = None
-    m = re.search(r"(Net sales|Revenue)[^$]*\$\s?([\d,]+\.?\d*)\s*(million|billion)?", html, re.I)
-    if m:
-        val = float(m.group(2).replace(",",""))
-        unit = (m.group(3) or "").lower()
-        if "billion" in unit: val *= 1_000_000_000
-        elif "million" in unit: val *= 1_000_000
-        rev = val
-    def grab(label):
-        r = re.search(fr"{label}.*?\$?\s?([\d]+\.?[\d]*)", html, re.I|re.S)
-        return float(r.group(1)) if r else None
-    return {"revenue": rev,
-            "eps_basic": grab("Basic earnings per share"),
-            "eps_diluted": grab("Diluted earnings per share")}
\ No newline at end of file
+    r = parse_filing(html)
+    return {"revenue": r["revenue"], "eps_basic": r["eps_basic"], "eps_diluted": r["eps_diluted"]}
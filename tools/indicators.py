@@ -0,0 +1,185 @@
+from __future__ import annotations
+import copy
+import math
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+
+WINDOWS = (5, 20, 50)
+ANNUALIZE = math.sqrt(252)
+
+
+class RollingWindow:
+    """Fixed-size window with O(1) running mean and sliding Welford variance."""
+    __slots__ = ("w", "buf", "pos", "n", "mean", "m2", "pushes", "resync_every")
+
+    def __init__(self, w: int, resync_every: int = 10_000):
+        self.w = w
+        self.buf = [0.0] * w
+        self.pos = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.pushes = 0
+        self.resync_every = resync_every
+
+    def push(self, x: float):
+        if self.n < self.w:
+            self.n += 1
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (x - self.mean)
+        else:
+            old = self.buf[self.pos]
+            new_mean = self.mean + (x - old) / self.w
+            self.m2 += (x - old) * (x - new_mean + old - self.mean)
+            self.mean = new_mean
+        self.buf[self.pos] = x
+        self.pos = (self.pos + 1) % self.w
+        self.pushes += 1
+        if self.pushes % self.resync_every == 0 and self.n == self.w:
+            # Re-derive from the buffer so rounding error can't accumulate forever
+            self.mean = math.fsum(self.buf) / self.w
+            self.m2 = math.fsum((v - self.mean) ** 2 for v in self.buf)
+
+    @property
+    def full(self) -> bool:
+        return self.n == self.w
+
+    def std(self) -> float:
+        return math.sqrt(max(self.m2, 0.0) / (self.w - 1)) if self.full and self.w > 1 else math.nan
+
+
+class SymbolState:
+    """Everything needed to continue one symbol's indicators from its last bar."""
+    __slots__ = ("last_ts", "last_close", "closes", "rets", "prev", "derived")
+
+    def __init__(self, windows: Tuple[int, ...], resync_every: int):
+        self.last_ts: Optional[pd.Timestamp] = None
+        self.last_close: Optional[float] = None
+        self.closes = {w: RollingWindow(w, resync_every) for w in windows}
+        self.rets = {w: RollingWindow(w, resync_every) for w in windows}
+        self.prev: Optional["SymbolState"] = None    # state before the last bar, for partial-bar rewinds
+        self.derived: Optional[pd.DataFrame] = None  # indicator columns for bars already processed
+
+    def push(self, ts: pd.Timestamp, close: float) -> List[float]:
+        ret = close / self.last_close - 1 if self.last_close is not None else math.nan
+        row = [ret]
+        for w in self.closes:
+            cw = self.closes[w]
+            cw.push(close)
+            if not math.isnan(ret):
+                self.rets[w].push(ret)
+            row.append(cw.mean if cw.full else math.nan)
+            row.append(self.rets[w].std() * ANNUALIZE)
+        self.last_ts, self.last_close = ts, close
+        return row
+
+
+class IndicatorEngine:
+    """
+    Stateful SMA/Vol engine. Each new bar updates every window in O(1), and
+    per-symbol state is persisted so the next run only processes bars it
+    hasn't seen. Output columns match tools.prices.add_indicators.
+    """
+    def __init__(self, root: str = ".cache/indicators", windows: Tuple[int, ...] = WINDOWS,
+                 resync_every: int = 10_000):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.windows = tuple(int(w) for w in windows)
+        self.resync_every = resync_every
+        self.columns = ["Return"] + [c for w in self.windows for c in (f"SMA_{w}", f"Vol_{w}")]
+        self.stats: Dict[str, int] = {"bars": 0, "resumed": 0, "rebuilt": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["IndicatorEngine"]:
+        s = cfg.get("prices", {}).get("streaming") or {}
+        if not s.get("enabled", False):
+            return None
+        return cls(s.get("dir", ".cache/indicators"), tuple(s.get("windows", WINDOWS)))
+
+    def _path(self, symbol: str, interval: str) -> Path:
+        return self.root / f"{quote(symbol, safe='')}__{interval}.state"
+
+    def load(self, symbol: str, interval: str) -> Optional[SymbolState]:
+        p = self._path(symbol, interval)
+        try:
+            with p.open("rb") as f:
+                st = pickle.load(f)
+            return st if isinstance(st, SymbolState) and tuple(st.closes) == self.windows else None
+        except FileNotFoundError:
+            return None
+        except Exception:
+            p.unlink(missing_ok=True)
+            return None
+
+    def save(self, symbol: str, interval: str, st: SymbolState):
+        p = self._path(symbol, interval)
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp.open("wb") as f:
+            pickle.dump(st, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, p)
+
+    def _resume_at(self, st: Optional[SymbolState], index: pd.DatetimeIndex,
+                   closes: np.ndarray) -> Tuple[Optional[SymbolState], int]:
+        """Find where `st` left off in this frame; rewind one bar if the last one was revised."""
+        if st is None or st.derived is None:
+            return None, 0
+        if st.prev is not None:
+            st.prev.derived = st.derived.iloc[:-1]
+        for cand in (st, st.prev):
+            if cand is None or cand.last_ts is None:
+                continue
+            pos = index.searchsorted(cand.last_ts)
+            if pos < len(index) and index[pos] == cand.last_ts and closes[pos] == cand.last_close \
+                    and (cand.derived.empty or cand.derived.index[0] <= index[0]):
+                return cand, pos + 1
+        return None, 0
+
+    def apply(self, symbol: str, interval: str, raw: pd.DataFrame) -> pd.DataFrame:
+        """Return `raw` with Return/SMA_w/Vol_w columns, computing only unseen bars."""
+        if raw is None or raw.empty:
+            return pd.DataFrame()
+        raw = raw.rename(columns=str.title)
+        if "Date" in raw.columns:
+            raw = raw.set_index("Date")
+        index = pd.DatetimeIndex(raw.index)
+        closes = raw["Close"].to_numpy(dtype=float)
+
+        st, start = self._resume_at(self.load(symbol, interval), index, closes)
+        resumed = st is not None
+        if st is None:
+            st = SymbolState(self.windows, self.resync_every)
+            st.derived = pd.DataFrame(columns=self.columns, index=pd.DatetimeIndex([], name="Date"), dtype=float)
+
+        rows = []
+        for i in range(start, len(closes)):
+            if i == len(closes) - 1:
+                # Keep the state from before the final bar in case it is revised later
+                derived, st.derived, st.prev = st.derived, None, None
+                snapshot = copy.deepcopy(st)
+                st.derived = derived
+                st.prev = snapshot
+            rows.append(st.push(index[i], float(closes[i])))
+        if rows:
+            new = pd.DataFrame(rows, index=index[start:], columns=self.columns)
+            st.derived = new if st.derived.empty else pd.concat([st.derived, new])
+        st.derived = st.derived[st.derived.index >= index[0]]
+        if st.prev is not None:
+            st.prev.derived = None  # rebuilt from st.derived on load
+        self.save(symbol, interval, st)
+
+        with self._lock:
+            self.stats["bars"] += len(rows)
+            self.stats["resumed" if resumed else "rebuilt"] += 1
+
+        out = raw.copy()
+        out[self.columns] = st.derived.reindex(index).to_numpy()
+        out.index.name = "Date"
+        return out.dropna(subset=["Close"]).reset_index()
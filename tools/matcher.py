@@ -0,0 +1,133 @@
+from __future__ import annotations
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+import numpy as np
+import pandas as pd
+
+# lexicon -> {label: keywords}; labels are listed in priority order (first match wins)
+DEFAULT_LEXICONS: Dict[str, Dict[str, List[str]]] = {
+    "event": {
+        "regulatory": ["probe", "lawsuit"],
+        "market_positive": ["rally", "beat"],
+        "supply_chain": ["delay", "concerns"],
+    },
+    "route": {
+        "earnings_analyzer": ["10-k", "10q", "earnings", "eps", "revenue"],
+        "market_analyzer": ["rally", "downgrade", "upgrade", "market", "fed"],
+    },
+    "sentiment": {
+        "negative": ["miss", "plunge", "slump", "falls", "drops", "tumbles", "downgrade", "lawsuit", "probe",
+                     "concerns", "delay", "weak", "loss", "recall"],
+        "positive": ["beat", "surge", "soar", "jumps", "rally", "record", "upgrade", "gains", "rises",
+                     "strong", "growth", "raises guidance"],
+    },
+}
+DEFAULT_LABELS = {"event": "other", "route": "news_analyzer", "sentiment": "neutral"}
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex for a set of literals that branches on one character at a time and prefers the longest match."""
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        end = node.get("") is True
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if end:
+            return body + "?" if len(alts) == 1 and len(body) == 1 else f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Substring keyword labelling for several lexicons at once. All keywords go
+    into one compiled regex; a single scan per distinct headline finds the
+    longest keyword starting at each position, and every shorter keyword that
+    is a prefix of it is credited too. Per lexicon the highest-priority label
+    among the hits wins, matching `any(k in text for k in keywords)` checked
+    label by label.
+    """
+    def __init__(self, lexicons: Mapping[str, Mapping[str, Iterable[str]]] = DEFAULT_LEXICONS,
+                 defaults: Optional[Mapping[str, str]] = None):
+        self.lexicons = {lex: {label: [k.lower() for k in kws] for label, kws in labels.items()}
+                         for lex, labels in lexicons.items()}
+        self.names = list(self.lexicons)
+        self.defaults = {lex: (defaults or DEFAULT_LABELS).get(lex, "other") for lex in self.names}
+
+        self.keywords = sorted({k for labels in self.lexicons.values() for kws in labels.values() for k in kws if k})
+        kid = {k: i for i, k in enumerate(self.keywords)}
+        self._kid = kid
+        # Zero-width lookahead so overlapping keywords are all seen
+        self._rx = re.compile(f"(?=({_trie_pattern(self.keywords)}))") if self.keywords else None
+
+        # prio[k, lexicon]: best label rank credited when keyword k is the longest hit at a position
+        self._labels = {lex: list(labels) + [self.defaults[lex]] for lex, labels in self.lexicons.items()}
+        none = np.iinfo(np.int32).max
+        direct = np.full((len(self.keywords), len(self.names)), none, dtype=np.int32)
+        for j, lex in enumerate(self.names):
+            for rank, (label, kws) in enumerate(self.lexicons[lex].items()):
+                for k in kws:
+                    if k:
+                        direct[kid[k], j] = min(direct[kid[k], j], rank)
+        self._prio = direct.copy()
+        for k, i in kid.items():
+            for n in range(1, len(k)):
+                p = kid.get(k[:n])
+                if p is not None:
+                    self._prio[i] = np.minimum(self._prio[i], direct[p])
+        self._none = none
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "KeywordMatcher":
+        lex = cfg.get("lexicons") or {}
+        lexicons = {name: lex.get(name, labels) for name, labels in DEFAULT_LEXICONS.items()}
+        lexicons.update({k: v for k, v in lex.items() if k not in lexicons and k != "defaults"})
+        return cls(lexicons, {**DEFAULT_LABELS, **(lex.get("defaults") or {})})
+
+    def _ranks(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), n_lexicons) best label rank per text; n_labels means no hit."""
+        best = np.full((len(texts), len(self.names)), self._none, dtype=np.int32)
+        if self._rx is None:
+            return best
+        rows: List[int] = []
+        kws: List[int] = []
+        findall, kid = self._rx.findall, self._kid
+        for i, t in enumerate(texts):
+            for hit in findall(t):
+                rows.append(i)
+                kws.append(kid[hit])
+        if rows:
+            np.minimum.at(best, np.asarray(rows), self._prio[np.asarray(kws)])
+        return best
+
+    def label_frame(self, texts: pd.Series) -> pd.DataFrame:
+        """One label column per lexicon for a whole text column; duplicate texts are scanned once."""
+        lowered = texts.fillna("").astype(str).str.lower()
+        codes, uniques = pd.factorize(lowered, sort=False)
+        ranks = self._ranks(list(uniques))
+        out = {}
+        for j, lex in enumerate(self.names):
+            labels = np.asarray(self._labels[lex], dtype=object)
+            r = np.minimum(ranks[:, j], len(labels) - 1)
+            out[lex] = labels[r][codes] if len(codes) else np.asarray([], dtype=object)
+        return pd.DataFrame(out, index=texts.index)
+
+    def label(self, text: str) -> Dict[str, str]:
+        ranks = self._ranks([(text or "").lower()])[0]
+        return {lex: self._labels[lex][min(int(r), len(self._labels[lex]) - 1)] for lex, r in zip(self.names, ranks)}
+
+
+@lru_cache(maxsize=1)
+def default_matcher() -> KeywordMatcher:
+    """The built-in lexicons; runs with a loaded config pass KeywordMatcher.from_config(cfg) instead."""
+    return KeywordMatcher.from_config({})
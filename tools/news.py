@@ -1,12 +1,23 @@
 from __future__ import annotations
-from typing import List, Dict
+import threading
+from pathlib import Path
+from typing import Any, List, Dict, Optional, Tuple
+import numpy as np
 import pandas as pd
-import yfinance as yf
+from tools.price_providers import yfinance
+from utils import trace
 
 def get_symbol_news(symbol: str, max_items: int = 15) -> List[Dict]:
     """Fetch recent news headlines using yfinance's built-in .news property."""
+    with trace.span(f"yfinance.news:{symbol}", "provider") as sp:
+        rows = _yf_news(symbol, max_items)
+        sp.set(rows=len(rows))
+    return rows
+
+
+def _yf_news(symbol: str, max_items: int) -> List[Dict]:
     try:
-        tk = yf.Ticker(symbol)
+        tk = yfinance().Ticker(symbol)
         items = tk.news or []
         rows = []
         for it in items[:max_items]:
@@ -20,13 +31,93 @@ def get_symbol_news(symbol: str, max_items: int = 15) -> List[Dict]:
     except Exception:
         return []
 
+class CsvNewsIndex:
+    """
+    Parses a news CSV once into per-symbol slices sorted newest-first by
+    providerPublishTime. Lookups are a dict hit plus a slice; the file is
+    re-read only when its mtime changes. Large dumps are read in chunks and,
+    with `keep_per_symbol`, only the newest rows per symbol are retained.
+    """
+    TIME_COL = "providerPublishTime"
+
+    def __init__(self, path: str, keep_per_symbol: Optional[int] = 200, chunksize: int = 500_000):
+        self.path = Path(path)
+        self.keep_per_symbol = keep_per_symbol
+        self.chunksize = chunksize
+        self._mtime: Optional[float] = None
+        self._columns: Dict[str, np.ndarray] = {}
+        self._slices: Dict[Any, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def _newest(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.TIME_COL in df.columns:
+            df = df.sort_values(self.TIME_COL, ascending=False, kind="stable")
+        if "symbol" in df.columns and self.keep_per_symbol:
+            df = df.groupby("symbol", sort=False, observed=True).head(self.keep_per_symbol)
+        return df
+
+    def _load(self):
+        parts = []
+        for chunk in pd.read_csv(self.path, chunksize=self.chunksize, dtype={"symbol": "category"}):
+            parts.append(self._newest(chunk))
+            if len(parts) > 1:
+                parts = [self._newest(pd.concat(parts, ignore_index=True))]
+        df = self._newest(pd.concat(parts, ignore_index=True)) if parts else pd.DataFrame()
+
+        slices: Dict[Any, Tuple[int, int]] = {}
+        if "symbol" in df.columns and not df.empty:
+            df = df.sort_values("symbol", kind="stable")  # groups symbols, keeps newest-first inside
+            syms = df["symbol"].astype(str).to_numpy()
+            starts = np.flatnonzero(np.r_[True, syms[1:] != syms[:-1]])
+            stops = np.r_[starts[1:], len(syms)]
+            slices = {syms[a]: (int(a), int(b)) for a, b in zip(starts, stops)}
+            df = df.astype({"symbol": str})
+        else:
+            slices[None] = (0, len(df))
+        # Columnar arrays; dicts are only built for the rows a lookup returns
+        self._columns = {c: df[c].to_numpy() for c in df.columns}
+        self._slices = slices
+
+    def lookup(self, symbol: str, max_items: int = 15) -> List[Dict]:
+        mtime = self.path.stat().st_mtime
+        with self._lock:
+            if mtime != self._mtime:
+                self._load()
+                self._mtime = mtime
+            start, stop = self._slices.get(symbol, self._slices.get(None, (0, 0)))
+            stop = min(stop, start + max_items)
+            cols = {c: arr[start:stop].tolist() for c, arr in self._columns.items()}
+        return [dict(zip(cols, row)) for row in zip(*cols.values())]
+
+
+_INDEXES: Dict[str, CsvNewsIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_news_index(path: str) -> CsvNewsIndex:
+    """Shared index per CSV path, so every task and agent reuses one parse."""
+    key = str(Path(path).resolve())
+    with _INDEXES_LOCK:
+        if key not in _INDEXES:
+            _INDEXES[key] = CsvNewsIndex(path)
+        return _INDEXES[key]
+
+
 def load_news_from_csv(path: str, symbol: str, max_items: int = 15) -> List[Dict]:
-    """Fallback loader for CSV-based news."""
-    try:
-        df = pd.read_csv(path)
-        if "symbol" in df.columns:
-            df = df[df["symbol"] == symbol]
-        df = df.head(max_items)
-        return df.to_dict(orient="records")
-    except Exception:
-        return []
+    """Fallback loader for CSV-based news (newest first)."""
+    with trace.span(f"csv.news:{symbol}", "provider") as sp:
+        try:
+            rows = get_news_index(path).lookup(symbol, max_items)
+        except Exception:
+            rows = []
+        sp.set(rows=len(rows))
+    return rows
+
+
+def with_sentiment(df: pd.DataFrame, text_col: str = "title", matcher=None) -> pd.DataFrame:
+    """Copy of `df` with a keyword-based sentiment `label` column (positive | negative | neutral)."""
+    from tools.matcher import default_matcher
+    matcher = matcher or default_matcher()
+    out = df.copy()
+    out["label"] = matcher.label_frame(out[text_col])["sentiment"]
+    return out
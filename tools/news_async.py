@@ -0,0 +1,175 @@
+from __future__ import annotations
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from utils import trace
+
+YAHOO_SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+FIELDS = ("title", "publisher", "link", "providerPublishTime")
+
+
+@dataclass
+class NewsResult:
+    """Outcome for one symbol: status is "ok", "empty" (request fine, no items) or "error"."""
+    symbol: str
+    status: str
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    attempts: int = 0
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "error"
+
+
+class TokenBucket:
+    """
+    `rate` requests per second with bursts up to `burst`. Callers reserve a
+    token under a thread lock and sleep off any deficit, so one bucket can be
+    shared by event loops running in different threads.
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class _Retryable(Exception):
+    def __init__(self, msg: str, retry_after: Optional[float] = None):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+
+class AsyncNewsFetcher:
+    """
+    Concurrent news for many symbols from a Yahoo-style search endpoint
+    (`?q=SYMBOL&newsCount=N` returning {"news": [...]}). One pooled requests
+    Session is shared by all requests; blocking calls run on a small thread
+    pool while asyncio handles concurrency, rate limiting and retries with
+    full-jitter exponential backoff.
+    """
+    def __init__(self, base_url: str = YAHOO_SEARCH_URL, rate: float = 5.0, burst: int = 5,
+                 timeout: float = 5.0, retries: int = 3, backoff: float = 0.5, max_backoff: float = 8.0,
+                 concurrency: int = 8, user_agent: str = "Mozilla/5.0"):
+        self.base_url = base_url
+        self.bucket = TokenBucket(rate, burst)
+        self.timeout = float(timeout)
+        self.retries = int(retries)
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self.concurrency = max(1, int(concurrency))
+        self.headers = {"User-Agent": user_agent}
+        self._session = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "AsyncNewsFetcher":
+        a = cfg.get("news", {}).get("http", {}) or {}
+        return cls(a.get("base_url", YAHOO_SEARCH_URL), a.get("rate", 5.0), a.get("burst", 5),
+                   a.get("timeout", 5.0), a.get("retries", 3), a.get("backoff", 0.5),
+                   a.get("max_backoff", 8.0), a.get("concurrency", 8), a.get("user_agent", "Mozilla/5.0"))
+
+    def _ensure(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                s.headers.update(self.headers)
+                self._session = s
+                self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="news")
+        return self._session, self._pool
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._pool.shutdown(wait=False)
+                self._session, self._pool = None, None
+
+    def _get(self, symbol: str, max_items: int) -> List[Dict[str, Any]]:
+        import requests
+        session, _ = self._ensure()
+        try:
+            r = session.get(self.base_url, params={"q": symbol, "newsCount": max_items, "quotesCount": 0},
+                            timeout=self.timeout)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            raise _Retryable(f"{type(e).__name__}: {e}") from e
+        if r.status_code in RETRY_STATUS:
+            after = r.headers.get("Retry-After")
+            raise _Retryable(f"HTTP {r.status_code}", float(after) if after and after.isdigit() else None)
+        r.raise_for_status()
+        news = r.json().get("news") or []
+        return [{k: it.get(k) for k in FIELDS} for it in news[:max_items]]
+
+    def _delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def fetch_one(self, symbol: str, max_items: int = 15) -> NewsResult:
+        _, pool = self._ensure()
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        res = NewsResult(symbol, "error")
+        with trace.span(f"news.http:{symbol}", "provider") as sp:
+            for attempt in range(self.retries + 1):
+                await self.bucket.acquire()
+                res.attempts = attempt + 1
+                try:
+                    items = await loop.run_in_executor(pool, self._get, symbol, max_items)
+                except _Retryable as e:
+                    res.error = str(e)
+                    if attempt < self.retries:
+                        await asyncio.sleep(self._delay(attempt, e.retry_after))
+                    continue
+                except Exception as e:
+                    res.error = f"{type(e).__name__}: {e}"
+                    break
+                res.status, res.items, res.error = ("ok" if items else "empty"), items, None
+                break
+            res.elapsed_ms = (time.perf_counter() - t0) * 1000
+            sp.set(status=res.status, attempts=res.attempts, rows=len(res.items))
+        return res
+
+    async def fetch_many(self, symbols: List[str], max_items: int = 15) -> Dict[str, NewsResult]:
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def one(sym: str) -> NewsResult:
+            async with sem:
+                return await self.fetch_one(sym, max_items)
+
+        results = await asyncio.gather(*(one(s) for s in symbols))
+        return {r.symbol: r for r in results}
+
+    def fetch_universe(self, symbols: List[str], max_items: int = 15) -> Dict[str, NewsResult]:
+        """Blocking entry point: fetch every symbol concurrently in a private event loop."""
+        return asyncio.run(self.fetch_many(list(symbols), max_items))
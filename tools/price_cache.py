@@ -0,0 +1,155 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+import pandas as pd
+from utils import trace
+from tools.price_providers import PriceProvider, normalize_ohlcv, period_to_timedelta, traced_fetch
+
+# A cached history still "covers" the period if it starts within this slack
+# (weekends and exchange holidays at the start of the window).
+COVER_SLACK = pd.Timedelta(days=7)
+
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        try:
+            import fastparquet  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+
+class PriceCache:
+    """
+    On-disk cache of raw OHLCV frames, one file per (symbol, interval).
+    Fresh entries (younger than the interval's TTL) are served from disk;
+    stale ones only fetch bars from the last cached timestamp onwards and
+    append them. A file keeps the longest history any caller asked for, and
+    each caller gets back just its own period, so a 5y replay and a 6mo run
+    can share one file without trimming each other's bars.
+    """
+    def __init__(self, root: str = ".cache/prices", ttl: Dict[str, int] | None = None,
+                 default_ttl: int = 3600, fmt: str = "auto"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl or {}
+        self.default_ttl = int(default_ttl)
+        if fmt == "auto":
+            fmt = "parquet" if _parquet_available() else "pickle"
+        self.fmt = fmt
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "refreshes": 0, "corrupt": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["PriceCache"]:
+        c = cfg.get("prices", {}).get("cache") or {}
+        if not c.get("enabled", False):
+            return None
+        return cls(c.get("dir", ".cache/prices"), c.get("ttl"), c.get("default_ttl", 3600), c.get("format", "auto"))
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    def path(self, symbol: str, interval: str) -> Path:
+        ext = "parquet" if self.fmt == "parquet" else "pkl"
+        return self.root / f"{quote(symbol, safe='')}__{interval}.{ext}"
+
+    def load(self, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+        """Read a cached frame; corrupt or truncated files are dropped and count as misses."""
+        p = self.path(symbol, interval)
+        if not p.exists():
+            return None
+        try:
+            df = pd.read_parquet(p) if self.fmt == "parquet" else pd.read_pickle(p)
+            df = normalize_ohlcv(df)
+            if df.empty:
+                raise ValueError("empty cache file")
+            return df
+        except Exception:
+            self._count("corrupt")
+            p.unlink(missing_ok=True)
+            return None
+
+    def save(self, symbol: str, interval: str, df: pd.DataFrame):
+        """Write atomically so a crash never leaves a partial file behind."""
+        if df is None or df.empty:
+            return
+        p = self.path(symbol, interval)
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        if self.fmt == "parquet":
+            df.to_parquet(tmp)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, p)
+
+    def is_fresh(self, symbol: str, interval: str) -> bool:
+        ttl = int(self.ttl.get(interval, self.default_ttl))
+        try:
+            return time.time() - self.path(symbol, interval).stat().st_mtime < ttl
+        except OSError:
+            return False
+
+    @staticmethod
+    def window(df: pd.DataFrame, span: pd.Timedelta) -> pd.DataFrame:
+        """The trailing `span` of a frame, measured back from its last bar."""
+        return df[df.index >= df.index[-1] - span]
+
+    def get(self, provider: PriceProvider, symbols: List[str], period: str = "6mo",
+            interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """Return {symbol: raw frame}, fetching only what the cache can't serve."""
+        span = period_to_timedelta(period)
+        wanted_start = pd.Timestamp.now() - span + COVER_SLACK
+        out: Dict[str, pd.DataFrame] = {}
+        cached: Dict[str, pd.DataFrame] = {}
+        misses: List[str] = []
+
+        for sym in symbols:
+            df = self.load(sym, interval)
+            if df is None or df.index[0] > wanted_start:
+                misses.append(sym)
+            elif self.is_fresh(sym, interval):
+                out[sym] = self.window(df, span)
+            else:
+                cached[sym] = df
+
+        self._count("hits", len(out))
+        self._count("misses", len(misses))
+        self._count("refreshes", len(cached))
+        trace.get_tracer().counter("price_cache", **self.stats)
+
+        if misses:
+            for sym, df in traced_fetch(provider, misses, period, interval).items():
+                if not df.empty:
+                    self.save(sym, interval, df)
+                    out[sym] = self.window(df, span)
+
+        if cached:
+            # One bulk request from the oldest tail; the last cached bar is
+            # re-fetched too because it may have been a partial bar.
+            start = min(df.index[-1] for df in cached.values())
+            fresh = traced_fetch(provider, list(cached), period, interval, start=start)
+            for sym, old in cached.items():
+                new = fresh.get(sym)
+                if new is not None and not new.empty:
+                    new = new[new.index >= old.index[-1]]
+                    merged = pd.concat([old, new])
+                    merged = merged[~merged.index.duplicated(keep="last")]
+                else:
+                    merged = old
+                # Stored whole: a longer period cached by another caller must survive
+                self.save(sym, interval, merged)
+                out[sym] = self.window(merged, span)
+
+        return {sym: out[sym] for sym in symbols if sym in out}
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"] + self.stats["refreshes"]
+        return self.stats["hits"] / total if total else 0.0
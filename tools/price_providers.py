@@ -0,0 +1,201 @@
+from __future__ import annotations
+import functools
+import threading
+import warnings
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from utils import trace
+
+OHLCV = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+_PERIOD_DAYS = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+_INTERVAL_FREQ = {"m": "min", "h": "h", "d": "B", "wk": "W-FRI", "mo": "MS"}
+
+
+def period_to_timedelta(period: str) -> pd.Timedelta:
+    """'6mo' -> ~180 days, '1y' -> 365 days, 'max' -> 30 years."""
+    if period in ("max", "ytd"):
+        return pd.Timedelta(days=365 * (30 if period == "max" else 1))
+    for unit in ("mo", "wk", "y", "d"):
+        if period.endswith(unit):
+            return pd.Timedelta(days=int(period[: -len(unit)]) * _PERIOD_DAYS[unit])
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def interval_to_freq(interval: str) -> str:
+    for unit in ("mo", "wk", "m", "h", "d"):
+        if interval.endswith(unit):
+            n = interval[: -len(unit)] or "1"
+            return f"{n}{_INTERVAL_FREQ[unit]}" if n != "1" else _INTERVAL_FREQ[unit]
+    raise ValueError(f"Unsupported interval: {interval}")
+
+
+def normalize_ohlcv(df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Title-case columns, keep OHLCV only and index by a 'Date' DatetimeIndex."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df = df.rename(columns=str.title).rename(columns={"Adj_Close": "Adj Close"})
+    if "Date" in df.columns:
+        df = df.set_index("Date")
+    df.index = pd.to_datetime(df.index)
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index.name = "Date"
+    df = df[[c for c in OHLCV if c in df.columns]]
+    return df.dropna(subset=["Close"]).sort_index()
+
+
+class PriceProvider:
+    """
+    Interface for raw OHLCV sources. `fetch` returns {symbol: frame}; when
+    `start` is given only bars at or after it are returned.
+    """
+    name = "base"
+
+    def fetch(self, symbols: List[str], period: str = "6mo", interval: str = "1d",
+              start: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        raise NotImplementedError
+
+    def fetch_one(self, symbol: str, period: str = "6mo", interval: str = "1d",
+                  start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        return self.fetch([symbol], period, interval, start).get(symbol, pd.DataFrame())
+
+
+@functools.lru_cache(maxsize=None)
+def yfinance():
+    """yfinance, imported on first use (it is slow to import); its FutureWarnings are muted from then on."""
+    warnings.filterwarnings("ignore", category=FutureWarning)
+    import yfinance as yf
+    return yf
+
+
+class YFinanceProvider(PriceProvider):
+    """Yahoo Finance. Batches go through yf.download in chunks of `chunk_size` symbols."""
+    name = "yfinance"
+    # yf.download keeps module-level state, so bulk calls must not overlap
+    _download_lock = threading.Lock()
+
+    def __init__(self, chunk_size: int = 50):
+        self.chunk_size = max(1, int(chunk_size))
+
+    def fetch_one(self, symbol, period="6mo", interval="1d", start=None):
+        yf = yfinance()
+        kw: Dict[str, Any] = {"start": start} if start is not None else {"period": period}
+        df = yf.Ticker(symbol).history(interval=interval, auto_adjust=False, actions=False, **kw)
+        return normalize_ohlcv(df)
+
+    def fetch(self, symbols, period="6mo", interval="1d", start=None):
+        yf = yfinance()
+        out: Dict[str, pd.DataFrame] = {}
+        kw: Dict[str, Any] = {"start": start} if start is not None else {"period": period}
+        for i in range(0, len(symbols), self.chunk_size):
+            chunk = symbols[i:i + self.chunk_size]
+            with self._download_lock:
+                df = yf.download(chunk, interval=interval, group_by="ticker", auto_adjust=False,
+                                 progress=False, threads=True, **kw)
+            if df is None or df.empty:
+                continue
+            for sym in chunk:
+                if isinstance(df.columns, pd.MultiIndex):
+                    if sym not in df.columns.get_level_values(0):
+                        continue
+                    part = df[sym]
+                else:
+                    part = df
+                out[sym] = normalize_ohlcv(part.dropna(how="all"))
+        return out
+
+
+class FixtureProvider(PriceProvider):
+    """Reads `<dir>/<symbol>.parquet` or `<dir>/<symbol>.csv` written from earlier downloads."""
+    name = "fixture"
+
+    def __init__(self, root: str = "data/prices"):
+        self.root = Path(root)
+
+    def fetch(self, symbols, period="6mo", interval="1d", start=None):
+        out: Dict[str, pd.DataFrame] = {}
+        for sym in symbols:
+            pq, csv = self.root / f"{sym}.parquet", self.root / f"{sym}.csv"
+            if pq.exists():
+                df = pd.read_parquet(pq)
+            elif csv.exists():
+                df = pd.read_csv(csv)
+            else:
+                continue
+            df = normalize_ohlcv(df)
+            if start is not None:
+                df = df[df.index >= start]
+            elif not df.empty:
+                df = df[df.index >= df.index[-1] - period_to_timedelta(period)]
+            out[sym] = df
+        return out
+
+
+class FakeProvider(PriceProvider):
+    """Deterministic random-walk bars per symbol, for offline runs and benchmarks."""
+    name = "fake"
+
+    def __init__(self, end: str = "2025-01-31", seed: int = 0):
+        self.end = pd.Timestamp(end)
+        self.seed = seed
+
+    @functools.lru_cache(maxsize=32)
+    def _index(self, end: pd.Timestamp, period: str, interval: str) -> pd.DatetimeIndex:
+        return pd.date_range(end=end, start=end - period_to_timedelta(period),
+                             freq=interval_to_freq(interval), name="Date")
+
+    def frame(self, symbol: str, period: str = "6mo", interval: str = "1d") -> pd.DataFrame:
+        # `end` is read on every call, so tests can move it forward to make new bars appear
+        idx = self._index(self.end, period, interval)
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()) ^ self.seed)
+        n = len(idx)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, n)))
+        spread = np.abs(rng.normal(0, 0.004, n)) * close
+        open_ = close * (1 + rng.normal(0, 0.003, n))
+        return pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Adj Close": close,
+            "Volume": rng.integers(1_000_000, 5_000_000, n).astype(float),
+        }, index=idx)
+
+    def fetch(self, symbols, period="6mo", interval="1d", start=None):
+        out: Dict[str, pd.DataFrame] = {}
+        for sym in symbols:
+            df = self.frame(sym, period, interval)
+            out[sym] = df[df.index >= start] if start is not None else df
+        return out
+
+
+def traced_fetch(provider: PriceProvider, symbols: List[str], period: str = "6mo", interval: str = "1d",
+                 start: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+    """provider.fetch / fetch_one wrapped in a trace span with rows and bytes returned."""
+    with trace.span(f"{provider.name}.fetch", "provider", symbols=len(symbols), interval=interval) as sp:
+        if len(symbols) == 1:
+            df = provider.fetch_one(symbols[0], period, interval, start)
+            out = {symbols[0]: df} if not df.empty else {}
+        else:
+            out = provider.fetch(symbols, period, interval, start)
+        if trace.get_tracer().enabled:
+            sp.set(rows=sum(len(df) for df in out.values()),
+                   bytes=int(sum(df.memory_usage(index=True).sum() for df in out.values())))
+    return out
+
+
+def get_provider(cfg: Dict[str, Any]) -> PriceProvider:
+    """Build the provider named by `prices.provider` in config."""
+    p = cfg.get("prices", {})
+    name = p.get("provider", "yfinance")
+    if name == "yfinance":
+        return YFinanceProvider(p.get("batch_size", 50))
+    if name == "fixture":
+        return FixtureProvider(p.get("fixture_dir", "data/prices"))
+    if name == "fake":
+        return FakeProvider(**(p.get("fake") or {}))
+    raise ValueError(f"Unknown price provider: {name}")
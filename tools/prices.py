@@ -1,30 +1,138 @@
-
 from __future__ import annotations
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from typing import Dict, Any
-import warnings
-
-# Suppress annoying FutureWarnings from yfinance
-warnings.filterwarnings("ignore", category=FutureWarning)
-
-
-def fetch_prices(symbol: str, period: str = "6mo", interval: str = "1d") -> pd.DataFrame:
-    """Fetch historical price data from Yahoo Finance."""
-    df = yf.download(symbol, period=period, interval=interval, progress=False, auto_adjust=False)
+from typing import Dict, Any, List, Optional, Tuple
+from tools.price_providers import PriceProvider, YFinanceProvider, traced_fetch
+from tools.price_cache import PriceCache
+from tools.indicators import IndicatorEngine
+from utils import trace
+
+
+WINDOWS = (5, 20, 50)
+DERIVED = ("Return",) + tuple(f"{k}_{w}" for w in WINDOWS for k in ("SMA", "Vol"))
+
+
+class Projection:
+    """
+    What a price frame keeps once indicators are on it: `columns` (Date and
+    Close are always kept, None keeps everything), the dtype of the derived
+    Return/SMA/Vol columns, and `chunk_rows`, above which indicators are
+    computed chunk by chunk so temporaries stay bounded on long histories.
+    Derived columns nobody keeps are not computed at all.
+    """
+    def __init__(self, columns: Optional[List[str]] = None, derived_dtype: str = "float64", chunk_rows: int = 0):
+        self.columns = None if columns is None else [str(c) for c in columns]
+        self.derived_dtype = np.dtype(derived_dtype)
+        self.chunk_rows = int(chunk_rows or 0)
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["Projection"]:
+        f = cfg.get("prices", {}).get("frame") or {}
+        if not f:
+            return None
+        return cls(f.get("columns"), f.get("derived_dtype", "float64"), f.get("chunk_rows", 0))
+
+    def keeps(self, col: str) -> bool:
+        return self.columns is None or col in self.columns
+
+    def windows(self) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        """(SMA windows, Vol windows) that are actually kept."""
+        return (tuple(w for w in WINDOWS if self.keeps(f"SMA_{w}")),
+                tuple(w for w in WINDOWS if self.keeps(f"Vol_{w}")))
+
+    def select(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Drop unkept columns and downcast derived ones (frames with a Date column or index)."""
+        if df is None or df.empty:
+            return df
+        if self.columns is not None:
+            df = df[[c for c in df.columns if c in ("Date", "Close") or c in self.columns]]
+        derived = [c for c in df.columns if c in DERIVED and df[c].dtype != self.derived_dtype]
+        if derived:
+            df = df.astype({c: self.derived_dtype for c in derived})
+        return df
+
+
+def _derive(close: pd.Series, sma: Tuple[int, ...], vol: Tuple[int, ...], returns: bool,
+            dtype) -> Dict[str, np.ndarray]:
+    ret = close.pct_change()
+    out = {"Return": ret.to_numpy(dtype=dtype)} if returns else {}
+    for w in WINDOWS:
+        if w in sma:
+            out[f"SMA_{w}"] = close.rolling(w).mean().to_numpy(dtype=dtype)
+        if w in vol:
+            out[f"Vol_{w}"] = (ret.rolling(w).std() * np.sqrt(252)).to_numpy(dtype=dtype)
+    return out
+
+
+def add_indicators(df: pd.DataFrame, projection: Optional[Projection] = None) -> pd.DataFrame:
+    """Add Return, SMA_w and Vol_w columns to a raw OHLCV frame (only those `projection` keeps)."""
     if df is None or df.empty:
         return pd.DataFrame()
 
     df = df.rename(columns=str.title)
-    df["Return"] = df["Close"].pct_change()
+    if projection is None:
+        sma, vol, returns, dtype, chunk = WINDOWS, WINDOWS, True, np.float64, 0
+    else:
+        (sma, vol), returns = projection.windows(), projection.keeps("Return")
+        dtype, chunk = projection.derived_dtype, projection.chunk_rows
+        # Raw columns nobody reads go before anything is computed
+        df = pd.DataFrame({c: df[c] for c in df.columns if c == "Close" or projection.keeps(c)}, index=df.index)
+
+    close = df["Close"]
+    if chunk and len(df) > chunk:
+        # Each chunk re-reads the bars the longest window needs before it, so values match a
+        # whole-frame pass (to rounding) while temporaries only ever cover one chunk
+        warm = max(sma + vol, default=1)
+        parts = []
+        for lo in range(0, len(df), chunk):
+            start = max(0, lo - warm)
+            part = _derive(close.iloc[start:lo + chunk], sma, vol, returns, dtype)
+            parts.append({k: v[lo - start:] for k, v in part.items()})
+        derived = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    else:
+        derived = _derive(close, sma, vol, returns, dtype)
+    for col, values in derived.items():
+        df[col] = values
 
-    # Rolling statistics
-    for w in (5, 20, 50):
-        df[f"SMA_{w}"] = df["Close"].rolling(w).mean()
-        df[f"Vol_{w}"] = df["Return"].rolling(w).std() * np.sqrt(252)
+    # Keep warm-up rows: stats read the tail, and indicator NaNs there are harmless
+    return df.dropna(subset=["Close"]).reset_index()
 
-    return df.dropna().reset_index()
+
+def _with_indicators(symbol: str, interval: str, raw: Optional[pd.DataFrame], engine: Optional[IndicatorEngine],
+                     projection: Optional[Projection]) -> pd.DataFrame:
+    if engine is None:
+        return add_indicators(raw, projection)
+    df = engine.apply(symbol, interval, raw)
+    return projection.select(df) if projection is not None else df
+
+
+def fetch_prices(symbol: str, period: str = "6mo", interval: str = "1d",
+                 provider: Optional[PriceProvider] = None, cache: Optional[PriceCache] = None,
+                 engine: Optional[IndicatorEngine] = None, projection: Optional[Projection] = None) -> pd.DataFrame:
+    """Fetch historical price data (Yahoo Finance unless another provider is given)."""
+    provider = provider or YFinanceProvider()
+    if cache is not None:
+        raw = cache.get(provider, [symbol], period, interval).get(symbol)
+    else:
+        raw = traced_fetch(provider, [symbol], period, interval).get(symbol)
+    with trace.span(f"indicators:{symbol}", "compute", rows=0 if raw is None else len(raw)):
+        return _with_indicators(symbol, interval, raw, engine, projection)
+
+
+def fetch_prices_batch(symbols: List[str], period: str = "6mo", interval: str = "1d",
+                       provider: Optional[PriceProvider] = None,
+                       cache: Optional[PriceCache] = None,
+                       engine: Optional[IndicatorEngine] = None,
+                       projection: Optional[Projection] = None) -> Dict[str, pd.DataFrame]:
+    """Fetch many symbols in bulk requests and return {symbol: frame with indicators}."""
+    provider = provider or YFinanceProvider()
+    if cache is not None:
+        raw = cache.get(provider, list(symbols), period, interval)
+    else:
+        raw = traced_fetch(provider, list(symbols), period, interval)
+    with trace.span("indicators:batch", "compute", symbols=len(symbols)):
+        # pop so each raw frame can be released as soon as its projected frame exists
+        return {sym: _with_indicators(sym, interval, raw.pop(sym, None), engine, projection) for sym in symbols}
 
 
 def quick_stats(df: pd.DataFrame) -> Dict[str, Any]:
@@ -56,7 +164,7 @@ def quick_stats(df: pd.DataFrame) -> Dict[str, Any]:
 
     # Volatility
     vol_20 = None
-    if "Vol_20" in df.columns and not df["Vol_20"].empty:
+    if "Vol_20" in df.columns and not df["Vol_20"].empty and pd.notna(df["Vol_20"].iloc[last_idx]):
         vol_20 = float(df["Vol_20"].iloc[last_idx])
 
     # --- Clean up 'Date' field safely ---
@@ -0,0 +1,193 @@
+from __future__ import annotations
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class PriceBlock:
+    """
+    Picklable handle to a packed price store: the shared segment name and the
+    layout. Rows of symbol i are offsets[i]:offsets[i + 1] of a (rows x
+    columns) float64 matrix, followed by one int64 nanosecond timestamp per
+    row when the frames had a date column.
+    """
+    name: str
+    columns: Tuple[str, ...]
+    symbols: Tuple[str, ...]
+    offsets: Tuple[int, ...]
+    date_col: Optional[str] = None
+    tz: Optional[str] = None
+
+    @property
+    def rows(self) -> int:
+        return self.offsets[-1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows * len(self.columns) * 8 + (self.rows * 8 if self.date_col else 0)
+
+
+def _open(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Older versions register the segment with the resource tracker on attach too; pool workers
+        # share the owner's tracker, where the name is already registered, so that is harmless
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedPrices:
+    """
+    Read-only view of a packed price store. `frame(symbol)` wraps the shared
+    rows in a DataFrame without copying them; the arrays are marked read-only.
+    Keep the store open while its frames are in use.
+    """
+    def __init__(self, block: PriceBlock, shm: shared_memory.SharedMemory):
+        self.block = block
+        self._shm = shm
+        self._index = {sym: i for i, sym in enumerate(block.symbols)}
+        rows, ncols = block.rows, len(block.columns)
+        self.values = np.ndarray((rows, ncols), dtype=np.float64, buffer=shm.buf)
+        self.dates = (np.ndarray((rows,), dtype=np.int64, buffer=shm.buf, offset=rows * ncols * 8)
+                      if block.date_col else None)
+        for arr in (self.values, self.dates):
+            if arr is not None:
+                arr.flags.writeable = False
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        i = self._index[symbol]
+        lo, hi = self.block.offsets[i], self.block.offsets[i + 1]
+        df = pd.DataFrame(self.values[lo:hi], columns=list(self.block.columns), copy=False)
+        if self.dates is not None:
+            dates = pd.DatetimeIndex(self.dates[lo:hi].view("datetime64[ns]"))
+            if self.block.tz:
+                dates = dates.tz_localize("UTC").tz_convert(self.block.tz)
+            df.insert(0, self.block.date_col, dates)
+        return df
+
+    def frames(self, symbols: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        return {sym: self.frame(sym) for sym in (symbols if symbols is not None else self.block.symbols)}
+
+    def close(self):
+        if self._shm is not None:
+            # Views must go before the mapping can be released
+            self.values = self.dates = None
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # a caller still holds frames; the mapping goes when they do
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def attach(block: PriceBlock) -> SharedPrices:
+    """Map an existing store (e.g. in a pool worker). Closing it never removes the segment."""
+    return SharedPrices(block, _open(block.name))
+
+
+def _unlink(shm: shared_memory.SharedMemory):
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class SharedPriceStore(SharedPrices):
+    """
+    Owner of a packed price store. The segment is removed on `close`, when the
+    store is garbage collected or at interpreter exit; if this process is
+    killed outright, multiprocessing's resource tracker removes it. Workers
+    only attach, so a crashed worker leaves nothing behind.
+    """
+    def __init__(self, block: PriceBlock, shm: shared_memory.SharedMemory):
+        super().__init__(block, shm)
+        self._finalizer = weakref.finalize(self, _unlink, shm)
+
+    @classmethod
+    def pack(cls, frames: Dict[str, pd.DataFrame], columns: Optional[List[str]] = None) -> "SharedPriceStore":
+        """
+        Copy frames into one shared segment: numeric columns (the union
+        across frames unless `columns` is given) as float64, NaN where a frame
+        lacks a column, plus the date column if there is one.
+        """
+        frames = {sym: (df if df is not None else pd.DataFrame()) for sym, df in frames.items()}
+        date_col, tz = None, None
+        if columns is None:
+            columns = []
+            for df in frames.values():
+                for c in df.columns:
+                    if c not in columns and pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c]):
+                        columns.append(c)
+        for df in frames.values():
+            for c in df.columns:
+                if pd.api.types.is_datetime64_any_dtype(df[c]):
+                    date_col, tz = c, (str(df[c].dt.tz) if df[c].dt.tz is not None else None)
+                    break
+            if date_col:
+                break
+
+        offsets = [0]
+        for df in frames.values():
+            offsets.append(offsets[-1] + len(df))
+        block_cols = tuple(str(c) for c in columns)
+        probe = PriceBlock("", block_cols, tuple(frames), tuple(offsets), date_col, tz)
+        shm = shared_memory.SharedMemory(create=True, size=max(probe.nbytes, 1))
+        block = PriceBlock(shm.name, block_cols, tuple(frames), tuple(offsets), date_col, tz)
+
+        rows, ncols = block.rows, len(block_cols)
+        values = np.ndarray((rows, ncols), dtype=np.float64, buffer=shm.buf)
+        dates = np.ndarray((rows,), dtype=np.int64, buffer=shm.buf, offset=rows * ncols * 8) if date_col else None
+        for (sym, df), lo, hi in zip(frames.items(), offsets, offsets[1:]):
+            if hi == lo:
+                continue
+            values[lo:hi] = df.reindex(columns=columns).to_numpy(dtype=np.float64, na_value=np.nan)
+            if dates is not None:
+                d = pd.DatetimeIndex(df[date_col]) if date_col in df.columns else None
+                if d is None:
+                    dates[lo:hi] = np.iinfo(np.int64).min  # NaT
+                else:
+                    d = d.tz_convert("UTC").tz_localize(None) if d.tz is not None else d
+                    dates[lo:hi] = np.asarray(d, dtype="datetime64[ns]").view(np.int64)
+        del values, dates
+        return cls(block, shm)
+
+    def close(self):
+        super().close()
+        self._finalizer()
+
+
+def _run_chunk(block: PriceBlock, symbols: List[str], fn: Callable, args: Tuple) -> Dict[str, Any]:
+    with attach(block) as prices:
+        return fn(prices.frames(symbols), *args)
+
+
+def map_shared(fn: Callable[..., Dict[str, Any]], frames: Dict[str, pd.DataFrame], workers: int,
+               *args, chunks_per_worker: int = 4) -> Dict[str, Any]:
+    """
+    Run `fn(frames_chunk, *args)` (a picklable top-level function returning
+    {symbol: result}) over chunks of symbols in a process pool. Frames are
+    packed into shared memory once; workers get only the block descriptor
+    and a symbol list, and read the rows in place. A crashed worker raises
+    BrokenProcessPool here; the segment is removed either way.
+    """
+    symbols = list(frames)
+    n = max(1, min(len(symbols), workers * chunks_per_worker))
+    chunks = [symbols[i::n] for i in range(n)]
+    out: Dict[str, Any] = {}
+    # The store exists before the pool so workers inherit the owner's resource tracker
+    with SharedPriceStore.pack(frames) as store, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_chunk, store.block, chunk, fn, args) for chunk in chunks]
+        for f in futures:
+            out.update(f.result())
+    return {sym: out[sym] for sym in symbols if sym in out}
@@ -0,0 +1,165 @@
+from __future__ import annotations
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from tools.prices import WINDOWS
+
+DEFAULT_INDICATORS = ("ret_5d", "ret_20d", "vol_20", "trend")
+ANNUALIZE = np.sqrt(252)
+SENT_LABELS = np.array(["very_bearish", "bearish", "neutral", "bullish", "very_bullish"], dtype=object)
+
+_IND = re.compile(r"^(ret)_(\d+)d$|^(sma|vol)_(\d+)$")
+
+
+def close_matrix(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Align every symbol's Close into one date x symbol frame (NaN where a symbol has no bar)."""
+    syms, dates, closes = [], [], []
+    for sym, df in frames.items():
+        if df is None or df.empty:
+            continue
+        syms.append(sym)
+        d = df["Date"] if "Date" in df.columns else df.index
+        dates.append(np.asarray(d, dtype="datetime64[ns]"))
+        closes.append(df["Close"].to_numpy(dtype=float))
+    if not syms:
+        return pd.DataFrame()
+
+    index = np.unique(np.concatenate(dates))
+    mat = np.full((len(index), len(syms)), np.nan)
+    for j, (d, c) in enumerate(zip(dates, closes)):
+        mat[np.searchsorted(index, d), j] = c
+    return pd.DataFrame(mat, index=pd.DatetimeIndex(index, name="Date"), columns=syms)
+
+
+def right_align(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Shift each column's valid values to the bottom, keeping their order, so
+    row -1 is every symbol's last bar and row -1-k is k bars before it.
+    Symbols trading on different calendars then line up by bar, not by date.
+    """
+    valid = ~np.isnan(values)
+    order = np.argsort(valid, axis=0, kind="stable")
+    return np.take_along_axis(values, order, axis=0), valid.sum(axis=0)
+
+
+def _parse(indicators: Iterable[str]) -> Tuple[List[Tuple[str, str, int]], int]:
+    """Turn names like 'ret_20d' / 'sma_50' / 'vol_20' into (name, op, window) and the bars needed."""
+    specs, need = [], 1
+    for name in indicators:
+        if name in ("trend", "sentiment"):
+            continue
+        m = _IND.match(name)
+        if not m:
+            raise ValueError(f"Unknown indicator: {name}")
+        op, w = (m.group(1), int(m.group(2))) if m.group(1) else (m.group(3), int(m.group(4)))
+        specs.append((name, op, w))
+        need = max(need, w if op == "sma" else w + 1)
+    return specs, need
+
+
+def label_sentiment(ret_20d: np.ndarray, thresholds: Dict[str, float]) -> np.ndarray:
+    """Vectorized MarketAgent.classify: bucket 20-day returns with SENT_THRESH."""
+    r = np.asarray(ret_20d, dtype=float)
+    out = np.select(
+        [r <= thresholds["very_bearish"], r <= thresholds["bearish"],
+         r >= thresholds["very_bullish"], r >= thresholds["bullish"]],
+        [SENT_LABELS[0], SENT_LABELS[1], SENT_LABELS[4], SENT_LABELS[3]],
+        default=SENT_LABELS[2],
+    )
+    return np.where(np.isnan(r), SENT_LABELS[2], out)
+
+
+def label_trend(ret_20d: np.ndarray) -> np.ndarray:
+    r = np.asarray(ret_20d, dtype=float)
+    return np.select([r > 0, r < 0], ["up", "down"], default="flat").astype(object)
+
+
+def compute_panel(closes: pd.DataFrame, indicators: Iterable[str] = DEFAULT_INDICATORS,
+                  thresholds: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """
+    Latest-bar stats for every column of a date x symbol Close frame in one
+    pass. Only the trailing bars the requested indicators need are touched.
+    Returns a symbol-indexed frame with asof, close and one column per indicator.
+    """
+    indicators = list(indicators)
+    specs, need = _parse(indicators)
+    if "trend" in indicators or "sentiment" in indicators:
+        need = max(need, 21)
+
+    values = closes.to_numpy(dtype=float)
+    aligned, counts = right_align(values)
+    tail = aligned[-need:] if len(aligned) >= need else np.vstack(
+        [np.full((need - len(aligned), aligned.shape[1]), np.nan), aligned])
+    last = tail[-1]
+
+    # Date of each symbol's last valid bar
+    valid = ~np.isnan(values)
+    last_pos = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+    asof = closes.index.to_numpy()[np.clip(last_pos, 0, max(len(values) - 1, 0))] if len(values) else []
+
+    out: Dict[str, Any] = {"asof": asof, "close": last, "bars": counts}
+    rets = None
+    for name, op, w in specs:
+        if op == "ret":
+            out[name] = last / tail[-1 - w] - 1
+        elif op == "sma":
+            out[name] = tail[-w:].mean(axis=0)
+        else:
+            if rets is None:
+                rets = tail[1:] / tail[:-1] - 1
+            out[name] = rets[-w:].std(axis=0, ddof=1) * ANNUALIZE
+
+    r20 = out.get("ret_20d")
+    if r20 is None and ("trend" in indicators or "sentiment" in indicators):
+        r20 = last / tail[-21] - 1
+    if "trend" in indicators:
+        out["trend"] = label_trend(r20)
+    if "sentiment" in indicators:
+        if thresholds is None:
+            raise ValueError("sentiment needs thresholds")
+        out["sentiment"] = label_sentiment(r20, thresholds)
+
+    panel = pd.DataFrame(out, index=closes.columns)
+    return panel[panel["bars"] > 0]
+
+
+def last_value(df: Optional[pd.DataFrame], col: str) -> float:
+    """`col` on a frame's last row as a float (NaN when the frame or column is missing)."""
+    if df is None or df.empty or col not in df.columns:
+        return np.nan
+    return float(df[col].iloc[-1])
+
+
+def universe_stats(frames: Dict[str, pd.DataFrame], indicators: Iterable[str] = DEFAULT_INDICATORS,
+                   thresholds: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    quick_stats-shaped dicts for every symbol, computed from one aligned
+    matrix. Volatility over the windows add_indicators derives is not put in
+    the panel: it is read from the frames' Vol_w column as quick_stats reads
+    it (None when a projection dropped it), so both paths give the same
+    floats and a summary hashes the same whether its symbol was batched or not.
+    """
+    indicators = list(indicators)
+    closes = close_matrix(frames)
+    stats: Dict[str, Dict[str, Any]] = {sym: {"empty": True} for sym in frames}
+    if closes.empty:
+        return stats
+    specs = _parse(indicators)[0]
+    read = {name: f"Vol_{w}" for name, op, w in specs if op == "vol" and w in WINDOWS}
+    panel = compute_panel(closes, [i for i in indicators if i not in read], thresholds)
+    for name, col in read.items():
+        panel[name] = [last_value(frames[sym], col) for sym in panel.index]
+    # Columns in the order compute_panel would have produced them
+    cols = ["asof", "close"] + [name for name, _, _ in specs] + [i for i in ("trend", "sentiment") if i in indicators]
+    for sym, row in zip(panel.index, panel[cols].itertuples(index=False, name=None)):
+        rec = {}
+        for col, val in zip(cols, row):
+            if col == "asof":
+                rec[col] = pd.Timestamp(val).strftime("%Y-%m-%d")
+            elif isinstance(val, float):
+                rec[col] = None if np.isnan(val) else float(val)
+            else:
+                rec[col] = val
+        stats[sym] = rec
+    return stats
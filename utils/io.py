@@ -1,4 +1,5 @@
 from __future__ import annotations
+import sys
 import yaml
 from pathlib import Path
 from typing import Dict
@@ -33,6 +34,21 @@ def colorize_trend(trend: str) -> str:
     else:
         return f"{Color.YELLOW}→ Flat{Color.RESET}"
 
+_quiet = False
+
+
+def set_quiet(quiet: bool):
+    """Silence per-task progress lines (`say`); summaries still print."""
+    global _quiet
+    _quiet = quiet
+
+
+def say(msg: str):
+    """Progress line; one write so lines from worker threads don't interleave."""
+    if not _quiet:
+        sys.stdout.write(msg + "\n")
+
+
 def load_yaml(path: str) -> Dict:
     """Load YAML configuration file."""
     p = Path(path)
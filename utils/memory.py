@@ -1,13 +1,151 @@
 from __future__ import annotations
 import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from utils import trace
 
-class JsonMemory:
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Inter-process exclusive lock on `<path>.lock` (flock on POSIX, msvcrt on Windows)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(f"{path}.lock")
+        self._local = threading.Lock()
+
+    def __enter__(self):
+        self._local.acquire()
+        self._fh = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        else:
+            self._fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            else:
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._fh.close()
+            self._local.release()
+
+
+class Memory:
+    """
+    Base key–value memory. Backends implement `_apply(ops)` and `get`;
+    `append` keeps a per-key history (latest value is also what `get` returns).
+    Writes inside `batch()` are buffered and applied in one go.
+    """
+    def __init__(self, history_limit: int = 100, flush_every: int = 100):
+        self.history_limit = history_limit
+        self.flush_every = flush_every
+        self._buffer: Optional[List[Tuple[str, str, Any]]] = None
+        self._buf_lock = threading.RLock()
+
+    # --- public API ---
+    def update_key(self, key: str, value: Any):
+        self._submit([("set", key, value)])
+
+    def update_many(self, items: Dict[str, Any]):
+        self._submit([("set", k, v) for k, v in items.items()])
+
+    def append(self, key: str, value: Any):
+        """Record `value` in key's history and make it the current value."""
+        self._submit([("append", key, value)])
+
+    def get(self, key: str, default=None):
+        raise NotImplementedError
+
+    def history(self, key: str) -> List[Any]:
+        raise NotImplementedError
+
+    def export(self) -> Tuple[Dict[str, Any], Dict[str, List[Any]]]:
+        """All current values and all histories."""
+        raise NotImplementedError
+
+    def merge_from(self, other: "Memory"):
+        """Replay another memory's records into this one (histories in order, then plain values)."""
+        data, hist = other.export()
+        ops = [("append", k, v) for k, values in hist.items() for v in values]
+        ops += [("set", k, v) for k, v in data.items() if k not in hist]
+        if ops:
+            self._submit(ops)
+
+    @contextmanager
+    def batch(self) -> Iterator["Memory"]:
+        with self._buf_lock:
+            outer = self._buffer is not None
+            if not outer:
+                self._buffer = []
+        try:
+            yield self
+        finally:
+            if not outer:
+                with self._buf_lock:
+                    ops, self._buffer = self._buffer, None
+                if ops:
+                    self._traced_apply(ops)
+
+    def close(self):
+        pass
+
+    # --- backend hooks ---
+    def _submit(self, ops: List[Tuple[str, str, Any]]):
+        with self._buf_lock:
+            if self._buffer is not None:
+                self._buffer.extend(ops)
+                if len(self._buffer) < self.flush_every:
+                    return
+                ops, self._buffer = self._buffer, []
+        self._traced_apply(ops)
+
+    def _traced_apply(self, ops: List[Tuple[str, str, Any]]):
+        with trace.span(f"{type(self).__name__}.write", "memory", ops=len(ops)):
+            self._apply(ops)
+
+    def _apply(self, ops: List[Tuple[str, str, Any]]):
+        raise NotImplementedError
+
+    def _fold(self, data: Dict[str, Any], hist: Dict[str, List[Any]], ops: List[Tuple[str, str, Any]]):
+        for op, key, value in ops:
+            data[key] = value
+            if op == "append":
+                h = hist.setdefault(key, [])
+                h.append(value)
+                if self.history_limit and len(h) > self.history_limit:
+                    del h[: len(h) - self.history_limit]
+
+
+class JsonMemory(Memory):
     """A simple JSON-based key–value store for agent memory."""
 
-    def __init__(self, path: str):
+    HISTORY_PREFIX = "history:"
+
+    def __init__(self, path: str, **kw):
+        super().__init__(**kw)
         self.path = Path(path)
+        self._lock = FileLock(self.path)
         if not self.path.exists():
             self.path.write_text("{}", encoding="utf-8")
 
@@ -18,12 +156,190 @@ class JsonMemory:
             return {}
 
     def _write(self, obj: Dict[str, Any]):
-        self.path.write_text(json.dumps(obj, indent=2), encoding="utf-8")
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(obj, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
 
-    def update_key(self, key: str, value: Any):
-        data = self._read()
-        data[key] = value
-        self._write(data)
+    def _apply(self, ops):
+        with self._lock:
+            data = self._read()
+            hist = {k[len(self.HISTORY_PREFIX):]: v for k, v in data.items() if k.startswith(self.HISTORY_PREFIX)}
+            self._fold(data, hist, ops)
+            for k, v in hist.items():
+                data[self.HISTORY_PREFIX + k] = v
+            self._write(data)
 
     def get(self, key: str, default=None):
         return self._read().get(key, default)
+
+    def history(self, key: str) -> List[Any]:
+        return self._read().get(self.HISTORY_PREFIX + key, [])
+
+    def export(self):
+        data = self._read()
+        hist = {k[len(self.HISTORY_PREFIX):]: data.pop(k) for k in list(data) if k.startswith(self.HISTORY_PREFIX)}
+        return data, hist
+
+
+class LogMemory(Memory):
+    """
+    Append-only JSON-lines log: every write is one appended line, so a write
+    costs O(1) instead of rewriting the whole store. State is rebuilt by
+    replaying the log, which is compacted into a snapshot once it holds more
+    than `compact_ratio` lines per live key.
+    """
+    def __init__(self, path: str, compact_ratio: int = 8, **kw):
+        super().__init__(**kw)
+        self.path = Path(path)
+        self.compact_ratio = compact_ratio
+        self._lock = FileLock(self.path)
+        self._data: Dict[str, Any] = {}
+        self._hist: Dict[str, List[Any]] = {}
+        self._offset = 0
+        self._lines = 0
+        self._gen = None
+        self.path.touch(exist_ok=True)
+        with self._lock:
+            self._catch_up()
+
+    def _catch_up(self):
+        """Replay lines appended since we last looked (possibly by another process)."""
+        with self.path.open("rb") as f:
+            head = f.readline()
+            gen = json.loads(head).get("gen") if head.startswith(b'{"op": "gen"') else None
+            if gen != self._gen or os.fstat(f.fileno()).st_size < self._offset:
+                # Compacted (replaced) by someone else: start over
+                self._data, self._hist, self._offset, self._lines, self._gen = {}, {}, 0, 0, gen
+            f.seek(self._offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # torn write from a crashed writer; ignore the tail
+                self._offset += len(raw)
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    continue
+                self._lines += 1
+                if rec.get("op") == "gen":
+                    continue
+                if rec.get("op") == "snapshot":
+                    self._data, self._hist = rec["data"], rec["history"]
+                else:
+                    self._fold(self._data, self._hist, [(rec["op"], rec["k"], rec["v"])])
+
+    def _apply(self, ops):
+        payload = "".join(json.dumps({"op": op, "k": k, "v": v}) + "\n" for op, k, v in ops).encode("utf-8")
+        with self._lock:
+            self._catch_up()
+            with self.path.open("ab") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            self._catch_up()
+            if self._lines > self.compact_ratio * max(len(self._data), 16):
+                self._compact()
+
+    def _compact(self):
+        """Rewrite the log as a single snapshot line (caller holds the lock)."""
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"op": "gen", "gen": uuid.uuid4().hex}) + "\n"
+                       + json.dumps({"op": "snapshot", "data": self._data, "history": self._hist}) + "\n",
+                       encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._gen, self._offset, self._lines = None, 0, 0
+        self._data, self._hist = {}, {}
+        self._catch_up()
+
+    def compact(self):
+        with self._lock:
+            self._catch_up()
+            self._compact()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            self._catch_up()
+            return self._data.get(key, default)
+
+    def history(self, key: str) -> List[Any]:
+        with self._lock:
+            self._catch_up()
+            return list(self._hist.get(key, []))
+
+    def export(self):
+        with self._lock:
+            self._catch_up()
+            return dict(self._data), {k: list(v) for k, v in self._hist.items()}
+
+
+class SqliteMemory(Memory):
+    """SQLite-backed memory (WAL mode): each batch is one transaction, safe across processes."""
+
+    def __init__(self, path: str, **kw):
+        super().__init__(**kw)
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS history ("
+                               "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, value TEXT NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS history_key ON history (key, id)")
+
+    def _apply(self, ops):
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.executemany("INSERT INTO kv (key, value) VALUES (?, ?) "
+                                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                                [(k, json.dumps(v)) for _, k, v in ops])
+                appended = [(k, json.dumps(v)) for op, k, v in ops if op == "append"]
+                if appended:
+                    cur.executemany("INSERT INTO history (key, value) VALUES (?, ?)", appended)
+                    if self.history_limit:
+                        for key in {k for k, _ in appended}:
+                            cur.execute("DELETE FROM history WHERE key = ? AND id NOT IN "
+                                        "(SELECT id FROM history WHERE key = ? ORDER BY id DESC LIMIT ?)",
+                                        (key, key, self.history_limit))
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def history(self, key: str) -> List[Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT value FROM history WHERE key = ? ORDER BY id", (key,)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def export(self):
+        with self._lock:
+            kv = self._conn.execute("SELECT key, value FROM kv").fetchall()
+            rows = self._conn.execute("SELECT key, value FROM history ORDER BY id").fetchall()
+        hist: Dict[str, List[Any]] = {}
+        for k, v in rows:
+            hist.setdefault(k, []).append(json.loads(v))
+        return {k: json.loads(v) for k, v in kv}, hist
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_memory(cfg: Dict[str, Any]) -> Memory:
+    """Build the backend named by `memory.backend` (json | log | sqlite)."""
+    m = cfg.get("memory", {})
+    backend = m.get("backend", "json")
+    kw = {"history_limit": m.get("history_limit", 100), "flush_every": m.get("flush_every", 100)}
+    if backend == "json":
+        return JsonMemory(m.get("path", "memory.json"), **kw)
+    if backend == "log":
+        return LogMemory(m.get("path", "memory.jsonl"), m.get("compact_ratio", 8), **kw)
+    if backend == "sqlite":
+        return SqliteMemory(m.get("path", "memory.db"), **kw)
+    raise ValueError(f"Unknown memory backend: {backend}")
@@ -0,0 +1,158 @@
+from __future__ import annotations
+import json
+import math
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+from urllib.parse import quote
+from core.types import Report
+from utils.io import colorize_sentiment, colorize_trend
+
+NEWS_FIELDS = ("title", "publisher", "link", "providerPublishTime")
+
+
+def _clean(value: Any) -> Any:
+    if isinstance(value, float):
+        return None if math.isnan(value) else round(value, 6)
+    if isinstance(value, dict):
+        return {k: _clean(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_clean(v) for v in value]
+    return value
+
+
+def compact_sections(rep: Report) -> Dict[str, Any]:
+    """Sections without derived or empty fields (news keeps only its source columns)."""
+    out = {}
+    for name, value in rep.sections.items():
+        if name == "news":
+            value = [{k: it.get(k) for k in NEWS_FIELDS if it.get(k) is not None} for it in value]
+        out[name] = _clean(value)
+    return out
+
+
+class ReportSink:
+    """Receives each finished report once; `close` is called after the run."""
+    def write(self, rep: Report):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MarkdownDirSink(ReportSink):
+    """One <symbol>.md file per report, written atomically."""
+    def __init__(self, root: str = "reports"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def write(self, rep: Report):
+        p = self.root / f"{quote(rep.symbol, safe='^=')}.md"
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.tmp")
+        tmp.write_text(rep.markdown, encoding="utf-8")
+        os.replace(tmp, p)
+
+
+class JsonlSink(ReportSink):
+    """One compact JSON object per line: symbol, markdown and sections."""
+    def __init__(self, path: str = "reports.jsonl"):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(path, "w", encoding="utf-8")
+
+    def write(self, rep: Report):
+        doc = {"symbol": rep.symbol, "markdown": rep.markdown, "sections": compact_sections(rep)}
+        self._fh.write(json.dumps(doc, separators=(",", ":"), default=str) + "\n")
+        self._fh.flush()
+
+    def close(self):
+        self._fh.close()
+
+
+class CombinedDocumentSink(ReportSink):
+    """All reports appended to a single Markdown document as they finish."""
+    def __init__(self, path: str = "reports.md", title: str = "Market Reports"):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(path, "w", encoding="utf-8")
+        self._fh.write(f"# {title}\n\n")
+
+    def write(self, rep: Report):
+        self._fh.write(rep.markdown.rstrip("\n") + "\n\n---\n\n")
+        self._fh.flush()
+
+    def close(self):
+        self._fh.close()
+
+
+class TerminalSink(ReportSink):
+    """Colorized console view; colors come from the report's sections, not from re-parsing text."""
+    def __init__(self, stream: Optional[TextIO] = None, color: bool = True):
+        self.stream = stream
+        self.color = color
+
+    def render(self, rep: Report) -> str:
+        md = rep.markdown
+        trend = (rep.sections.get("stats") or {}).get("trend")
+        sentiment = rep.sections.get("sentiment")
+        if self.color and trend and sentiment:
+            md = md.replace(f"Trend: **{trend}** | Sentiment: **{sentiment}**",
+                            f"Trend: {colorize_trend(trend)} | Sentiment: {colorize_sentiment(f'**{sentiment}**')}", 1)
+        bar = "#" * 40
+        return f"{bar}\n📊 Report for {rep.symbol}\n{bar}\n{md}\n"
+
+    def write(self, rep: Report):
+        (self.stream or sys.stdout).write(self.render(rep))
+
+
+class SnapshotSink(ReportSink):
+    """Latest report per symbol, kept in memory; `snapshot()` is a cheap copy safe to take from any thread."""
+    def __init__(self):
+        self._latest: Dict[str, Report] = {}
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def write(self, rep: Report):
+        with self._lock:
+            self._latest[rep.symbol] = rep
+            self.version += 1
+
+    def snapshot(self) -> Dict[str, Report]:
+        with self._lock:
+            return dict(self._latest)
+
+
+class SinkSet(ReportSink):
+    """Fans a report out to several sinks; writes from worker threads are serialized."""
+    def __init__(self, sinks: List[ReportSink]):
+        self.sinks = sinks
+        self.written = 0
+        self._lock = threading.Lock()
+
+    def write(self, rep: Report):
+        with self._lock:
+            for s in self.sinks:
+                s.write(rep)
+            self.written += 1
+
+    def close(self):
+        for s in self.sinks:
+            s.close()
+
+
+def open_sinks(cfg: Dict[str, Any], extra: Optional[List[ReportSink]] = None) -> SinkSet:
+    """Sinks named in `reports.sinks` (markdown | jsonl | combined | terminal) plus any passed in."""
+    r = cfg.get("reports", {})
+    sinks: List[ReportSink] = []
+    for name in r.get("sinks", []):
+        if name == "markdown":
+            sinks.append(MarkdownDirSink(r.get("dir", "reports")))
+        elif name == "jsonl":
+            sinks.append(JsonlSink(r.get("jsonl", "reports/reports.jsonl")))
+        elif name == "combined":
+            sinks.append(CombinedDocumentSink(r.get("combined", "reports/reports.md")))
+        elif name == "terminal":
+            sinks.append(TerminalSink())
+        else:
+            raise ValueError(f"Unknown report sink: {name}")
+    return SinkSet(sinks + list(extra or []))
@@ -0,0 +1,148 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class Span:
+    """A timed region. Extra fields can be attached while it runs with `set`."""
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict[str, Any]):
+        self.tracer, self.name, self.cat, self.args = tracer, name, cat, args
+        self.start = 0
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(self, end)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """Tracing off: every call is a no-op returning a shared span."""
+    enabled = False
+
+    def span(self, name: str, cat: str = "task", **args) -> _NullSpan:
+        return NULL_SPAN
+
+    def counter(self, name: str, **values):
+        pass
+
+    def close(self):
+        pass
+
+
+class Tracer:
+    """
+    Collects spans and counters. Each finished span is appended to a JSON-lines
+    log as it happens; `close` writes a Chrome trace (chrome://tracing, Perfetto).
+    """
+    enabled = True
+
+    def __init__(self, jsonl_path: Optional[str] = None, chrome_path: Optional[str] = None):
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self.chrome_path = Path(chrome_path) if chrome_path else None
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._fh = self.jsonl_path.open("w", encoding="utf-8") if self.jsonl_path else None
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any], prefix: Optional[str] = None):
+        t = cfg.get("tracing", {})
+        if prefix:
+            return cls(f"{prefix}.jsonl", f"{prefix}.chrome.json")
+        if not t.get("enabled", False):
+            return NullTracer()
+        return cls(t.get("jsonl", "trace.jsonl"), t.get("chrome", "trace.chrome.json"))
+
+    def span(self, name: str, cat: str = "task", **args) -> Span:
+        return Span(self, name, cat, args)
+
+    def counter(self, name: str, **values):
+        ev = {"name": name, "ph": "C", "ts": (time.perf_counter_ns() - self._t0) / 1000,
+              "pid": self._pid, "tid": threading.get_ident(), "args": values}
+        with self._lock:
+            self._events.append(ev)
+            if self._fh:
+                self._fh.write(json.dumps({"type": "counter", "name": name, **values}, default=str) + "\n")
+
+    def _record(self, span: Span, end: int):
+        ts = (span.start - self._t0) / 1000
+        dur = (end - span.start) / 1000
+        ev = {"name": span.name, "cat": span.cat, "ph": "X", "ts": ts, "dur": dur,
+              "pid": self._pid, "tid": threading.get_ident(), "args": span.args}
+        with self._lock:
+            self._events.append(ev)
+            if self._fh:
+                self._fh.write(json.dumps({"type": "span", "name": span.name, "cat": span.cat,
+                                           "start_ms": ts / 1000, "dur_ms": dur / 1000,
+                                           "thread": threading.current_thread().name, **span.args},
+                                          default=str) + "\n")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Total and count of span time per category."""
+        out: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for ev in self._events:
+                if ev["ph"] != "X":
+                    continue
+                s = out.setdefault(ev["cat"], {"count": 0, "total_ms": 0.0})
+                s["count"] += 1
+                s["total_ms"] += ev["dur"] / 1000
+        return out
+
+    def close(self):
+        with self._lock:
+            if self._fh:
+                self._fh.close()
+                self._fh = None
+            if self.chrome_path:
+                self.chrome_path.write_text(json.dumps({"traceEvents": self._events, "displayTimeUnit": "ms"},
+                                                       default=str), encoding="utf-8")
+
+
+_tracer: Any = NullTracer()
+
+
+def get_tracer():
+    return _tracer
+
+
+def set_tracer(tracer) -> None:
+    global _tracer
+    _tracer = tracer
+
+
+def span(name: str, cat: str = "task", **args):
+    """Module-level shortcut used by providers and agents: `with trace.span(...)`."""
+    return _tracer.span(name, cat, **args)
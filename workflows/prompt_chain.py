@@ -1,6 +1,7 @@
 # workflows/prompt_chain.py
 from __future__ import annotations
 import pandas as pd
+from tools.matcher import KeywordMatcher, default_matcher
 from tools.news import with_sentiment
 
 def ingest_news(df: pd.DataFrame) -> pd.DataFrame:
@@ -12,21 +13,24 @@ def preprocess(df: pd.DataFrame) -> pd.DataFrame:
     out["title"] = out["title"].astype(str).str.strip()
     return out
 
-def classify(df: pd.DataFrame) -> pd.DataFrame:
-    return with_sentiment(df)
+# Without a matcher the built-in lexicons are used; pass KeywordMatcher.from_config(cfg) for a run's own
 
-def extract(df: pd.DataFrame) -> pd.DataFrame:
-    # toy “event” extractor by keyword (upgrade later)
-    events = []
-    for _, r in df.iterrows():
-        title = r["title"].lower()
-        if "probe" in title or "lawsuit" in title: evt = "regulatory"
-        elif "rally" in title or "beat" in title:   evt = "market_positive"
-        elif "delay" in title or "concerns" in title: evt = "supply_chain"
-        else: evt = "other"
-        events.append(evt)
+def classify(df: pd.DataFrame, matcher: KeywordMatcher | None = None) -> pd.DataFrame:
+    return with_sentiment(df, matcher=matcher)
+
+def extract(df: pd.DataFrame, matcher: KeywordMatcher | None = None) -> pd.DataFrame:
+    # keyword "event" labels from the `event` lexicon, one pass over the column
+    out = df.copy()
+    out["event"] = (matcher or default_matcher()).label_frame(out["title"])["event"]
+    return out
+
+def label_all(df: pd.DataFrame, matcher: KeywordMatcher | None = None) -> pd.DataFrame:
+    """Event, sentiment and route columns together; one scan per distinct headline."""
+    labels = (matcher or default_matcher()).label_frame(df["title"])
     out = df.copy()
-    out["event"] = events
+    out["event"] = labels["event"]
+    out["label"] = labels["sentiment"]
+    out["route"] = labels["route"]
     return out
 
 def summarize(df: pd.DataFrame) -> dict:
@@ -0,0 +1,181 @@
+# workflows/replay.py
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from tools.universe_stats import SENT_LABELS, close_matrix, right_align
+
+# Bucket codes index SENT_LABELS: 0 very_bearish .. 2 neutral .. 4 very_bullish
+THRESH_KEYS = ("very_bearish", "bearish", "bullish", "very_bullish")
+TRENDS = np.array(["down", "flat", "up"], dtype=object)
+BEARISH, BULLISH = (0, 1), (3, 4)
+
+
+def bar_closes(frames: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Close per bar (rows) and symbol (columns), right-aligned so row -1 is
+    every symbol's last bar and offsets count bars, like quick_stats' iloc.
+    """
+    closes = close_matrix(frames)
+    if closes.empty:
+        return np.empty((0, 0)), []
+    aligned, _ = right_align(closes.to_numpy(dtype=float))
+    return aligned, list(closes.columns)
+
+
+def lookback_returns(closes: np.ndarray, n: int = 20) -> np.ndarray:
+    """close[t] / close[t - n] - 1 at every bar (NaN for the first n)."""
+    out = np.full(closes.shape, np.nan)
+    if len(closes) > n:
+        out[n:] = closes[n:] / closes[:-n] - 1
+    return out
+
+
+def forward_returns(closes: np.ndarray, h: int) -> np.ndarray:
+    """close[t + h] / close[t] - 1 at every bar (NaN for the last h)."""
+    out = np.full(closes.shape, np.nan)
+    if len(closes) > h:
+        out[:-h] = closes[h:] / closes[:-h] - 1
+    return out
+
+
+def sentiment_codes(ret: np.ndarray, thresholds: Dict[str, float]) -> np.ndarray:
+    """MarketAgent.classify for every bar at once, as SENT_LABELS codes (NaN is neutral)."""
+    r = np.asarray(ret, dtype=float)
+    with np.errstate(invalid="ignore"):
+        return np.select([r <= thresholds["very_bearish"], r <= thresholds["bearish"],
+                          r >= thresholds["very_bullish"], r >= thresholds["bullish"]],
+                         [0, 1, 4, 3], default=2).astype(np.int8)
+
+
+def trend_codes(ret: np.ndarray) -> np.ndarray:
+    """quick_stats' trend for every bar, as TRENDS codes (NaN is flat)."""
+    return (np.sign(np.nan_to_num(np.asarray(ret, dtype=float))) + 1).astype(np.int8)
+
+
+def label_bars(frames: Dict[str, pd.DataFrame], thresholds: Dict[str, float],
+               lookback: int = 20) -> Dict[str, pd.DataFrame]:
+    """Per-symbol frames of every bar's close, lookback return, sentiment and trend label."""
+    closes, symbols = bar_closes(frames)
+    ret = lookback_returns(closes, lookback)
+    sent, trend = sentiment_codes(ret, thresholds), trend_codes(ret)
+    out = {}
+    for j, sym in enumerate(symbols):
+        keep = ~np.isnan(closes[:, j])
+        df = frames[sym]
+        dates = np.asarray(df["Date"] if "Date" in df.columns else df.index)[df["Close"].notna().to_numpy()]
+        out[sym] = pd.DataFrame({"Date": dates, "Close": closes[keep, j], f"ret_{lookback}": ret[keep, j],
+                                 "sentiment": SENT_LABELS[sent[keep, j]], "trend": TRENDS[trend[keep, j]]})
+    return out
+
+
+def threshold_grid(spec: Dict[str, Sequence[float]]) -> np.ndarray:
+    """
+    Every combination of the listed cut-offs as (very_bearish, bearish,
+    bullish, very_bullish) rows, keeping only ordered ones
+    (very_bearish <= bearish < bullish <= very_bullish).
+    """
+    axes = np.meshgrid(*(np.asarray(spec[k], dtype=float) for k in THRESH_KEYS), indexing="ij")
+    grid = np.stack([a.ravel() for a in axes], axis=1)
+    ok = (grid[:, 0] <= grid[:, 1]) & (grid[:, 1] < grid[:, 2]) & (grid[:, 2] <= grid[:, 3])
+    return grid[ok]
+
+
+class Outcomes:
+    """
+    Every labelled bar of one horizon sorted by its lookback return, with
+    prefix sums of its forward outcome. A bucket is then a contiguous slice
+    of the sorted bars, so its count, up/down counts and mean forward return
+    are two lookups each, and a whole threshold grid is a few searchsorted
+    calls with no loop over bars or grid points.
+    """
+    def __init__(self, ret: np.ndarray, fwd: np.ndarray):
+        ok = ~np.isnan(ret) & ~np.isnan(fwd)
+        order = np.argsort(ret[ok], kind="stable")
+        self.ret = ret[ok][order]
+        f = fwd[ok][order]
+        self.n = len(f)
+        self._up = np.concatenate([[0], np.cumsum(f > 0)])
+        self._down = np.concatenate([[0], np.cumsum(f < 0)])
+        self._sum = np.concatenate([[0.0], np.cumsum(f)])
+
+    def _slices(self, edges: np.ndarray) -> Dict[str, np.ndarray]:
+        lo, hi = edges[..., :-1], edges[..., 1:]
+        count = hi - lo
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {"count": count, "up": self._up[hi] - self._up[lo], "down": self._down[hi] - self._down[lo],
+                    "mean_fwd": (self._sum[hi] - self._sum[lo]) / count}
+
+    def sentiment(self, grid: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per grid row and bucket: count, up, down and mean forward return, each shaped (rows, 5)."""
+        grid = np.atleast_2d(grid)
+        # classify checks `<=` on the bearish side and `>=` on the bullish side
+        edges = np.stack([np.zeros(len(grid), dtype=np.int64),
+                          np.searchsorted(self.ret, grid[:, 0], "right"),
+                          np.searchsorted(self.ret, grid[:, 1], "right"),
+                          np.searchsorted(self.ret, grid[:, 2], "left"),
+                          np.searchsorted(self.ret, grid[:, 3], "left"),
+                          np.full(len(grid), self.n, dtype=np.int64)], axis=1)
+        return self._slices(edges)
+
+    def trend(self) -> Dict[str, np.ndarray]:
+        """count, up, down and mean forward return for down / flat / up, each shaped (3,)."""
+        edges = np.array([0, np.searchsorted(self.ret, 0.0, "left"), np.searchsorted(self.ret, 0.0, "right"), self.n])
+        return self._slices(edges)
+
+
+def hit_rates(buckets: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Directional hit rate (bearish buckets fell, bullish ones rose) and coverage (share not neutral) per row."""
+    hits = buckets["down"][..., BEARISH].sum(-1) + buckets["up"][..., BULLISH].sum(-1)
+    called = buckets["count"][..., BEARISH + BULLISH].sum(-1)
+    total = buckets["count"].sum(-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return hits / called, called / total
+
+
+def _table(labels: Iterable[str], b: Dict[str, np.ndarray], directions: Sequence[int]) -> List[Dict[str, Any]]:
+    rows = []
+    for i, (label, d) in enumerate(zip(labels, directions)):
+        n = int(b["count"][i])
+        hit = b["up"][i] if d > 0 else b["down"][i] if d < 0 else None
+        rows.append({"label": str(label), "bars": n,
+                     "hit_rate": None if hit is None or n == 0 else float(hit / n),
+                     "up_rate": float(b["up"][i] / n) if n else None,
+                     "mean_fwd": float(b["mean_fwd"][i]) if n else None})
+    return rows
+
+
+def replay(frames: Dict[str, pd.DataFrame], thresholds: Dict[str, float], grid: Optional[np.ndarray] = None,
+           horizons: Sequence[int] = (5, 20), lookback: int = 20, min_coverage: float = 0.0,
+           top: int = 10) -> Dict[str, Any]:
+    """
+    Replay the sentiment and trend labels over every bar of every symbol and
+    score them against forward returns at each horizon: per-bucket hit rates
+    for `thresholds`, per-trend hit rates, and the best `top` rows of `grid`
+    by directional hit rate among those calling at least `min_coverage` of bars.
+    """
+    closes, symbols = bar_closes(frames)
+    ret = lookback_returns(closes, lookback)
+    current = np.array([[thresholds[k] for k in THRESH_KEYS]])
+    out: Dict[str, Any] = {"symbols": len(symbols), "bars": int((~np.isnan(closes)).sum()),
+                           "lookback": lookback, "thresholds": dict(thresholds), "horizons": {}}
+    for h in horizons:
+        oc = Outcomes(ret, forward_returns(closes, h))
+        now = oc.sentiment(current)
+        hit, cov = hit_rates(now)
+        res: Dict[str, Any] = {
+            "bars": oc.n,
+            "sentiment": _table(SENT_LABELS, {k: v[0] for k, v in now.items()}, (-1, -1, 0, 1, 1)),
+            "trend": _table(TRENDS, oc.trend(), (-1, 0, 1)),
+            "hit_rate": None if np.isnan(hit[0]) else float(hit[0]),
+            "coverage": None if np.isnan(cov[0]) else float(cov[0]),
+        }
+        if grid is not None and len(grid):
+            hits, covs = hit_rates(oc.sentiment(grid))
+            score = np.where(np.isnan(hits) | (covs < min_coverage), -np.inf, hits)
+            best = np.argsort(-score, kind="stable")[:top]
+            res["grid_size"] = len(grid)
+            res["best"] = [{**dict(zip(THRESH_KEYS, map(float, grid[i]))), "hit_rate": float(hits[i]),
+                            "coverage": float(covs[i])} for i in best if np.isfinite(score[i])]
+        out["horizons"][h] = res
+    return out
@@ -1,8 +1,15 @@
 # workflows/router.py
-def route_item(item: dict) -> str:
-    txt = (item.get("title") or item.get("text") or "").lower()
-    if any(k in txt for k in ["10-k", "10q", "earnings", "eps", "revenue"]):
-        return "earnings_analyzer"
-    if any(k in txt for k in ["rally", "downgrade", "upgrade", "market", "fed"]):
-        return "market_analyzer"
-    return "news_analyzer"
+from __future__ import annotations
+import pandas as pd
+from tools.matcher import KeywordMatcher, default_matcher
+
+def route_item(item: dict, matcher: KeywordMatcher | None = None) -> str:
+    txt = item.get("title") or item.get("text") or ""
+    return (matcher or default_matcher()).label(txt)["route"]
+
+def route_frame(df: pd.DataFrame, matcher: KeywordMatcher | None = None) -> pd.Series:
+    """route_item for every row at once (title, falling back to text)."""
+    txt = df["title"] if "title" in df.columns else pd.Series("", index=df.index)
+    if "text" in df.columns:
+        txt = txt.where(txt.notna() & (txt.astype(str) != ""), df["text"])
+    return (matcher or default_matcher()).label_frame(txt)["route"]
@@ -0,0 +1,233 @@
+# workflows/watch.py
+from __future__ import annotations
+import math
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from core.graph import TemplatePlan
+from core.memo import content_hash
+from core.types import Artifact, Report, Task
+from utils.sinks import ReportSink, SnapshotSink, open_sinks
+
+# Futures (ES=F, NQ=F, GC=F) trade nearly around the clock, so they are polled most often
+DEFAULT_CLASSES: Dict[str, Dict[str, Any]] = {
+    "futures": {"match": r"=F$", "every": 300},
+    "index": {"match": r"^\^", "every": 900},
+    "equity": {"every": 3600},
+}
+
+
+class SystemClock:
+    def now(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        time.sleep(max(0.0, seconds))
+
+
+class FakeClock:
+    """Manual time for tests: `sleep` returns at once and moves the clock forward instead."""
+    def __init__(self, start: float = 0.0):
+        self.t = float(start)
+
+    def now(self) -> float:
+        return self.t
+
+    def sleep(self, seconds: float):
+        self.t += max(0.0, seconds)
+
+    def advance(self, seconds: float):
+        self.t += seconds
+
+
+class Schedule:
+    """
+    Poll period per asset class. A symbol belongs to the first class whose
+    `match` regex finds it (a class without one takes every symbol) and is
+    due once `every` seconds have passed since it was last polled.
+    """
+    def __init__(self, classes: Optional[Dict[str, Dict[str, Any]]] = None):
+        classes = classes or DEFAULT_CLASSES
+        self.classes = [(name, re.compile(c["match"]) if c.get("match") else None, float(c.get("every", 3600)))
+                        for name, c in classes.items()]
+        self._class: Dict[str, Tuple[str, float]] = {}
+        self._last: Dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "Schedule":
+        return cls(cfg.get("watch", {}).get("classes"))
+
+    def asset_class(self, symbol: str) -> Tuple[str, float]:
+        """(class name, period in seconds); symbols no class matches fall back to the slowest period."""
+        if symbol not in self._class:
+            match = next(((name, every) for name, rx, every in self.classes if rx is None or rx.search(symbol)),
+                         ("other", max(every for _, _, every in self.classes)))
+            self._class[symbol] = match
+        return self._class[symbol]
+
+    def due(self, symbols: List[str], now: float) -> List[str]:
+        return [s for s in symbols if now - self._last.get(s, -math.inf) >= self.asset_class(s)[1]]
+
+    def mark(self, symbols: List[str], now: float):
+        for s in symbols:
+            self._last[s] = now
+
+    def next_due(self, symbols: List[str], now: float) -> float:
+        """Seconds until the next symbol is due (0 if one already is)."""
+        return max(0.0, min((self._last.get(s, -math.inf) + self.asset_class(s)[1] - now for s in symbols),
+                            default=0.0))
+
+
+class Watcher:
+    """
+    Long-running refresh loop over a warm session (a main.Session: agents,
+    price cache, plan, memo and memory stay loaded between cycles). Each
+    cycle polls the `poll` kinds (prices, news) of the symbols the schedule
+    says are due, through their registered handlers, and fingerprints what
+    came back. Only symbols whose fingerprint changed get their downstream
+    tasks (summarize, evaluate) run, seeded with the polled artifacts so
+    nothing is fetched twice. The latest report per symbol is kept in
+    memory for `snapshot()`.
+
+    Failures stay inside their cycle: a symbol whose poll or re-run failed
+    keeps its previous fingerprint, so it is re-run the next time it is due,
+    and the loop carries on sleeping to the next due time.
+    """
+    def __init__(self, session, cfg: Dict[str, Any], clock=None, sinks: Optional[List[ReportSink]] = None):
+        if not isinstance(session.dag, TemplatePlan):
+            raise ValueError("watch mode needs the full plan (no --only)")
+        w = cfg.get("watch", {})
+        self.session = session
+        self.plan: TemplatePlan = session.dag
+        self.schedule = Schedule.from_config(cfg)
+        self.poll_kinds = [k for k in w.get("poll", ["prices", "news"]) if k in self.plan.kinds()]
+        self.max_sleep = float(w.get("tick", 5.0))  # how long stop() can take to be noticed
+        self.clock = clock or SystemClock()
+        self.latest = SnapshotSink()
+        self.out = open_sinks(cfg, list(sinks or []) + [self.latest])
+        self._poll_through_cache(cfg)
+        self.fingerprints: Dict[str, str] = {}
+        self.cycles = 0
+        self.stats = {"polled": 0, "changed": 0, "unchanged": 0, "failed": 0, "errors": 0}
+        self._stop = threading.Event()
+
+    def _poll_through_cache(self, cfg: Dict[str, Any]):
+        # The schedule decides when a symbol is polled. A cached series younger than its TTL
+        # would be served without asking the provider, so while watching every poll is a
+        # tail refresh; the cache still saves refetching the whole history.
+        cache = self.session.market.price_cache if "prices" in self.poll_kinds else None
+        if cache is not None:
+            cache.ttl = {**cache.ttl, cfg.get("prices", {}).get("interval", "1d"): 0}
+
+    def snapshot(self) -> Dict[str, Report]:
+        """Latest report per symbol (a shallow copy; reports are never modified once written)."""
+        return self.latest.snapshot()
+
+    def poll(self, symbols: List[str]) -> Dict[str, Dict[str, Tuple[Any, Dict[str, Any]]]]:
+        """
+        {symbol: {task_id: (content, meta)}} for the poll kinds, in plan step
+        order. Symbols in a batch whose fetch raised are left out.
+        """
+        results: Dict[str, Dict[str, Tuple[Any, Dict[str, Any]]]] = {sym: {} for sym in symbols}
+        arts: Dict[str, Artifact] = {}
+        groups = {sym: self.plan.expand(sym) for sym in symbols}
+        for kind in self.poll_kinds:
+            spec = self.session.specs.get(kind)
+            if spec is None:
+                continue
+            tasks = [t for sym in symbols for t in groups[sym] if t.kind == kind and sym in results]
+            step = spec.max_batch if spec.batchable else 1
+            for i in range(0, len(tasks), step):
+                chunk = tasks[i:i + step]
+                inputs = [self._inputs(t, arts) for t in chunk]
+                try:
+                    outs = spec.batch_fn(chunk, inputs) if spec.batchable else [spec.fn(chunk[0], inputs[0])]
+                except Exception as e:
+                    syms = [t.params["symbol"] for t in chunk]
+                    print(f"⚠️ Polling {kind} failed for {', '.join(syms[:8])}{', ...' if len(syms) > 8 else ''}: "
+                          f"{type(e).__name__}: {e}")
+                    for sym in syms:
+                        results.pop(sym, None)
+                    continue
+                for t, (content, meta) in zip(chunk, outs):
+                    sym = t.params["symbol"]
+                    results[sym][t.id] = (content, meta)
+                    arts[t.id] = self.session.dispatcher.build_artifact(spec.artifact, sym, content, meta)
+        return results
+
+    @staticmethod
+    def _inputs(task: Task, arts: Dict[str, Artifact]) -> Dict[str, Artifact]:
+        return {d.partition(":")[0]: arts[d] for d in task.deps if d in arts}
+
+    def cycle(self) -> List[str]:
+        """Poll what is due and re-run the symbols that changed; returns them."""
+        now = self.clock.now()
+        due = self.schedule.due(self.plan.symbols, now)
+        if not due:
+            return []
+        self.schedule.mark(due, now)
+        polled = self.poll(due)
+        failed = [sym for sym in due if sym not in polled]
+        unchanged = len(due) - len(failed)
+        changed: List[str] = []
+        previous: Dict[str, Optional[str]] = {}
+        seeded: Dict[str, Tuple[Any, Dict[str, Any]]] = {}
+        for sym in due:
+            if sym not in polled:
+                continue
+            fp = content_hash([content_hash(content) for _, (content, _) in sorted(polled[sym].items())])
+            if self.fingerprints.get(sym) != fp:
+                previous[sym] = self.fingerprints.get(sym)
+                self.fingerprints[sym] = fp
+                changed.append(sym)
+                seeded.update(polled[sym])
+        polled.clear()
+        if changed:
+            try:
+                self.session.execute(self.plan.for_symbols(changed), self.out, keep_reports=False, seeded=seeded)
+                broken = {tid.partition(":")[2] for tid in self.session.failed}
+            except Exception as e:
+                print(f"❌ Re-running {len(changed)} symbols failed: {type(e).__name__}: {e}")
+                broken = set(changed)
+            # Back to the old fingerprint, so the next poll sees a change and re-runs them
+            for sym in changed:
+                if sym in broken:
+                    failed.append(sym)
+                    if previous[sym] is None:
+                        self.fingerprints.pop(sym, None)
+                    else:
+                        self.fingerprints[sym] = previous[sym]
+        self.cycles += 1
+        self.stats["polled"] += len(due)
+        self.stats["changed"] += len(changed)
+        self.stats["unchanged"] += unchanged - len(changed)
+        self.stats["failed"] += len(failed)
+        print(f"👀 Cycle {self.cycles}: polled {len(due)}, re-ran {len(changed)}"
+              + (f" ({', '.join(changed[:8])}{', ...' if len(changed) > 8 else ''})" if changed else "")
+              + (f", {len(failed)} failed" if failed else ""))
+        return changed
+
+    def run(self, cycles: int = 0):
+        """Cycle until `stop()` (or `cycles` polling cycles), sleeping until the next symbol is due."""
+        try:
+            while not self._stop.is_set() and not (cycles and self.cycles >= cycles):
+                try:
+                    self.cycle()
+                except Exception as e:
+                    # Whatever went wrong is retried when the symbols are next due
+                    self.cycles += 1
+                    self.stats["errors"] += 1
+                    print(f"❌ Cycle {self.cycles} failed: {type(e).__name__}: {e}")
+                if cycles and self.cycles >= cycles:
+                    break
+                self.clock.sleep(min(self.schedule.next_due(self.plan.symbols, self.clock.now()), self.max_sleep))
+        finally:
+            self.close()
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        self.out.close()
+        self.session.close()